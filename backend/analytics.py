@@ -0,0 +1,106 @@
+# backend/analytics.py
+"""
+Vote analytics from per-minute and per-hour rollups (API database).
+
+Every vote write also calls record() on the same cursor, inside the same
+transaction. record() upserts +1 into the `added` or `removed` counter of the
+(group, bucket, plan) row in vote_rollup_minute and vote_rollup_hour. Timelines and
+momentum then read a handful of rollup rows instead of scanning `votes`.
+
+Minute rows older than PLANPAL_VOTE_MINUTE_RETENTION_DAYS are pruned; hour rows
+are kept (they are tiny: at most one row per plan per hour with activity).
+"""
+import math
+import os
+import time
+from collections import Counter
+
+RESOLUTIONS = {"minute": ("vote_rollup_minute", 60), "hour": ("vote_rollup_hour", 3600)}
+MINUTE_RETENTION_S = int(float(os.getenv("PLANPAL_VOTE_MINUTE_RETENTION_DAYS", "7")) * 86400)
+PRUNE_EVERY = 256  # record() calls between sweeps of old minute rows
+
+_records = 0
+
+
+def record(c, group_id, added=(), removed=(), now=None):
+    """Count votes added to / removed from plan ids (iterables, repeats allowed) at `now`."""
+    global _records
+    added, removed = Counter(added), Counter(removed)
+    if not added and not removed:
+        return
+    now = time.time() if now is None else now
+    for table, width in RESOLUTIONS.values():
+        bucket = int(now) // width * width
+        c.executemany(
+            f"INSERT INTO {table} (group_id, bucket, plan_id, added, removed) VALUES (?, ?, ?, ?, ?) "
+            f"ON CONFLICT (group_id, bucket, plan_id) "
+            f"DO UPDATE SET added = added + excluded.added, removed = removed + excluded.removed",
+            [(group_id, bucket, plan_id, added[plan_id], removed[plan_id]) for plan_id in added.keys() | removed.keys()])
+    _records += 1
+    if _records % PRUNE_EVERY == 0:
+        prune(c, now)
+
+
+def prune(c, now=None):
+    """Drop minute buckets past retention; returns rows deleted."""
+    now = time.time() if now is None else now
+    c.execute("DELETE FROM vote_rollup_minute WHERE bucket < ?", (int(now) - MINUTE_RETENTION_S,))
+    return c.rowcount
+
+
+def _resolution(resolution):
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"resolution must be one of {', '.join(RESOLUTIONS)}")
+    return RESOLUTIONS[resolution]
+
+
+def timeline(c, group_id, resolution="hour", since=None, until=None, plan_id=None):
+    """
+    Vote activity for a group (or one of its plans) between since and until (epoch s).
+    Returns {"resolution", "group": [[bucket, added, removed], ...], "plans": {plan_id: [...]}},
+    buckets ascending; buckets with no activity are omitted.
+    """
+    table, _ = _resolution(resolution)
+    sql = f"SELECT bucket, plan_id, added, removed FROM {table} WHERE group_id = ? AND bucket >= ? AND bucket <= ?"
+    params = [group_id, int(since) if since is not None else 0, int(until) if until is not None else 2 ** 62]
+    if plan_id is not None:
+        sql += " AND plan_id = ?"
+        params.append(plan_id)
+    c.execute(sql + " ORDER BY bucket", params)
+    group, plans = [], {}
+    for bucket, pid, add, rem in c.fetchall():
+        if group and group[-1][0] == bucket:
+            group[-1][1] += add
+            group[-1][2] += rem
+        else:
+            group.append([bucket, add, rem])
+        plans.setdefault(pid, []).append([bucket, add, rem])
+    return {"resolution": resolution, "group": group, "plans": plans}
+
+
+def momentum(c, group_id, window_s=3600, half_life_s=None, now=None):
+    """
+    Plans ranked by recent vote momentum: net votes (added - removed) in the last
+    window_s seconds, each bucket weighted by 0.5 ** (age / half_life_s) so newer votes
+    count more (half-life defaults to a quarter of the window). Minute buckets are
+    used for windows up to the minute retention, hour buckets beyond that.
+    Returns [(plan_id, score, net_in_window)], best first; plans without activity are omitted.
+    Raises ValueError for a non-positive window or half-life.
+    """
+    if window_s <= 0:
+        raise ValueError("window must be positive")
+    if half_life_s is not None and half_life_s <= 0:
+        raise ValueError("half_life must be positive")
+    now = time.time() if now is None else now
+    half_life_s = half_life_s or window_s / 4
+    table, width = RESOLUTIONS["minute" if window_s <= MINUTE_RETENTION_S else "hour"]
+    c.execute(f"SELECT bucket, plan_id, added - removed FROM {table} "
+              f"WHERE group_id = ? AND bucket >= ? AND bucket <= ?",
+              (group_id, int(now - window_s) // width * width, int(now)))
+    scores, nets = Counter(), Counter()
+    for bucket, plan_id, net in c.fetchall():
+        age = max(0.0, now - (bucket + width / 2))  # bucket midpoint
+        scores[plan_id] += net * math.pow(0.5, age / half_life_s)
+        nets[plan_id] += net
+    ranked = sorted(scores, key=lambda pid: (-scores[pid], -nets[pid], pid))
+    return [(pid, round(scores[pid], 4), nets[pid]) for pid in ranked]
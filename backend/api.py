@@ -1,15 +1,44 @@
 # backend/api.py
+import hmac
+import os
 import sqlite3
 import uuid
 import json
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Response
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
+try:
+    from backend import analytics, export, fastjson, prefetch, recommender
+    from backend.metrics import REGISTRY
+    from backend.migrations import API_MIGRATIONS, ensure_schema
+    from backend.places import PLACE_JSON_SQL, load_places, upsert_places
+    from backend.ttl_cache import TTLCache
+except ImportError:
+    import analytics
+    import export
+    import fastjson
+    import prefetch
+    import recommender
+    from metrics import REGISTRY
+    from migrations import API_MIGRATIONS, ensure_schema
+    from places import PLACE_JSON_SQL, load_places, upsert_places
+    from ttl_cache import TTLCache
 
-DB_PATH = "backend.db"
+DB_PATH = os.getenv("PLANPAL_API_DB", "backend.db")
+INGEST_CHUNK = int(os.getenv("PLANPAL_INGEST_CHUNK", "1000"))  # rows per executemany in /plans/bulk
+# GET /export/{table} dumps tokens, voter ids and RSVPs: off unless an admin bearer token is configured
+EXPORT_TOKEN = os.getenv("PLANPAL_EXPORT_TOKEN")
 
-app = FastAPI(title="PlanMyOutings Backend (SQLite)")
+# token -> (group_id, frozenset of plan ids); dropped whenever a group's plans change.
+# The TTL only bounds staleness from writers outside this process.
+_GROUPS = TTLCache(maxsize=int(os.getenv("PLANPAL_GROUP_CACHE_SIZE", "4096")), ttl=300)
+_M_GROUP_CACHE = REGISTRY.counter("planpal_api_group_cache_total", "Token->group cache lookups by result")
+
+# orjson (if installed) encodes every other response too
+app = FastAPI(title="PlanMyOutings Backend (SQLite)",
+              default_response_class=ORJSONResponse if fastjson.orjson else JSONResponse)
 
 # allow calls from localhost Streamlit
 app.add_middleware(
@@ -22,30 +51,52 @@ app.add_middleware(
 
 
 # ---------- DB helpers ----------
+def _insert_plans(c, group_id, plans):
+    """Insert plans for group_id on cursor c; returns the plan objects with their new ids
+    and places as stored (the same shape GET /groups/{token}/plans serves)."""
+    inserted = []
+    place_ids = upsert_places(c, [p.place for p in plans])
+    stored = load_places(c, place_ids)
+    for p, place_id in zip(plans, place_ids):
+        c.execute("INSERT INTO plans (group_id, title, place_id) VALUES (?, ?, ?)",
+                  (group_id, p.title, place_id))
+        inserted.append({"id": c.lastrowid, "title": p.title, "place": stored[place_id], "votes": 0})
+    return inserted
+
+def _resolve_tokens(c, tokens):
+    """Map group tokens to ids in one query (json_each avoids the bound-parameter limit)."""
+    c.execute("SELECT g.token, g.id FROM groups g JOIN json_each(?) t ON g.token = t.value",
+              (json.dumps(list(tokens)),))
+    return dict(c.fetchall())
+
+def _lookup_group(c, token, plan_ids=()):
+    """
+    (group_id, plan ids) for token, from the cache or two queries; None if unknown.
+    A cached entry that lacks any of `plan_ids` is re-read: another worker may have
+    added those plans since it was cached.
+    """
+    cached = _GROUPS.get(token)
+    if cached is not None and cached[1].issuperset(plan_ids):
+        _M_GROUP_CACHE.inc(result="hit")
+        return cached
+    _M_GROUP_CACHE.inc(result="miss" if cached is None else "stale")
+    c.execute("SELECT id FROM groups WHERE token=?", (token,))
+    row = c.fetchone()
+    if not row:
+        return None
+    c.execute("SELECT id FROM plans WHERE group_id=?", (row[0],))
+    entry = (row[0], frozenset(r[0] for r in c.fetchall()))
+    _GROUPS.set(token, entry)
+    return entry
+
+def _invalidate_groups(tokens):
+    # call after commit, so a concurrent lookup can't re-cache the old plan set
+    for token in tokens:
+        _GROUPS.pop(token)
+
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""CREATE TABLE IF NOT EXISTS groups (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    token TEXT UNIQUE,
-                    name TEXT
-                 )""")
-    c.execute("""CREATE TABLE IF NOT EXISTS plans (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    group_id INTEGER,
-                    title TEXT,
-                    place_json TEXT,
-                    FOREIGN KEY(group_id) REFERENCES groups(id)
-                 )""")
-    c.execute("""CREATE TABLE IF NOT EXISTS votes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    plan_id INTEGER,
-                    user_id TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY(plan_id) REFERENCES plans(id)
-                 )""")
-    conn.commit()
-    conn.close()
+    # DDL lives in migrations.API_MIGRATIONS; this is just a version check
+    ensure_schema(DB_PATH, API_MIGRATIONS)
 
 def get_db():
     return sqlite3.connect(DB_PATH)
@@ -56,6 +107,7 @@ init_db()
 # ---------- Pydantic models ----------
 class CreateGroup(BaseModel):
     name: str
+    member_locations: List[str] = []  # optional: warms suggestion caches (see prefetch.py)
 
 class PlanItem(BaseModel):
     title: str
@@ -64,6 +116,26 @@ class PlanItem(BaseModel):
 class CreatePlans(BaseModel):
     plans: List[PlanItem]
 
+class CreateGroupWithPlans(BaseModel):
+    name: str
+    plans: List[PlanItem] = []
+    member_locations: List[str] = []
+
+class GroupPlans(BaseModel):
+    token: str
+    plans: List[PlanItem]
+
+class BulkPlans(BaseModel):
+    groups: List[GroupPlans]
+
+class VoteOp(BaseModel):
+    plan_id: int
+    user_id: str
+    vote: bool  # True = set, False = unset
+
+class BatchVotes(BaseModel):
+    ops: List[VoteOp]
+
 
 # ---------- API endpoints ----------
 @app.post("/groups")
@@ -74,54 +146,96 @@ def create_group(payload: CreateGroup):
     c.execute("INSERT INTO groups (token, name) VALUES (?, ?)", (token, payload.name))
     conn.commit()
     conn.close()
+    prefetch.prefetch_group(payload.member_locations)
     return {"token": token}
 
+@app.post("/groups/with-plans")
+def create_group_with_plans(payload: CreateGroupWithPlans):
+    """Create a group and its plans in one transaction; returns the token and plans with ids."""
+    token = uuid.uuid4().hex[:8]
+    conn = get_db()
+    try:
+        with conn:  # commits both inserts together, or rolls back on error
+            c = conn.cursor()
+            c.execute("INSERT INTO groups (token, name) VALUES (?, ?)", (token, payload.name))
+            group_id = c.lastrowid
+            plans = _insert_plans(c, group_id, payload.plans)
+    finally:
+        conn.close()
+    _GROUPS.set(token, (group_id, frozenset(p["id"] for p in plans)))
+    prefetch.prefetch_group(payload.member_locations)
+    return {"token": token, "plans": plans}
+
 @app.post("/groups/{token}/plans")
 def add_plans(token: str, payload: CreatePlans):
     conn = get_db()
     c = conn.cursor()
     # find group
-    c.execute("SELECT id FROM groups WHERE token=?", (token,))
-    row = c.fetchone()
-    if not row:
+    group = _lookup_group(c, token)
+    if not group:
         conn.close()
         raise HTTPException(status_code=404, detail="Group not found")
-    group_id = row[0]
-    inserted = []
-    for p in payload.plans:
-        place_json = json.dumps(p.place)
-        c.execute("INSERT INTO plans (group_id, title, place_json) VALUES (?, ?, ?)", (group_id, p.title, place_json))
-        inserted.append({"title": p.title})
+    inserted = _insert_plans(c, group[0], payload.plans)
     conn.commit()
     conn.close()
+    _invalidate_groups([token])
     return {"status": "ok", "inserted": len(inserted)}
 
+@app.post("/plans/bulk")
+def bulk_add_plans(payload: BulkPlans):
+    """
+    Publish plans to many groups at once (nightly curation job).
+    Tokens are resolved in one query and rows go in via chunked executemany in a
+    single transaction. Unknown tokens are skipped and reported, not fatal.
+    """
+    conn = get_db()
+    try:
+        with conn:
+            c = conn.cursor()
+            group_ids = _resolve_tokens(c, {g.token for g in payload.groups})
+            counts = {}
+            rows = []
+            for g in payload.groups:
+                group_id = group_ids.get(g.token)
+                if group_id is None:
+                    continue
+                counts[g.token] = counts.get(g.token, 0) + len(g.plans)
+                rows.extend((group_id, p) for p in g.plans)
+            for start in range(0, len(rows), INGEST_CHUNK):
+                chunk = rows[start:start + INGEST_CHUNK]
+                place_ids = upsert_places(c, [p.place for _, p in chunk])
+                c.executemany("INSERT INTO plans (group_id, title, place_id) VALUES (?, ?, ?)",
+                              [(group_id, p.title, place_id) for (group_id, p), place_id in zip(chunk, place_ids)])
+    finally:
+        conn.close()
+    _invalidate_groups(counts)
+    missing = sorted({g.token for g in payload.groups} - group_ids.keys())
+    return {"status": "ok", "inserted": len(rows), "groups": counts, "missing": missing}
+
 @app.get("/groups/{token}/plans")
 def get_plans(token: str):
     conn = get_db()
     c = conn.cursor()
-    c.execute("SELECT id FROM groups WHERE token=?", (token,))
-    row = c.fetchone()
-    if not row:
+    group = _lookup_group(c, token)
+    if not group:
         conn.close()
         raise HTTPException(status_code=404, detail="Group not found")
-    group_id = row[0]
-    c.execute("SELECT id, title, place_json FROM plans WHERE group_id=?", (group_id,))
-    plans = []
+    # one query for plans + vote counts; place JSON is built by SQLite from the
+    # places row (legacy rows still carry place_json) and goes into the body undecoded
+    c.execute(f"""
+        SELECT p.id, p.title,
+               CASE WHEN p.place_id IS NULL THEN p.place_json ELSE {PLACE_JSON_SQL} END,
+               COUNT(v.id)
+        FROM plans p
+        LEFT JOIN places pl ON pl.id = p.place_id
+        LEFT JOIN votes v ON v.plan_id = p.id
+        WHERE p.group_id=?
+        GROUP BY p.id
+        ORDER BY p.id
+    """, (group[0],))
     rows = c.fetchall()
-    for r in rows:
-        plan_id, title, place_json = r
-        # count votes
-        c.execute("SELECT COUNT(*) FROM votes WHERE plan_id=?", (plan_id,))
-        vc = c.fetchone()[0]
-        plans.append({
-            "id": plan_id,
-            "title": title,
-            "place": json.loads(place_json) if place_json else {},
-            "votes": vc
-        })
     conn.close()
-    return {"plans": plans}
+    return Response(content=fastjson.plans_body(rows), media_type="application/json")
 
 @app.post("/groups/{token}/plans/{plan_id}/vote")
 def vote_plan(token: str, plan_id: int, payload: dict):
@@ -132,31 +246,150 @@ def vote_plan(token: str, plan_id: int, payload: dict):
     if not user_id:
         raise HTTPException(status_code=400, detail="user_id required")
     conn = get_db()
-    c = conn.cursor()
-    # check group exists and plan belongs to it
-    c.execute("SELECT id FROM groups WHERE token=?", (token,))
-    row = c.fetchone()
-    if not row:
+    try:
+        with conn:
+            c = conn.cursor()
+            # the read-then-write below must not interleave with another toggle by the
+            # same user (the unique (plan_id, user_id) index would reject the second insert)
+            c.execute("BEGIN IMMEDIATE")
+            # check group exists and plan belongs to it
+            group = _lookup_group(c, token, [plan_id])
+            if not group:
+                raise HTTPException(status_code=404, detail="Group not found")
+            if plan_id not in group[1]:
+                raise HTTPException(status_code=404, detail="Plan not found in group")
+            # check if vote exists
+            c.execute("SELECT id FROM votes WHERE plan_id=? AND user_id=?", (plan_id, user_id))
+            existing = c.fetchone()
+            if existing:
+                # toggle off (remove vote)
+                c.execute("DELETE FROM votes WHERE id=?", (existing[0],))
+                analytics.record(c, group[0], removed=[plan_id])
+                action = "unvoted"
+            else:
+                c.execute("INSERT INTO votes (plan_id, user_id) VALUES (?, ?)", (plan_id, user_id))
+                analytics.record(c, group[0], added=[plan_id])
+                action = "voted"
+            # return updated counts
+            c.execute("SELECT COUNT(*) FROM votes WHERE plan_id=?", (plan_id,))
+            vc = c.fetchone()[0]
+    finally:
         conn.close()
-        raise HTTPException(status_code=404, detail="Group not found")
-    group_id = row[0]
-    c.execute("SELECT id FROM plans WHERE id=? AND group_id=?", (plan_id, group_id))
-    if not c.fetchone():
-        conn.close()
-        raise HTTPException(status_code=404, detail="Plan not found in group")
-    # check if vote exists
-    c.execute("SELECT id FROM votes WHERE plan_id=? AND user_id=?", (plan_id, user_id))
-    existing = c.fetchone()
-    if existing:
-        # toggle off (remove vote)
-        c.execute("DELETE FROM votes WHERE id=?", (existing[0],))
-        action = "unvoted"
-    else:
-        c.execute("INSERT INTO votes (plan_id, user_id) VALUES (?, ?)", (plan_id, user_id))
-        action = "voted"
-    conn.commit()
-    # return updated counts
-    c.execute("SELECT COUNT(*) FROM votes WHERE plan_id=?", (plan_id,))
-    vc = c.fetchone()[0]
-    conn.close()
     return {"status": action, "votes": vc}
+
+@app.post("/groups/{token}/votes")
+def batch_votes(token: str, payload: BatchVotes):
+    """
+    payload: {"ops": [{"plan_id": 1, "user_id": "<id>", "vote": true}, ...]}
+    Sets or unsets each vote explicitly, so retries are safe (unlike the toggle
+    endpoint). All ops apply in one transaction; returns counts for every affected plan.
+    """
+    plan_ids = sorted({op.plan_id for op in payload.ops})
+    conn = get_db()
+    try:
+        with conn:
+            c = conn.cursor()
+            # take the write lock before reading `existing`, so a concurrent writer can't
+            # change it between the read and our writes (and skew the rollups)
+            c.execute("BEGIN IMMEDIATE")
+            group = _lookup_group(c, token, plan_ids)
+            if not group:
+                raise HTTPException(status_code=404, detail="Group not found")
+            unknown = set(plan_ids) - group[1]
+            if unknown:
+                raise HTTPException(status_code=404, detail=f"Plans not found in group: {sorted(unknown)}")
+            # last op wins per (plan, user); the unique index on (plan_id, user_id)
+            # makes set/unset idempotent
+            final = {(op.plan_id, op.user_id): op.vote for op in payload.ops}
+            # which ops actually change something (for the analytics rollups)
+            c.execute("SELECT plan_id, user_id FROM votes WHERE plan_id IN (SELECT value FROM json_each(?)) "
+                      "AND user_id IN (SELECT value FROM json_each(?))",
+                      (json.dumps(plan_ids), json.dumps(sorted({uid for _, uid in final}))))
+            existing = set(c.fetchall())
+            analytics.record(c, group[0],
+                             added=[pid for (pid, uid), vote in final.items() if vote and (pid, uid) not in existing],
+                             removed=[pid for (pid, uid), vote in final.items() if not vote and (pid, uid) in existing])
+            c.executemany("INSERT OR IGNORE INTO votes (plan_id, user_id) VALUES (?, ?)",
+                          [key for key, vote in final.items() if vote])
+            c.executemany("DELETE FROM votes WHERE plan_id=? AND user_id=?",
+                          [key for key, vote in final.items() if not vote])
+            c.execute("SELECT p.value, COUNT(v.id) FROM json_each(?) p "
+                      "LEFT JOIN votes v ON v.plan_id = p.value GROUP BY p.value",
+                      (json.dumps(plan_ids),))
+            counts = c.fetchall()
+    finally:
+        conn.close()
+    return {"status": "ok", "plans": [{"id": pid, "votes": vc} for pid, vc in counts]}
+
+@app.get("/groups/{token}/analytics/timeline")
+def vote_timeline(token: str, resolution: str = "hour", since: Optional[int] = None,
+                  until: Optional[int] = None, plan_id: Optional[int] = None):
+    """
+    Votes added/removed per minute or hour bucket (epoch seconds), for the whole
+    group and per plan, read from the rollup tables. Rows: [bucket, added, removed].
+    """
+    conn = get_db()
+    try:
+        c = conn.cursor()
+        group = _lookup_group(c, token, [plan_id] if plan_id is not None else ())
+        if not group:
+            raise HTTPException(status_code=404, detail="Group not found")
+        if plan_id is not None and plan_id not in group[1]:
+            raise HTTPException(status_code=404, detail="Plan not found in group")
+        try:
+            return analytics.timeline(c, group[0], resolution, since, until, plan_id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        conn.close()
+
+@app.get("/groups/{token}/analytics/momentum")
+def vote_momentum(token: str, window: int = 3600, half_life: Optional[int] = None):
+    """Plans ranked by recent, time-decayed net votes over the last `window` seconds."""
+    conn = get_db()
+    try:
+        c = conn.cursor()
+        group = _lookup_group(c, token)
+        if not group:
+            raise HTTPException(status_code=404, detail="Group not found")
+        try:
+            ranked = analytics.momentum(c, group[0], window, half_life)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        c.execute("SELECT id, title FROM plans WHERE group_id=?", (group[0],))
+        titles = dict(c.fetchall())
+    finally:
+        conn.close()
+    return {"window": window, "plans": [{"id": pid, "title": titles.get(pid), "score": score, "net": net}
+                                        for pid, score, net in ranked]}
+
+@app.get("/groups/{token}/recommendations")
+def group_recommendations(token: str, limit: int = 10):
+    """Precomputed event types / places for the people voting in this group (see recommender.py)."""
+    conn = get_db()
+    try:
+        group = _lookup_group(conn.cursor(), token)
+    finally:
+        conn.close()
+    if not group:
+        raise HTTPException(status_code=404, detail="Group not found")
+    return {"recommendations": recommender.for_group(token, source="api", limit=limit)}
+
+@app.get("/export/{table}")
+def export_table(table: str, format: str = "ndjson", authorization: Optional[str] = Header(None)):
+    """
+    Stream a whole table (groups, plans, votes, events, event_participants) as NDJSON or CSV.
+    Admin only: needs "Authorization: Bearer $PLANPAL_EXPORT_TOKEN", and is disabled
+    (404) when that isn't set; `python -m backend.export` is the usual way to export.
+    """
+    if not EXPORT_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest((authorization or "").encode(), f"Bearer {EXPORT_TOKEN}".encode()):
+        raise HTTPException(status_code=401, detail="Admin token required",
+                            headers={"WWW-Authenticate": "Bearer"})
+    try:
+        chunks = export.stream(table, format, api_db=DB_PATH)
+    except ValueError as e:
+        raise HTTPException(status_code=404 if table not in export.EXPORTS else 400, detail=str(e))
+    return StreamingResponse(chunks, media_type=export.FORMATS[format],
+                             headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'})
@@ -1,4 +1,8 @@
 import requests
+try:
+    from backend import http_replay
+except ImportError:
+    import http_replay
 
 # API for TMDB : Movie Ratings and Information
 
@@ -18,7 +22,7 @@ def get_now_playing_movies():
     }
 
     try:
-        response = requests.get(endpoint, params=params)
+        response = http_replay.get(endpoint, params=params)
         response.raise_for_status() # Raise an exception for bad status codes (4xx or 5xx)
         data = response.json()
         print("\n--- Now Playing Movies (Active) ---")
@@ -45,7 +49,7 @@ def get_best_rated_movies(min_rating=7.5, min_votes=1000):
     }
     
     try:
-        response = requests.get(endpoint, params=params)
+        response = http_replay.get(endpoint, params=params)
         response.raise_for_status()
         data = response.json()
         print("\n--- Best Rated Movies ---")
@@ -0,0 +1,90 @@
+# backend/archive.py
+"""
+Hot/cold split for events: move finished events (and their RSVPs) out of `events`
+and `event_participants` into `events_archive` / `event_participants_archive`.
+
+    python -m backend.archive                     # events that ended over 7 days ago
+    python -m backend.archive --grace-days 0 --batch 1000
+
+Dashboards and "events near me" only read the hot tables, so their cost tracks
+upcoming/recent events instead of all history. Callers that want old events opt in
+with include_history=True, which reads the events_all / event_participants_all views.
+Each batch moves in its own transaction and is safe to re-run or interrupt.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+try:
+    from backend.migrations import APP_DB_PATH, ensure_schema
+except ImportError:
+    from migrations import APP_DB_PATH, ensure_schema
+
+GRACE_DAYS = float(os.getenv("PLANPAL_ARCHIVE_GRACE_DAYS", "7"))  # keep just-finished events hot a while
+
+_EVENT_COLUMNS = ("id, creator_id, title, event_datetime, event_type, location, duration, description, "
+                  "cost_estimate, max_participants, created_at, group_id, lat, lon, event_ts")
+
+
+def _move_batch(conn, cutoff, batch, now):
+    """Archive up to `batch` events that ended before cutoff; returns (events, participants) moved."""
+    # event_ts < cutoff is the indexed pre-filter; the end time (start + duration) decides
+    ids = [row[0] for row in conn.execute(
+        "SELECT id FROM events WHERE event_ts < ? AND event_ts + CAST(duration * 3600 AS INTEGER) < ? "
+        "ORDER BY event_ts LIMIT ?", (cutoff, cutoff, batch))]
+    if not ids:
+        return 0, 0
+    id_list = json.dumps(ids)
+    with conn:
+        conn.execute(f"INSERT OR REPLACE INTO events_archive ({_EVENT_COLUMNS}, archived_at) "
+                     f"SELECT {_EVENT_COLUMNS}, ? FROM events WHERE id IN (SELECT value FROM json_each(?))",
+                     (now, id_list))
+        moved = conn.execute(
+            "INSERT OR REPLACE INTO event_participants_archive (event_id, user_id, status, joined_at) "
+            "SELECT event_id, user_id, status, joined_at FROM event_participants "
+            "WHERE event_id IN (SELECT value FROM json_each(?))", (id_list,)).rowcount
+        conn.execute("DELETE FROM event_participants WHERE event_id IN (SELECT value FROM json_each(?))", (id_list,))
+        conn.execute("DELETE FROM events_geo WHERE id IN (SELECT value FROM json_each(?))", (id_list,))
+        conn.execute("DELETE FROM events WHERE id IN (SELECT value FROM json_each(?))", (id_list,))
+    return len(ids), moved
+
+
+def archive_finished_events(db_path=None, grace_days=GRACE_DAYS, batch=500, now=None):
+    """
+    Move events that ended more than grace_days ago into the archive tables.
+    Returns {"events": n, "participants": n}. Readers' caches pick it up within CACHE_TTL.
+    """
+    db_path = db_path or APP_DB_PATH
+    ensure_schema(db_path)
+    now = int(now if now is not None else time.time())
+    cutoff = now - int(grace_days * 86400)
+    totals = {"events": 0, "participants": 0}
+    conn = sqlite3.connect(db_path, timeout=10)
+    try:
+        while True:
+            events, participants = _move_batch(conn, cutoff, batch, now)
+            totals["events"] += events
+            totals["participants"] += participants
+            if events < batch:
+                return totals
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move finished events into the archive tables.")
+    parser.add_argument("--db", help="app database (default: backend/backend.db)")
+    parser.add_argument("--grace-days", type=float, default=GRACE_DAYS,
+                        help="only archive events that ended at least this many days ago")
+    parser.add_argument("--batch", type=int, default=500, help="events moved per transaction")
+    args = parser.parse_args(argv)
+    totals = archive_finished_events(args.db, args.grace_days, args.batch)
+    print(f"Archived {totals['events']} events and {totals['participants']} RSVPs.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
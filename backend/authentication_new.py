@@ -2,31 +2,29 @@ import streamlit as st
 import re
 import sqlite3
 import os
+import hmac
+import hashlib
+import secrets
+import time
 from datetime import datetime
+from functools import lru_cache
+try:
+    from backend.ttl_cache import TTLCache
+    from backend.passwords import PASSWORD_POOL, hash_password, check_password
+    from backend.migrations import ensure_schema
+except ImportError:
+    from ttl_cache import TTLCache
+    from passwords import PASSWORD_POOL, hash_password, check_password
+    from migrations import ensure_schema
 
 # ---------- DATABASE CONFIG ----------
 DB_PATH = os.path.join(os.path.dirname(__file__), "backend.db")
 
 def init_user_db():
-    """Initialize users table if not exists."""
-    with sqlite3.connect(DB_PATH) as conn:
-        c = conn.cursor()
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                name TEXT NOT NULL,
-                password TEXT NOT NULL,
-                email TEXT UNIQUE,
-                mobile TEXT UNIQUE,
-                age INTEGER,
-                gender TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        conn.commit()
+    """Make sure the schema is migrated (cheap version check; see migrations.py)."""
+    ensure_schema(DB_PATH)
 
-# Initialize the database when file runs
+# Check the schema version when the module is imported
 init_user_db()
 
 # ---------- HELPER VALIDATORS ----------
@@ -60,6 +58,7 @@ def validate_password(password):
 for key, default in {
     "logged_in": False,
     "current_user": None,
+    "session_token": None,
     "registration_error": None,
 }.items():
     if key not in st.session_state:
@@ -69,33 +68,44 @@ for key, default in {
 def get_db():
     return sqlite3.connect(DB_PATH)
 
+def integrity_message(error):
+    """Friendly message for a users-table UNIQUE violation."""
+    text = str(error)
+    if "users.username" in text:
+        return "❌ Username already exists"
+    if "users.email" in text:
+        return "❌ Email already registered"
+    if "users.mobile" in text:
+        return "❌ Mobile number already registered"
+    return "❌ Registration failed"
+
+def _duplicate_message(c, username, email, mobile):
+    """integrity_message() text for the first identifier already taken, else None."""
+    for column, value in (("username", username), ("email", email), ("mobile", mobile)):
+        if value and c.execute(f"SELECT 1 FROM users WHERE {column} = ?", (value,)).fetchone():
+            return integrity_message(f"UNIQUE constraint failed: users.{column}")
+    return None
+
 def create_user(username, name, password, email=None, mobile=None, age=None, gender=None):
     """Create a new user in the DB."""
     try:
         with get_db() as conn:
             c = conn.cursor()
-
-            # Check duplicates manually (for better messages)
-            if email:
-                c.execute("SELECT id FROM users WHERE email = ?", (email,))
-                if c.fetchone():
-                    return False, "❌ Email already registered"
-
-            if mobile:
-                c.execute("SELECT id FROM users WHERE mobile = ?", (mobile,))
-                if c.fetchone():
-                    return False, "❌ Mobile number already registered"
-
+            # indexed lookups first, so a taken username doesn't cost a PBKDF2 hash
+            duplicate = _duplicate_message(c, username, email, mobile)
+            if duplicate:
+                return False, duplicate
+            # PBKDF2 releases the GIL, so hashing inline doesn't stall other sessions
+            password_hash = hash_password(password)
+            # a concurrent sign-up can still win the race: the UNIQUE constraints catch it
             c.execute("""
                 INSERT INTO users (username, name, password, email, mobile, age, gender)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (username, name, password, email, mobile, age, gender))
+            """, (username, name, password_hash, email, mobile, age, gender))
             conn.commit()
             return True, "✅ Account created successfully! You can now login."
     except sqlite3.IntegrityError as e:
-        if "users.username" in str(e):
-            return False, "❌ Username already exists"
-        return False, "❌ Registration failed"
+        return False, integrity_message(e)
     except Exception as e:
         return False, f"❌ Database error: {str(e)}"
 
@@ -116,42 +126,144 @@ def verify_user(identifier, password):
         return False, None
     try:
         with get_db() as conn:
+            conn.row_factory = sqlite3.Row
             c = conn.cursor()
-            user = None
-
-            # Username
-            c.execute("SELECT * FROM users WHERE username = ?", (identifier,))
+            # One lookup: username/email/mobile are all UNIQUE (indexed), so SQLite
+            # serves the OR from the three indexes. A username match wins over an
+            # email/mobile match on another account, same as before.
+            c.execute("""
+                SELECT * FROM users
+                WHERE username = ? OR email = ? OR mobile = ?
+                ORDER BY username = ? DESC
+                LIMIT 1
+            """, (identifier, identifier, identifier, identifier))
             user = c.fetchone()
 
-            # Try email or mobile if not found
-            if not user:
-                if '@' in identifier:
-                    c.execute("SELECT * FROM users WHERE email = ?", (identifier,))
-                    user = c.fetchone()
-                elif identifier.isdigit():
-                    c.execute("SELECT * FROM users WHERE mobile = ?", (identifier,))
-                    user = c.fetchone()
-
-            if not user:
-                return False, None
-
-            columns = ['id', 'username', 'name', 'password', 'email', 'mobile', 'age', 'gender', 'created_at']
-            user_dict = dict(zip(columns, user))
-
-            if user_dict['password'] == password:
-                return True, user_dict
+        # unknown identifiers still pay for one hash, so response time doesn't reveal
+        # which accounts exist
+        user_dict = dict(user) if user else None
+        ok, needs_rehash = check_password(password, user_dict['password'] if user_dict else _dummy_hash())
+        if not ok or not user_dict:
             return False, None
+        if needs_rehash:
+            # legacy plaintext row or old work factor: upgrade in the background
+            PASSWORD_POOL.submit(_upgrade_password_hash, user_dict['id'], user_dict['password'], password)
+        return True, user_dict
     except Exception as e:
         st.error(f"Database error: {str(e)}")
         return False, None
 
+@lru_cache(maxsize=1)
+def _dummy_hash():
+    """A hash at the current work factor that no password matches (verify_user's miss path)."""
+    return hash_password(secrets.token_hex(16))
+
+def _upgrade_password_hash(user_id, old_stored, password):
+    """Replace a plaintext/outdated stored password with a fresh hash (only if unchanged)."""
+    try:
+        new_hash = hash_password(password)
+        with get_db() as conn:
+            conn.execute(
+                "UPDATE users SET password = ? WHERE id = ? AND password = ?",
+                (new_hash, user_id, old_stored),
+            )
+            conn.commit()
+    except Exception as e:
+        print("Password hash upgrade failed:", e)
+
+# ---------- SESSIONS ----------
+# Signed session tokens backed by a short-TTL in-memory cache, so a logged-in
+# request can resolve its user without touching the users table.
+SESSION_SECRET = (os.getenv("PLANPAL_SESSION_SECRET") or secrets.token_hex(32)).encode()
+SESSION_TTL = int(os.getenv("PLANPAL_SESSION_TTL", "900"))
+_SESSIONS = TTLCache(maxsize=10000, ttl=SESSION_TTL)
+_USER_TOKENS = {}  # user_id -> tokens issued in this process (for revocation)
+
+def _sign(payload):
+    return hmac.new(SESSION_SECRET, payload.encode(), hashlib.sha256).hexdigest()[:32]
+
+def _public_user(user):
+    return {k: v for k, v in dict(user).items() if k != "password"}
+
+def create_session(user):
+    """Issue a signed session token for a verified user and cache the user row."""
+    expires = int(time.time()) + SESSION_TTL
+    payload = f"{user['id']}.{expires}.{secrets.token_hex(8)}"
+    token = f"{payload}.{_sign(payload)}"
+    _SESSIONS.set(token, _public_user(user))
+    tokens = _USER_TOKENS.setdefault(user["id"], set())
+    # drop this user's expired tokens so the index doesn't grow forever
+    now = time.time()
+    tokens.difference_update([t for t in tokens if int(t.split(".")[1]) < now])
+    tokens.add(token)
+    return token
+
+def get_session_user(token):
+    """Return the cached user for a valid token, or None (bad signature / expired / revoked)."""
+    if not token:
+        return None
+    payload, _, sig = token.rpartition(".")
+    if not payload or not hmac.compare_digest(sig, _sign(payload)):
+        return None
+    try:
+        user_id, expires, _ = payload.split(".")
+        user_id, expires = int(user_id), int(expires)
+    except ValueError:
+        return None
+    if expires < time.time() or token not in _USER_TOKENS.get(user_id, ()):
+        return None
+    user = _SESSIONS.get(token)
+    if user is None:
+        # cache entry evicted but token still valid: one primary-key read refills it
+        with get_db() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
+        if not row:
+            return None
+        user = _public_user(row)
+        _SESSIONS.set(token, user, ttl=max(1, expires - time.time()))
+    return user
+
+def restore_session():
+    """
+    Resolve the logged-in user from session_token; apps call this at the top of
+    every rerun. A live token is served from the session cache (no users-table
+    read); an expired, revoked or tampered one logs the session out.
+    Returns the current user or None.
+    """
+    if not st.session_state.get("logged_in"):
+        return None
+    user = get_session_user(st.session_state.get("session_token"))
+    if user is None:
+        for key in ("session_token", "current_user", "user_id", "username"):
+            st.session_state[key] = None
+        st.session_state.logged_in = False
+        return None
+    st.session_state.current_user = user
+    st.session_state.user_id = user["id"]
+    st.session_state.username = user["username"]
+    return user
+
+def revoke_session(token):
+    if not token:
+        return
+    _SESSIONS.pop(token)
+    user_id = token.split(".")[0]
+    if user_id.isdigit():
+        _USER_TOKENS.get(int(user_id), set()).discard(token)
+
+def revoke_user_sessions(user_id):
+    for token in _USER_TOKENS.pop(user_id, set()):
+        _SESSIONS.pop(token)
+
 def delete_user(user_id):
     try:
         with get_db() as conn:
             c = conn.cursor()
             c.execute("DELETE FROM users WHERE id = ?", (user_id,))
             conn.commit()
-            return True, "Account deleted successfully!"
+        revoke_user_sessions(user_id)
+        return True, "Account deleted successfully!"
     except Exception as e:
         return False, f"Error deleting account: {str(e)}"
 
@@ -172,8 +284,9 @@ def login_page():
 
         success, user = verify_user(identifier.strip(), password)
         if success:
+            st.session_state.session_token = create_session(user)
             st.session_state.logged_in = True
-            st.session_state.current_user = user
+            st.session_state.current_user = _public_user(user)
             st.session_state.user_id = user["id"]
             st.session_state.username = user["username"]
             st.success(f"Welcome back, {user['name']}! 🎉")
@@ -228,10 +341,13 @@ def main():
         <h4 style='text-align:center;color:#6B7280;'>Your adventure planner companion</h4>
     """, unsafe_allow_html=True)
 
+    restore_session()
     if st.session_state.logged_in and st.session_state.current_user:
         user = st.session_state.current_user
         st.sidebar.title(f"Welcome, {user['name']}! 🎉")
         if st.sidebar.button("🚪 Logout"):
+            revoke_session(st.session_state.get("session_token"))
+            st.session_state.session_token = None
             st.session_state.logged_in = False
             st.session_state.current_user = None
             st.rerun()
@@ -1,80 +1,73 @@
 import streamlit as st
-from datetime import datetime, time
+from datetime import datetime, time, timezone
+from concurrent.futures import ThreadPoolExecutor
+import calendar
+import math
 import sqlite3
 import os
-from geopy.geocoders import Nominatim
-import requests
+import threading
+from time import monotonic, sleep
+try:
+    from backend import prefetch
+    from backend.migrations import ensure_schema
+except ImportError:
+    import prefetch
+    from migrations import ensure_schema
 
 # ---------- DATABASE CONFIG ----------
 DB_PATH = os.path.join(os.path.dirname(__file__), "backend.db")
 
 def init_events_db():
-    """Initialize the events and participants tables."""
-    with sqlite3.connect(DB_PATH) as conn:
-        c = conn.cursor()
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                creator_id INTEGER NOT NULL,
-                title TEXT NOT NULL,
-                event_datetime TIMESTAMP NOT NULL,
-                event_type TEXT NOT NULL,
-                location TEXT NOT NULL,
-                duration REAL NOT NULL,
-                description TEXT,
-                cost_estimate REAL,
-                max_participants INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                group_id INTEGER,
-                FOREIGN KEY (creator_id) REFERENCES users (id),
-                FOREIGN KEY (group_id) REFERENCES groups (id)
-            )
-        """)
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS event_participants (
-                event_id INTEGER,
-                user_id INTEGER,
-                status TEXT CHECK(status IN ('attending', 'maybe', 'not_attending')),
-                joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (event_id, user_id),
-                FOREIGN KEY (event_id) REFERENCES events (id),
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        """)
-        conn.commit()
+    """Make sure the events/participants schema is migrated (cheap version check)."""
+    ensure_schema(DB_PATH)
 
-# Initialize DB tables on import
+# Check the schema version on import (migrations.py owns the DDL)
 init_events_db()
 
 # ---------- GROUP MANAGEMENT ----------
 def init_groups_db():
-    """Create table for outing groups"""
+    """Groups live in the same migrated schema as events."""
+    ensure_schema(DB_PATH)
+
+# ---------- CACHING ----------
+# Reads below are cached per user / per event with st.cache_data, so a rerun with
+# nothing changed does no DB I/O. Every write clears exactly the entries it makes
+# stale (see the _invalidate_* helpers); the TTL is only a backstop for writes made
+# by another process.
+CACHE_TTL = 300
+EVENT_VIEWS = ("all", "created", "participating", "group")
+# Finished events are moved to archive tables by backend/archive.py. Reads only see
+# the hot tables unless they pass include_history=True (then the *_all views).
+HOT_TABLES = ("events", "event_participants")
+ALL_TABLES = ("events_all", "event_participants_all")
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=5000, show_spinner=False)
+def _cached_user_groups(user_id):
     with sqlite3.connect(DB_PATH) as conn:
         c = conn.cursor()
         c.execute("""
-            CREATE TABLE IF NOT EXISTS groups (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                token TEXT UNIQUE NOT NULL,
-                creator_id INTEGER NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (creator_id) REFERENCES users (id)
-            )
-        """)
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS group_members (
-                group_id INTEGER,
-                user_id INTEGER,
-                joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (group_id, user_id),
-                FOREIGN KEY (group_id) REFERENCES groups (id),
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        """)
-        conn.commit()
-
-def create_group(name, creator_id):
-    """Create a new group and return its token"""
+            SELECT g.id, g.name FROM groups g
+            JOIN group_members gm ON g.id = gm.group_id
+            WHERE gm.user_id = ?
+        """, (user_id,))
+        return c.fetchall()
+
+def get_user_groups(user_id):
+    """(id, name) of every group the user belongs to (cached)."""
+    return _cached_user_groups(user_id)
+
+def _invalidate_user_events(user_ids, views=EVENT_VIEWS):
+    for uid in user_ids:
+        for view in views:
+            _cached_user_events.clear(uid, view, False)
+            _cached_user_events.clear(uid, view, True)
+
+def _invalidate_user_groups(user_ids):
+    for uid in user_ids:
+        _cached_user_groups.clear(uid)
+
+def create_group(name, creator_id, member_locations=None):
+    """Create a new group and return its token (member_locations, if given, are prefetched)"""
     import secrets
     token = secrets.token_hex(3).upper()  # short 6-char token
     with sqlite3.connect(DB_PATH) as conn:
@@ -90,6 +83,9 @@ def create_group(name, creator_id):
             (group_id, creator_id)
         )
         conn.commit()
+    _invalidate_user_groups([creator_id])
+    if member_locations:
+        prefetch.prefetch_group(member_locations)
     return True, f"✅ Group created! Share this token with friends: {token}"
 
 def join_group(token, user_id):
@@ -113,27 +109,20 @@ def join_group(token, user_id):
             (group_id, user_id)
         )
         conn.commit()
+    _invalidate_user_groups([user_id])
+    _invalidate_user_events([user_id], views=("all", "group"))
     return True, "🎉 Joined the group successfully!"
 
 # ---------- EVENT CREATION FORM ----------
 def create_event_form(user_id=None):
     """Streamlit form to create new events."""
-    from sqlite3 import connect
-
     with st.expander("➕ Create New Event"):
         event_title = st.text_input("Event Title", key="new_event_title")
 
         # --- Pick a group to attach event to ---
         group_id = None
         group_name = None
-        with connect(DB_PATH) as conn:
-            c = conn.cursor()
-            c.execute("""
-                SELECT g.id, g.name FROM groups g
-                JOIN group_members gm ON g.id = gm.group_id
-                WHERE gm.user_id = ?
-            """, (user_id,))
-            groups = c.fetchall()
+        groups = get_user_groups(user_id)
 
         if groups:
             group_choices = {f"{name} (ID: {gid})": gid for gid, name in groups}
@@ -199,14 +188,15 @@ def save_event(event_data, creator_id, group_id=None):
             c = conn.cursor()
             c.execute("""
                 INSERT INTO events (
-                    creator_id, title, event_datetime, event_type,
+                    creator_id, title, event_datetime, event_ts, event_type,
                     location, duration, description, cost_estimate,
                     max_participants, group_id
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 creator_id,
                 event_data["title"],
                 event_datetime,
+                _epoch(event_datetime),
                 event_data["type"],
                 event_data["location"],
                 event_data["duration"],
@@ -223,63 +213,85 @@ def save_event(event_data, creator_id, group_id=None):
                 VALUES (?, ?, 'attending')
             """, (event_id, creator_id))
             conn.commit()
+            members = []
+            if group_id is not None:
+                c.execute("SELECT user_id FROM group_members WHERE group_id = ?", (group_id,))
+                members = [row[0] for row in c.fetchall()]
+        _invalidate_user_events([creator_id])
+        _invalidate_user_events(members, views=("all", "group"))
+        # geocode in the background so saving never waits on Nominatim
+        _GEO_POOL.submit(_geocode_event, event_id, event_data["location"], event_datetime)
         return True, "✅ Event created successfully!"
     except Exception as e:
         return False, f"❌ Error creating event: {str(e)}"
 
 # ---------- FETCH EVENTS ----------
-def get_user_events(user_id, event_type='all'):
-    """Get events relevant to a user based on type (created, participating, or group)."""
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            c = conn.cursor()
+@st.cache_data(ttl=CACHE_TTL, max_entries=5000, show_spinner=False)
+def _cached_user_events(user_id, event_type, include_history=False):
+    events_table, participants_table = ALL_TABLES if include_history else HOT_TABLES
+    with sqlite3.connect(DB_PATH) as conn:
+        c = conn.cursor()
 
-            if event_type == 'created':
-                # Only events the user created
-                query = """
-                    SELECT DISTINCT e.* FROM events e
-                    WHERE e.creator_id = ?
-                    ORDER BY e.event_datetime DESC
-                """
-                params = (user_id,)
-
-            elif event_type == 'participating':
-                # Events the user joined or RSVP'd to
-                query = """
-                    SELECT DISTINCT e.* FROM events e
-                    JOIN event_participants ep ON e.id = ep.event_id
-                    WHERE ep.user_id = ?
-                    ORDER BY e.event_datetime DESC
-                """
-                params = (user_id,)
-
-            elif event_type == 'group':
-                # Events created in any group the user belongs to
-                query = """
-                    SELECT DISTINCT e.* FROM events e
-                    JOIN groups g ON e.group_id = g.id
-                    JOIN group_members gm ON g.id = gm.group_id
-                    WHERE gm.user_id = ?
-                    ORDER BY e.event_datetime DESC
-                """
-                params = (user_id,)
-
-            else:  # 'all'
-                # All events created by user, joined by user, or in user's groups
-                query = """
-                    SELECT DISTINCT e.* FROM events e
-                    LEFT JOIN event_participants ep ON e.id = ep.event_id
-                    LEFT JOIN group_members gm ON e.group_id = gm.group_id
-                    WHERE e.creator_id = ? OR ep.user_id = ? OR gm.user_id = ?
-                    ORDER BY e.event_datetime DESC
-                """
-                params = (user_id, user_id, user_id)
-
-            c.execute(query, params)
-            columns = [description[0] for description in c.description]
-            events = [dict(zip(columns, row)) for row in c.fetchall()]
-
-        return events
+        if event_type == 'created':
+            # Only events the user created
+            query = f"""
+                SELECT DISTINCT e.* FROM {events_table} e
+                WHERE e.creator_id = ?
+                ORDER BY e.event_ts DESC
+            """
+            params = (user_id,)
+
+        elif event_type == 'participating':
+            # Events the user joined or RSVP'd to
+            query = f"""
+                SELECT DISTINCT e.* FROM {events_table} e
+                JOIN {participants_table} ep ON e.id = ep.event_id
+                WHERE ep.user_id = ?
+                ORDER BY e.event_ts DESC
+            """
+            params = (user_id,)
+
+        elif event_type == 'group':
+            # Events created in any group the user belongs to
+            query = f"""
+                SELECT DISTINCT e.* FROM {events_table} e
+                JOIN groups g ON e.group_id = g.id
+                JOIN group_members gm ON g.id = gm.group_id
+                WHERE gm.user_id = ?
+                ORDER BY e.event_ts DESC
+            """
+            params = (user_id,)
+
+        else:  # 'all'
+            # All events created by user, joined by user, or in user's groups;
+            # one indexed lookup per branch instead of an OR across two outer joins
+            query = f"""
+                SELECT e.* FROM {events_table} e
+                WHERE e.id IN (
+                    SELECT id FROM {events_table} WHERE creator_id = ?
+                    UNION SELECT event_id FROM {participants_table} WHERE user_id = ?
+                    UNION SELECT ge.id FROM group_members gm
+                          JOIN {events_table} ge ON ge.group_id = gm.group_id
+                          WHERE gm.user_id = ?
+                )
+                ORDER BY e.event_ts DESC
+            """
+            params = (user_id, user_id, user_id)
+
+        c.execute(query, params)
+        columns = [description[0] for description in c.description]
+        events = [dict(zip(columns, row)) for row in c.fetchall()]
+
+    return events
+
+def get_user_events(user_id, event_type='all', include_history=False):
+    """
+    Get events relevant to a user based on type (created, participating, or group).
+    Archived (long finished) events are only included with include_history=True.
+    """
+    try:
+        return _cached_user_events(user_id, event_type if event_type in EVENT_VIEWS else 'all',
+                                   bool(include_history))
     except Exception as e:
         st.error(f"Database error fetching events: {e}")
         return []
@@ -297,9 +309,12 @@ def display_event(event):
         # Event datetime and location
         col1, col2 = st.columns(2)
         with col1:
-            # event_datetime might be stored as ISO string or as a datetime object
+            # event_ts (epoch) when present; older rows may only have event_datetime
+            # as an ISO string or a datetime object
             ev_dt = event.get("event_datetime")
-            if isinstance(ev_dt, str):
+            if event.get("event_ts") is not None:
+                event_datetime = _from_epoch(event["event_ts"])
+            elif isinstance(ev_dt, str):
                 try:
                     event_datetime = datetime.fromisoformat(ev_dt)
                 except Exception:
@@ -370,17 +385,23 @@ def update_participation_status(event_id, user_id, status):
                 DO UPDATE SET status = excluded.status
             """, (event_id, user_id, status))
             conn.commit()
+        _cached_event_participants.clear(event_id)
+        _invalidate_user_events([user_id], views=("all", "participating"))
         return True, "Status updated successfully!"
     except Exception as e:
         return False, f"Error updating status: {str(e)}"
     
 def get_event_participants(event_id):
-    """Fetch who RSVP'd for a specific event."""
+    """Fetch who RSVP'd for a specific event (cached until an RSVP changes)."""
+    return _cached_event_participants(event_id)
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=20000, show_spinner=False)
+def _cached_event_participants(event_id):
     with sqlite3.connect(DB_PATH) as conn:
         c = conn.cursor()
         c.execute("""
             SELECT u.name, ep.status
-            FROM event_participants ep
+            FROM event_participants_all ep  -- primary-key seek in the hot and archive tables
             JOIN users u ON ep.user_id = u.id
             WHERE ep.event_id = ?
         """, (event_id,))
@@ -388,30 +409,76 @@ def get_event_participants(event_id):
     return [{"name": name, "status": status} for name, status in rows]
 
 
-# Initialize the events & groups tables
-init_events_db()
-init_groups_db()
-
 # ---------- MOOD-BASED SMART SUGGESTIONS ----------
-from geopy.geocoders import Nominatim
-import requests
-
-def geocode_city(city):
-    """Convert city name to coordinates"""
+try:
+    from backend import gazetteer, http_replay, jobs
+    from backend.metrics import REGISTRY
+    from backend.ttl_cache import SQLiteTTLCache
+except ImportError:
+    import gazetteer
+    import http_replay
+    import jobs
+    from metrics import REGISTRY
+    from ttl_cache import SQLiteTTLCache
+
+MOODS = ("Chill", "Foodie", "Adventurous")
+# Nominatim answers are cached in SQLite (shared with the API process and kept across
+# restarts), so prefetch.py can warm them before anyone clicks. `caller` separates
+# user lookups from prefetch ones in planpal_geo_cache_total.
+_GEOCODE_CACHE = SQLiteTTLCache("geocode", maxsize=2048, ttl=7 * 24 * 3600)
+_PLACES_CACHE = SQLiteTTLCache("places", maxsize=1024, ttl=3600)
+_M_GEO_CACHE = REGISTRY.counter("planpal_geo_cache_total", "Geocode/place cache lookups by cache, caller and result")
+
+def _make_geolocator():
+    from geopy.geocoders import Nominatim  # imported on first live lookup, not at startup
+    return Nominatim(user_agent="plan_my_outings", timeout=10)
+
+# record/replay-aware geocoder (see http_replay); the Nominatim client is built on first live lookup
+geolocator = http_replay.ReplayGeocoder(_make_geolocator)
+
+# Nominatim's usage policy allows one request per second; every live lookup in this
+# process (geocoding, place search, the event geocoder) waits its turn here.
+NOMINATIM_INTERVAL_S = float(os.getenv("PLANPAL_NOMINATIM_INTERVAL_S", "1.0"))
+_nominatim_lock = threading.Lock()
+_nominatim_last = 0.0
+
+def _nominatim_wait():
+    """Block until NOMINATIM_INTERVAL_S has passed since the previous live request."""
+    global _nominatim_last
+    if http_replay.mode() == "replay":
+        return  # answered from the cassette, nothing reaches Nominatim
+    with _nominatim_lock:
+        delay = _nominatim_last + NOMINATIM_INTERVAL_S - monotonic()
+        if delay > 0:
+            sleep(delay)
+        _nominatim_last = monotonic()
+
+def geocode_city(city, caller="user"):
+    """Convert city name to coordinates (bundled gazetteer, then cache, then Nominatim)"""
+    known = gazetteer.lookup(city)
+    if known:
+        return known
+    key = " ".join(city.lower().split())
+    cached = _GEOCODE_CACHE.get(key)
+    _M_GEO_CACHE.inc(cache="geocode", caller=caller, result="miss" if cached is None else "hit")
+    if cached is not None:
+        return tuple(cached)
     try:
-        geolocator = Nominatim(user_agent="plan_my_outings", timeout=10)
+        _nominatim_wait()
         loc = geolocator.geocode(city)
         if loc:
-            return float(loc.latitude), float(loc.longitude)
+            latlon = float(loc.latitude), float(loc.longitude)
+            _GEOCODE_CACHE.set(key, latlon)
+            return latlon
     except Exception:
         return None, None
     return None, None
 
-def compute_centroid(cities):
+def compute_centroid(cities, caller="user"):
     """Compute geographic midpoint of all members' cities"""
     coords = []
     for city in cities:
-        latlon = geocode_city(city)
+        latlon = geocode_city(city, caller=caller)
         if latlon[0] is not None:
             coords.append(latlon)
     if not coords:
@@ -420,10 +487,23 @@ def compute_centroid(cities):
     lon = sum(p[1] for p in coords) / len(coords)
     return lat, lon
 
-def get_places_nearby(lat, lon, mood="Chill", limit=5):
+@jobs.register("smart_suggestions")
+def _smart_suggestions_job(params, context=None):
+    """Background job: centroid of the members' cities + places nearby for the mood."""
+    lat, lon = compute_centroid(params["cities"])
+    if not lat or not lon:
+        return {"lat": None, "lon": None, "places": []}
+    return {"lat": lat, "lon": lon, "places": get_places_nearby(lat, lon, params.get("mood", "Chill"))}
+
+def get_places_nearby(lat, lon, mood="Chill", limit=5, caller="user"):
     """Find nearby places based on mood"""
     if not lat or not lon:
         return []
+    cache_key = (round(lat, 4), round(lon, 4), mood, limit)
+    cached = _PLACES_CACHE.get(cache_key)
+    _M_GEO_CACHE.inc(cache="places", caller=caller, result="miss" if cached is None else "hit")
+    if cached is not None:
+        return cached
 
     query_map = {
         "Chill": "cafe",
@@ -440,11 +520,128 @@ def get_places_nearby(lat, lon, mood="Chill", limit=5):
         "viewbox": f"{lon-0.05},{lat+0.05},{lon+0.05},{lat-0.05}",
         "bounded": 1
     }
-    r = requests.get(url, params=params, headers={"User-Agent": "plan-my-outings"})
+    _nominatim_wait()
+    r = http_replay.get(url, params=params, headers={"User-Agent": "plan-my-outings"})
     if r.status_code != 200:
         return []
     data = r.json()
-    return [
-        {"name": d.get("display_name").split(",")[0], "lat": d["lat"], "lon": d["lon"]}
+    # osm_type + id identify the OSM place when plans are published (see places.osm_identity)
+    places = [
+        {"id": d.get("osm_id"), "osm_type": d.get("osm_type"),
+         "name": d.get("display_name").split(",")[0], "address": d.get("display_name"),
+         "lat": float(d["lat"]), "lon": float(d["lon"])}
         for d in data
     ]
+    _PLACES_CACHE.set(cache_key, places)
+    return places
+
+
+# ---------- EVENTS NEAR ME ----------
+# Events get coordinates after they are saved, on one background worker (live lookups
+# are spaced by _nominatim_wait), and are indexed in the events_geo R*Tree.
+EARTH_RADIUS_KM = 6371.0088
+_GEO_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="event-geocode")
+
+def _epoch(dt):
+    """Naive event datetime -> seconds, treating it as UTC (only compared with itself)."""
+    if isinstance(dt, str):
+        dt = datetime.fromisoformat(dt)
+    return calendar.timegm(dt.timetuple())
+
+def _from_epoch(ts):
+    """Inverse of _epoch: seconds -> naive datetime."""
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None)
+
+def _index_event_location(c, event_id, lat, lon, event_datetime):
+    c.execute("UPDATE events SET lat = ?, lon = ? WHERE id = ?", (lat, lon, event_id))
+    t = _epoch(event_datetime)
+    c.execute("INSERT OR REPLACE INTO events_geo VALUES (?, ?, ?, ?, ?, ?, ?)",
+              (event_id, lat, lat, lon, lon, t, t))
+
+def _event_user_ids(c, event_id):
+    """Users whose cached event lists can contain event_id (creator, RSVPs, group members)."""
+    c.execute("""
+        SELECT creator_id FROM events WHERE id = ?
+        UNION SELECT user_id FROM event_participants WHERE event_id = ?
+        UNION SELECT gm.user_id FROM events e JOIN group_members gm ON gm.group_id = e.group_id
+              WHERE e.id = ?
+    """, (event_id, event_id, event_id))
+    return [row[0] for row in c.fetchall()]
+
+def _geocode_event(event_id, location, event_datetime):
+    """Background job: geocode one event's free-text location and index it."""
+    lat, lon = geocode_city(location)
+    if lat is None:
+        return False  # left without coordinates; geocode_missing_events retries later
+    try:
+        with sqlite3.connect(DB_PATH) as conn:
+            c = conn.cursor()
+            _index_event_location(c, event_id, lat, lon, event_datetime)
+            user_ids = _event_user_ids(c, event_id)
+        _invalidate_user_events(user_ids)  # cached rows still have lat/lon = NULL
+        return True
+    except sqlite3.Error as e:
+        print(f"Error indexing location for event {event_id}: {e}")
+        return False
+
+def geocode_missing_events(limit=None):
+    """Geocode events saved before coordinates existed (or whose lookup failed). Returns count indexed."""
+    with sqlite3.connect(DB_PATH) as conn:
+        rows = conn.execute(
+            "SELECT id, location, event_datetime FROM events WHERE lat IS NULL ORDER BY id LIMIT ?",
+            (-1 if limit is None else limit,),
+        ).fetchall()
+    return sum(1 for row in rows if _geocode_event(*row))
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((p2 - p1) / 2) ** 2
+         + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def _lon_ranges(lon, dlon):
+    """(min, max) longitude ranges covering lon ± dlon, split where the box crosses ±180°."""
+    if dlon >= 180:
+        return [(-180.0, 180.0)]
+    lo, hi = lon - dlon, lon + dlon
+    if lo < -180:
+        return [(lo + 360, 180.0), (-180.0, hi)]
+    if hi > 180:
+        return [(lo, 180.0), (-180.0, hi - 360)]
+    return [(lo, hi)]
+
+def get_events_near(lat, lon, radius_km=10, start=None, end=None, limit=100):
+    """
+    Events within radius_km of (lat, lon), optionally between start and end
+    (datetimes), nearest first. The R*Tree narrows to a bounding box / time slab;
+    exact distance and time are checked on the candidates. Archived events have
+    left the index, so this only returns hot (upcoming/recent) events.
+    """
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    coslat = math.cos(math.radians(lat))
+    dlon = 180.0 if coslat < 1e-6 else min(180.0, dlat / coslat)
+    t_min = _epoch(start) if start is not None else -1e12
+    t_max = _epoch(end) if end is not None else 1e12
+    rows = {}
+    with sqlite3.connect(DB_PATH) as conn:
+        conn.row_factory = sqlite3.Row
+        # one box per side of the antimeridian (keyed by id: an event at ±180° can match both)
+        for min_lon, max_lon in _lon_ranges(lon, dlon):
+            rows.update((row["id"], row) for row in conn.execute("""
+                SELECT e.* FROM events_geo g JOIN events e ON e.id = g.id
+                WHERE g.max_lat >= ? AND g.min_lat <= ?
+                  AND g.max_lon >= ? AND g.min_lon <= ?
+                  AND g.max_t >= ? AND g.min_t <= ?
+            """, (lat - dlat, lat + dlat, min_lon, max_lon, t_min, t_max)))
+    results = []
+    for row in rows.values():
+        # the R*Tree stores 32-bit floats rounded outwards, so re-check exactly
+        if not t_min <= row["event_ts"] <= t_max:
+            continue
+        distance = _haversine_km(lat, lon, row["lat"], row["lon"])
+        if distance <= radius_km:
+            event = dict(row)
+            event["distance_km"] = distance
+            results.append(event)
+    results.sort(key=lambda e: e["distance_km"])
+    return results[:limit] if limit else results
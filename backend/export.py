@@ -0,0 +1,180 @@
+# backend/export.py
+"""
+Streaming export of groups, plans, votes, events and event_participants (plus their
+archive tables) as NDJSON or CSV.
+
+    python -m backend.export events --format csv -o events.csv
+    python -m backend.export groups plans votes --out-dir dump/
+
+Tables are read in keyset pages (WHERE key > last key ORDER BY key LIMIT n), each
+in its own short read transaction, and every page is encoded and yielded as one
+bytes chunk. Memory stays constant however large the table is, and writers are
+only blocked for one page at a time (the databases use SQLite's default rollback
+journal, where a single long-lived read would lock them out for the whole export).
+The trade-off is that rows written during an export may or may not be included.
+The API serves the same generators from GET /export/{table}.
+"""
+import argparse
+import csv
+import io
+import os
+import sqlite3
+import sys
+from dataclasses import dataclass
+
+try:
+    from backend import fastjson
+    from backend.migrations import API_DB_PATH, APP_DB_PATH
+    from backend.places import PLACE_JSON_SQL
+except ImportError:
+    import fastjson
+    from migrations import API_DB_PATH, APP_DB_PATH
+    from places import PLACE_JSON_SQL
+
+PAGE_ROWS = int(os.getenv("PLANPAL_EXPORT_PAGE", "2000"))
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+@dataclass(frozen=True)
+class ExportTable:
+    db: str                    # "api" or "app"
+    columns: str               # SELECT list; must start with the key columns
+    source: str                # FROM clause
+    keys: tuple                # key expressions (an index/primary key, so pages are seeks)
+    json_columns: tuple = ()   # columns holding JSON text, nested as-is in NDJSON
+
+
+EXPORTS = {
+    "groups": ExportTable("api", "id, token, name", "groups", ("id",)),
+    "plans": ExportTable(
+        "api",
+        f"p.id, p.group_id, p.title, p.place_id, "
+        f"CASE WHEN p.place_id IS NULL THEN p.place_json ELSE {PLACE_JSON_SQL} END AS place",
+        "plans p LEFT JOIN places pl ON pl.id = p.place_id",
+        ("p.id",),
+        json_columns=("place",),
+    ),
+    "votes": ExportTable("api", "id, plan_id, user_id, created_at", "votes", ("id",)),
+    "events": ExportTable("app", "*", "events", ("id",)),
+    "event_participants": ExportTable("app", "*", "event_participants", ("event_id", "user_id")),
+    # finished events moved out by archive.py
+    "events_archive": ExportTable("app", "*", "events_archive", ("id",)),
+    "event_participants_archive": ExportTable("app", "*", "event_participants_archive", ("event_id", "user_id")),
+}
+
+
+def _pages(conn, spec, page_size):
+    """Yield (column names, rows) one keyset page at a time."""
+    keys = ", ".join(spec.keys)
+    first = f"SELECT {spec.columns} FROM {spec.source} ORDER BY {keys} LIMIT ?"
+    after = (f"SELECT {spec.columns} FROM {spec.source} "
+             f"WHERE ({keys}) > ({', '.join('?' * len(spec.keys))}) ORDER BY {keys} LIMIT ?")
+    cur = conn.execute(first, (page_size,))
+    while True:
+        rows = cur.fetchall()
+        if not rows:
+            return
+        yield [d[0] for d in cur.description], rows
+        if len(rows) < page_size:
+            return
+        cur = conn.execute(after, (*rows[-1][:len(spec.keys)], page_size))
+
+
+def _ndjson_chunk(columns, rows, json_columns):
+    spliced = [i for i, name in enumerate(columns) if name in json_columns]
+    lines = []
+    for row in rows:
+        if not spliced:
+            lines.append(fastjson.dumps(dict(zip(columns, row))))
+            continue
+        # stored JSON text goes in undecoded (see fastjson.plans_body)
+        plain = {name: value for i, (name, value) in enumerate(zip(columns, row)) if i not in spliced}
+        body = fastjson.dumps(plain)[:-1]
+        for i in spliced:
+            raw = row[i].encode("utf-8") if isinstance(row[i], str) else b"null"
+            body += b"%s%s:%s" % (b"," if plain else b"", fastjson.dumps(columns[i]), raw)
+        lines.append(body + b"}")
+    return b"\n".join(lines) + b"\n"
+
+
+def stream(table, fmt="ndjson", api_db=None, app_db=None, page_size=PAGE_ROWS):
+    """
+    Generator of bytes chunks exporting `table` in `fmt` ("ndjson" or "csv").
+    Raises ValueError right away (not on first iteration) for an unknown table or format.
+    """
+    if table not in EXPORTS:
+        raise ValueError(f"Unknown table {table!r}; choose from {', '.join(EXPORTS)}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; choose from {', '.join(FORMATS)}")
+    spec = EXPORTS[table]
+    path = (api_db or API_DB_PATH) if spec.db == "api" else (app_db or APP_DB_PATH)
+    return _stream(path, spec, fmt, page_size)
+
+
+def _stream(path, spec, fmt, page_size):
+    # isolation_level=None: no implicit transaction, so each page is its own read
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        buf, writer = io.StringIO(), None
+        for columns, rows in _pages(conn, spec, page_size):
+            if fmt == "ndjson":
+                yield _ndjson_chunk(columns, rows, spec.json_columns)
+                continue
+            if writer is None:
+                writer = csv.writer(buf)
+                writer.writerow(columns)
+            writer.writerows(rows)
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+        if fmt == "csv" and writer is None:
+            # empty table: still emit the header
+            cur = conn.execute(f"SELECT {spec.columns} FROM {spec.source} LIMIT 0")
+            csv.writer(buf).writerow([d[0] for d in cur.description])
+            yield buf.getvalue().encode("utf-8")
+    finally:
+        conn.close()
+
+
+def export_to(fh, table, fmt="ndjson", **kwargs):
+    """Write a whole table to a binary file object; returns bytes written."""
+    written = 0
+    for chunk in stream(table, fmt, **kwargs):
+        fh.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export tables as NDJSON or CSV (streamed, constant memory).")
+    parser.add_argument("tables", nargs="+", choices=list(EXPORTS))
+    parser.add_argument("--format", choices=list(FORMATS), default="ndjson")
+    parser.add_argument("-o", "--output", help="output file for a single table (default: stdout)")
+    parser.add_argument("--out-dir", help="write each table to OUT_DIR/<table>.<format>")
+    parser.add_argument("--db", help="app database (default: backend/backend.db)")
+    parser.add_argument("--api-db", help="API database (default: $PLANPAL_API_DB or ./backend.db)")
+    parser.add_argument("--page-size", type=int, default=PAGE_ROWS)
+    args = parser.parse_args(argv)
+    if args.output and len(args.tables) > 1:
+        parser.error("--output takes a single table; use --out-dir for several")
+
+    kwargs = {"api_db": args.api_db, "app_db": args.db, "page_size": args.page_size}
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+        for table in args.tables:
+            path = os.path.join(args.out_dir, f"{table}.{args.format}")
+            with open(path, "wb") as fh:
+                size = export_to(fh, table, args.format, **kwargs)
+            print(f"{path}: {size} bytes", file=sys.stderr)
+    elif args.output:
+        with open(args.output, "wb") as fh:
+            export_to(fh, args.tables[0], args.format, **kwargs)
+    else:
+        for table in args.tables:
+            export_to(sys.stdout.buffer, table, args.format, **kwargs)
+        sys.stdout.buffer.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
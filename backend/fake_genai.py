@@ -0,0 +1,111 @@
+# backend/fake_genai.py
+"""
+Offline stand-in for `google.genai.Client` used for load tests and demos.
+
+Mirrors `client.models.generate_content` and `generate_content_stream` with a
+configurable latency distribution, streaming chunk timing, malformed-JSON rate
+and error rate. Enable it in the app with PLANPAL_FAKE_LLM=1 (see
+FakeClient.from_env for the knobs).
+"""
+import json
+import math
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+_PLACES = ["Rooftop Café", "Street Food Walk", "Board Game Lounge", "Lakeside Picnic",
+           "Bowling Alley", "Art Gallery Tour", "Karaoke Night", "Trek & Brunch"]
+
+
+class FakeClient:
+    def __init__(self, latency_ms=800.0, latency_sigma=0.5, chunk_ms=40.0, chunks=8,
+                 malformed_rate=0.05, error_rate=0.0, model_speed=None, seed=None):
+        """
+        latency_ms / latency_sigma: median and log-sigma of a lognormal time-to-answer
+            (time to first chunk when streaming)
+        chunk_ms / chunks: spacing and count of streamed chunks
+        malformed_rate: share of JSON replies that come back truncated
+        error_rate: share of calls that raise RuntimeError
+        model_speed: {substring of model name: latency multiplier}, e.g. {"lite": 0.3}
+        """
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.chunk_ms = chunk_ms
+        self.chunks = chunks
+        self.malformed_rate = malformed_rate
+        self.error_rate = error_rate
+        self.model_speed = model_speed if model_speed is not None else {"lite": 0.35}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()  # random.Random isn't safe to share across threads
+        self.models = _FakeModels(self)
+
+    @classmethod
+    def from_env(cls):
+        seed = os.getenv("PLANPAL_FAKE_SEED")
+        return cls(
+            latency_ms=float(os.getenv("PLANPAL_FAKE_LATENCY_MS", "800")),
+            latency_sigma=float(os.getenv("PLANPAL_FAKE_LATENCY_SIGMA", "0.5")),
+            chunk_ms=float(os.getenv("PLANPAL_FAKE_CHUNK_MS", "40")),
+            chunks=int(os.getenv("PLANPAL_FAKE_CHUNKS", "8")),
+            malformed_rate=float(os.getenv("PLANPAL_FAKE_MALFORMED_RATE", "0.05")),
+            error_rate=float(os.getenv("PLANPAL_FAKE_ERROR_RATE", "0")),
+            seed=int(seed) if seed else None,
+        )
+
+    def _draw(self, model):
+        """(latency seconds, malformed?, error?) for one call."""
+        with self._lock:
+            latency = self._rng.lognormvariate(math.log(self.latency_ms / 1000.0), self.latency_sigma)
+            malformed = self._rng.random() < self.malformed_rate
+            error = self._rng.random() < self.error_rate
+            picks = self._rng.sample(_PLACES, 3)
+        for key, factor in self.model_speed.items():
+            if key in model:
+                latency *= factor
+                break
+        return latency, malformed, error, picks
+
+    @staticmethod
+    def _reply(prompt, malformed, picks):
+        if "JSON" not in prompt:
+            return "Sounds fun! Try " + ", ".join(picks) + " — book ahead on weekends."
+        body = json.dumps([
+            {"name": name, "description": f"{name} for the group", "estimated_cost": "₹500", "duration": "2 hours"}
+            for name in picks
+        ], ensure_ascii=False)
+        if malformed:
+            body = body[: len(body) // 2]  # cut mid-object, like a truncated generation
+        return "Here are some ideas:\n" + body
+
+
+class _FakeModels:
+    def __init__(self, client):
+        self._client = client
+
+    def generate_content(self, model, contents, config=None):
+        latency, malformed, error, picks = self._client._draw(model)
+        time.sleep(latency)
+        if error:
+            raise RuntimeError("fake_genai: injected error")
+        text = self._client._reply(str(contents), malformed, picks)
+        return _response(str(contents), text)
+
+    def generate_content_stream(self, model, contents, config=None):
+        """Yields the same reply as generate_content in `chunks` pieces, chunk_ms apart."""
+        latency, malformed, error, picks = self._client._draw(model)
+        time.sleep(latency)  # time to first chunk
+        if error:
+            raise RuntimeError("fake_genai: injected error")
+        text = self._client._reply(str(contents), malformed, picks)
+        step = math.ceil(len(text) / max(1, self._client.chunks))
+        for i in range(0, len(text), step):
+            if i:
+                time.sleep(self._client.chunk_ms / 1000.0)
+            yield _response(str(contents), text[i:i + step])
+
+
+def _response(prompt, text):
+    usage = SimpleNamespace(prompt_token_count=len(prompt) // 4, candidates_token_count=len(text) // 4)
+    return SimpleNamespace(text=text, usage_metadata=usage)
@@ -0,0 +1,33 @@
+# backend/fastjson.py
+"""
+JSON response helpers for the API: orjson when installed (stdlib json otherwise),
+plus a plans body builder that splices stored place_json text in as-is instead of
+decoding it only to have FastAPI re-encode it.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; see requirements.txt
+    orjson = None
+
+
+def dumps(obj):
+    """Serialize obj to compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def plans_body(rows):
+    """
+    Build b'{"plans":[...]}' from (id, title, place_json, votes) rows.
+    place_json is trusted: the API wrote it with json.dumps, so it is valid JSON.
+    """
+    parts = []
+    for plan_id, title, place_json, votes in rows:
+        if isinstance(place_json, str):
+            place_json = place_json.encode("utf-8")
+        parts.append(b'{"id":%d,"title":%s,"place":%s,"votes":%d}'
+                     % (plan_id, dumps(title), place_json or b"{}", votes))
+    return b'{"plans":[' + b",".join(parts) + b"]}"
@@ -0,0 +1,114 @@
+# backend/gazetteer.py
+"""
+Offline gazetteer: resolves common city/locality names to coordinates and powers
+type-ahead, with no network call.
+
+Data lives in data/gazetteer.tsv (override with PLANPAL_GAZETTEER). It is loaded
+once per process into a sorted array of normalized names plus aliases. bisect then
+gives exact lookups and prefix ranges in O(log n). A GeoNames-style extract with
+the same columns (tens of thousands of rows) loads the same way.
+"""
+import os
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left
+
+GAZETTEER_PATH = os.getenv(
+    "PLANPAL_GAZETTEER", os.path.join(os.path.dirname(__file__), "data", "gazetteer.tsv")
+)
+
+_index = None
+_lock = threading.Lock()
+
+
+class _Index:
+    __slots__ = ("keys", "entry_of", "labels", "regions", "countries", "lat", "lon", "population")
+
+    def __init__(self, path):
+        entries = []  # (name, region, country, lat, lon, population, aliases)
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                name, region, country, lat, lon, population, aliases = line.rstrip("\n").split("\t")
+                entries.append((name, region, country, float(lat), float(lon), int(population), aliases))
+        # rank by population so suggestions and options come out most-likely-first
+        entries.sort(key=lambda e: -e[5])
+        self.labels = [name if name == region else f"{name}, {region}" for name, region, *_ in entries]
+        self.regions = [_normalize(e[1]) for e in entries]
+        self.countries = [_normalize(e[2]) for e in entries]
+        self.lat = array("d", (e[3] for e in entries))
+        self.lon = array("d", (e[4] for e in entries))
+        self.population = array("q", (e[5] for e in entries))
+        pairs = []
+        for i, (name, *_, aliases) in enumerate(entries):
+            pairs.append((_normalize(name), i))
+            pairs.extend((_normalize(a), i) for a in aliases.split("|") if a)
+        pairs.sort()
+        self.keys = [key for key, _ in pairs]
+        self.entry_of = array("I", (i for _, i in pairs))
+
+
+def _normalize(text):
+    """Casefold, strip accents and punctuation noise, collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = text.casefold().replace(".", " ").replace("-", " ")
+    return " ".join(text.split())
+
+
+def load():
+    """The process-wide index (built on first use)."""
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                _index = _Index(GAZETTEER_PATH)
+    return _index
+
+
+def _prefix_range(idx, prefix):
+    lo = bisect_left(idx.keys, prefix)
+    hi = bisect_left(idx.keys, prefix + "\uffff", lo)
+    return lo, hi
+
+
+def lookup(place):
+    """
+    (lat, lon) for "Saket", "saket, delhi" or "Gurgaon, Haryana, India"; None if unknown.
+    Text after the first comma only narrows ambiguous names (matched against region/country).
+    """
+    name, _, qualifier = place.partition(",")
+    key = _normalize(name)
+    if not key:
+        return None
+    idx = load()
+    lo = bisect_left(idx.keys, key)
+    hi = lo
+    while hi < len(idx.keys) and idx.keys[hi] == key:
+        hi += 1
+    candidates = sorted({idx.entry_of[i] for i in range(lo, hi)})  # entry order = population rank
+    if not candidates:
+        return None
+    for part in (_normalize(q) for q in qualifier.split(",")):
+        narrowed = [i for i in candidates if part and (idx.regions[i].startswith(part) or idx.countries[i].startswith(part))]
+        candidates = narrowed or candidates
+    best = candidates[0]
+    return idx.lat[best], idx.lon[best]
+
+
+def suggest(prefix, limit=8):
+    """Labels of places whose name or alias starts with prefix, most populous first."""
+    key = _normalize(prefix)
+    if not key:
+        return []
+    idx = load()
+    lo, hi = _prefix_range(idx, key)
+    matches = sorted({idx.entry_of[i] for i in range(lo, hi)})
+    return [idx.labels[i] for i in matches[:limit]]
+
+
+def labels():
+    """Every place label, most populous first (options for type-ahead widgets)."""
+    return list(load().labels)
@@ -0,0 +1,207 @@
+# backend/http_replay.py
+"""
+Record/replay transport for the outbound HTTP calls (Nominatim, TMDB, our backend).
+
+Mode comes from PLANPAL_HTTP_MODE:
+  off     (default) plain `requests` passthrough
+  record  make the real call and append the response to the cassette
+  replay  answer from the cassette only; unknown requests raise CassetteMiss
+
+Cassettes are gzip'd JSON (PLANPAL_CASSETTE, default backend/cassettes/default.json.gz)
+keyed by method + URL + sorted params/body, with secrets like api_key stripped.
+Repeated identical requests replay in recorded order (the last one sticks).
+PLANPAL_REPLAY_LATENCY simulates network time on replay: "recorded" (default) sleeps
+the recorded duration, a number sleeps that many ms, "0" disables it.
+"""
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+DEFAULT_CASSETTE = os.path.join(os.path.dirname(__file__), "cassettes", "default.json.gz")
+SECRET_PARAMS = {"api_key", "key", "token"}
+
+
+class CassetteMiss(LookupError):
+    """Replay mode got a request that was never recorded."""
+
+
+class ReplayResponse:
+    """The subset of requests.Response the app uses."""
+
+    def __init__(self, status_code, text, url="", content_type="application/json", elapsed_ms=0.0):
+        self.status_code = status_code
+        self.text = text
+        self.url = url
+        self.headers = {"Content-Type": content_type}
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def content(self):
+        return self.text.encode("utf-8")
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+
+class Cassette:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> [recorded responses]
+        self._cursor = {}
+        self._dirty = False
+        if os.path.exists(path):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                self._entries = json.load(f)
+
+    def next(self, key):
+        with self._lock:
+            recorded = self._entries.get(key)
+            if not recorded:
+                return None
+            i = self._cursor.get(key, 0)
+            self._cursor[key] = i + 1
+            return recorded[min(i, len(recorded) - 1)]
+
+    def append(self, key, entry):
+        with self._lock:
+            self._entries.setdefault(key, []).append(entry)
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                json.dump(self._entries, f, separators=(",", ":"), ensure_ascii=False)
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+    def __len__(self):
+        return sum(len(v) for v in self._entries.values())
+
+
+_cassette = None
+_cassette_lock = threading.Lock()
+
+
+def mode():
+    return os.getenv("PLANPAL_HTTP_MODE", "off").lower()
+
+
+def get_cassette():
+    global _cassette
+    with _cassette_lock:
+        path = os.getenv("PLANPAL_CASSETTE", DEFAULT_CASSETTE)
+        if _cassette is None or _cassette.path != path:
+            if _cassette is not None:
+                _cassette.save()
+            _cassette = Cassette(path)
+            atexit.register(_cassette.save)
+        return _cassette
+
+
+def request_key(method, url, params=None, body=None):
+    clean = sorted((k, str(v)) for k, v in (params or {}).items() if k not in SECRET_PARAMS)
+    raw = json.dumps([method.upper(), url, clean, body], sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+
+def _replay_sleep(recorded_ms):
+    setting = os.getenv("PLANPAL_REPLAY_LATENCY", "recorded")
+    if setting == "recorded":
+        delay_ms = recorded_ms
+    else:
+        try:
+            delay_ms = float(setting)
+        except ValueError:
+            delay_ms = 0.0
+    if delay_ms > 0:
+        time.sleep(delay_ms / 1000.0)
+
+
+def request(method, url, params=None, json_body=None, **kwargs):
+    """requests.request-compatible entry point honouring PLANPAL_HTTP_MODE."""
+    current = mode()
+    if current == "off":
+        import requests
+        return requests.request(method, url, params=params, json=json_body, **kwargs)
+
+    key = request_key(method, url, params, json_body)
+    cassette = get_cassette()
+    if current == "replay":
+        entry = cassette.next(key)
+        if entry is None:
+            raise CassetteMiss(f"{method} {url} params={params} not in {cassette.path}")
+        _replay_sleep(entry["ms"])
+        return ReplayResponse(entry["status"], entry["body"], url, entry.get("type", "application/json"), entry["ms"])
+
+    import requests
+    start = time.perf_counter()
+    resp = requests.request(method, url, params=params, json=json_body, **kwargs)
+    cassette.append(key, {
+        "status": resp.status_code,
+        "body": resp.text,
+        "type": resp.headers.get("Content-Type", "application/json"),
+        "ms": round((time.perf_counter() - start) * 1000, 1),
+    })
+    return resp
+
+
+def get(url, params=None, **kwargs):
+    return request("GET", url, params=params, **kwargs)
+
+
+def post(url, json=None, params=None, **kwargs):
+    return request("POST", url, params=params, json_body=json, **kwargs)
+
+
+class ReplayGeocoder:
+    """
+    Wraps a geopy geocoder so `.geocode(query)` is recorded/replayed like HTTP calls.
+    `factory` builds the real geocoder and is only called when a live lookup is needed.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._geocoder = None
+
+    def _live(self):
+        if self._geocoder is None:
+            self._geocoder = self._factory()
+        return self._geocoder
+
+    def geocode(self, query, **kwargs):
+        current = mode()
+        if current == "off":
+            return self._live().geocode(query, **kwargs)
+        key = request_key("GEOCODE", "nominatim", {"q": query, **kwargs})
+        cassette = get_cassette()
+        if current == "replay":
+            entry = cassette.next(key)
+            if entry is None:
+                raise CassetteMiss(f"geocode {query!r} not in {cassette.path}")
+            _replay_sleep(entry["ms"])
+            loc = entry["body"]
+            return SimpleNamespace(**loc) if loc else None
+        start = time.perf_counter()
+        loc = self._live().geocode(query, **kwargs)
+        body = {"latitude": loc.latitude, "longitude": loc.longitude, "address": loc.address} if loc else None
+        cassette.append(key, {"status": 200, "body": body, "ms": round((time.perf_counter() - start) * 1000, 1)})
+        return loc
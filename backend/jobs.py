@@ -0,0 +1,237 @@
+# backend/jobs.py
+"""
+Local background job queue for slow work: geocoding, place search and model calls.
+
+The UI calls submit() and gets a job id back immediately. The work runs on
+JOB_POOL, and status/result/error are stored in the `jobs` table, so the UI (or
+another process) can poll get(job_id) and render the result once it is ready.
+Identical in-flight jobs (same kind + params + context) are deduplicated onto one
+job id; pass dedupe=False for jobs that must run once per submit.
+
+Job kinds are plain functions registered by the module that owns the work:
+
+    @jobs.register("smart_suggestions")
+    def _smart_suggestions_job(params, context):
+        ...  # return a JSON-serializable result or raise
+
+Speculative work can register with its own executor and a max_in_flight cap, so
+it never takes JOB_POOL workers from user jobs; when this process already has
+max_in_flight jobs of that kind queued or running, submit() drops the new one and
+returns None.
+
+`context` is an optional in-memory object passed to submit() (e.g. a PlanPal
+instance holding a user-pasted API key). It is never written to the database, and
+jobs only dedupe with jobs submitted with the same context object, so one
+session never picks up a job that runs with another session's key.
+"""
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from backend.metrics import REGISTRY
+    from backend.migrations import APP_DB_PATH, ensure_schema
+except ImportError:
+    from metrics import REGISTRY
+    from migrations import APP_DB_PATH, ensure_schema
+
+DB_PATH = APP_DB_PATH
+ACTIVE = ("queued", "running")
+# I/O-bound work (HTTP, model calls): more workers than cores is fine, but the pool is
+# bounded so a burst of submissions queues up instead of spawning unbounded threads.
+JOB_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("PLANPAL_JOB_WORKERS", "8")),
+    thread_name_prefix="planpal-job",
+)
+
+_M_JOBS = REGISTRY.counter("planpal_jobs_total", "Background jobs by kind and outcome")
+_M_WAIT = REGISTRY.histogram("planpal_job_queue_seconds", "Time jobs spent queued before a worker picked them up")
+_M_RUN = REGISTRY.histogram("planpal_job_run_seconds", "Job run time by kind")
+
+_HANDLERS = {}
+_POOLS = {}  # kind -> executor, for kinds that don't run on JOB_POOL
+_CAPS = {}  # kind -> max jobs of that kind queued or running in this process
+_in_flight = {}
+_PROCESS_ID = uuid.uuid4().hex  # tells contexts of different processes apart in dedupe keys
+_HOST = socket.gethostname()
+_OWNER = f"{_HOST}:{os.getpid()}"  # jobs.owner: the process whose pool runs the job
+_recovered = set()
+_lock = threading.Lock()
+
+
+def register(kind, pool=None, max_in_flight=None):
+    """Decorator: register fn(params, context) as the handler for `kind`, run on `pool`
+    (default JOB_POOL) with at most max_in_flight jobs in flight (default unbounded)."""
+    def decorator(fn):
+        _HANDLERS[kind] = fn
+        if pool is not None:
+            _POOLS[kind] = pool
+        if max_in_flight is not None:
+            _CAPS[kind] = max_in_flight
+        return fn
+    return decorator
+
+
+def _reserve(kind):
+    """Take an in-flight slot for a capped kind; False when the kind is at its cap."""
+    if kind not in _CAPS:
+        return True
+    with _lock:
+        if _in_flight.get(kind, 0) >= _CAPS[kind]:
+            return False
+        _in_flight[kind] = _in_flight.get(kind, 0) + 1
+        return True
+
+
+def _release(kind):
+    if kind in _CAPS:
+        with _lock:
+            _in_flight[kind] -= 1
+
+
+def _connect():
+    ensure_schema(DB_PATH)
+    return sqlite3.connect(DB_PATH, timeout=10)
+
+
+def _owner_alive(owner):
+    """Whether the "host:pid" that owns a job may still be running it."""
+    host, _, pid = (owner or "").rpartition(":")
+    if not pid.isdigit():
+        return False  # rows from before jobs had owners
+    if host != _HOST or os.name == "nt":
+        return True  # can't check another machine; os.kill(pid, 0) would kill it on Windows
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _recover_once():
+    """
+    Jobs left queued/running by a process that has exited can't finish; mark them
+    failed. Jobs of live processes (the API server and the Streamlit app share this
+    table) are left alone.
+    """
+    if DB_PATH in _recovered:
+        return
+    with _lock:
+        if DB_PATH in _recovered:
+            return
+        with _connect() as conn:
+            owners = [row[0] for row in conn.execute(
+                "SELECT DISTINCT owner FROM jobs WHERE status IN ('queued', 'running')")]
+            conn.executemany(
+                "UPDATE jobs SET status = 'error', error = 'interrupted by a restart', finished_at = ? "
+                "WHERE owner IS ? AND status IN ('queued', 'running')",
+                [(time.time(), owner) for owner in owners if owner != _OWNER and not _owner_alive(owner)])
+        _recovered.add(DB_PATH)
+
+
+def _dedupe_key(kind, params, context=None):
+    blob = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    if context is not None:
+        # the context is alive (referenced by the job) for as long as the job is in
+        # flight, so its id() can't be reused by another context in the meantime
+        blob += f"|context:{_PROCESS_ID}:{id(context)}"
+    return f"{kind}:{hashlib.sha1(blob.encode('utf-8')).hexdigest()}"
+
+
+def submit(kind, params, context=None, dedupe=True):
+    """
+    Queue a job and return its id. An identical job (same kind, params and context
+    object) already in flight is reused unless dedupe=False, e.g. for jobs that
+    create something per submit. Returns None if a capped kind is at its cap.
+    """
+    if kind not in _HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind!r}")
+    _recover_once()
+    job_id = uuid.uuid4().hex
+    key = _dedupe_key(kind, params, context) if dedupe else f"{kind}:once:{job_id}"
+    with _connect() as conn:
+        row = conn.execute("SELECT id FROM jobs WHERE dedupe_key = ? AND status IN ('queued', 'running')",
+                           (key,)).fetchone()
+        if row:
+            _M_JOBS.inc(kind=kind, status="deduped")
+            return row[0]
+        if not _reserve(kind):
+            _M_JOBS.inc(kind=kind, status="dropped")
+            return None
+        try:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, dedupe_key, status, params, created_at, owner) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, key, json.dumps(params, default=str), time.time(), _OWNER))
+        except sqlite3.IntegrityError:
+            _release(kind)
+            # lost a race with an identical submit; the partial unique index kept one
+            row = conn.execute("SELECT id FROM jobs WHERE dedupe_key = ? AND status IN ('queued', 'running')",
+                               (key,)).fetchone()
+            if row:
+                _M_JOBS.inc(kind=kind, status="deduped")
+                return row[0]
+            raise
+        except Exception:
+            _release(kind)
+            raise
+    _M_JOBS.inc(kind=kind, status="submitted")
+    future = _POOLS.get(kind, JOB_POOL).submit(_run, job_id, kind, params, context)
+    future.add_done_callback(lambda _f: _release(kind))
+    return job_id
+
+
+def _run(job_id, kind, params, context):
+    started = time.time()
+    with _connect() as conn:
+        created = conn.execute("UPDATE jobs SET status = 'running', started_at = ? "
+                               "WHERE id = ? AND status = 'queued' RETURNING created_at",
+                               (started, job_id)).fetchone()
+    if not created:
+        return  # no longer queued (marked failed by recovery): don't run it
+    _M_WAIT.observe(started - created[0], kind=kind)
+    try:
+        result = _HANDLERS[kind](params, context)
+        status, payload, error = "done", json.dumps(result, default=str), None
+    except Exception as e:
+        traceback.print_exc()
+        status, payload, error = "error", None, str(e) or type(e).__name__
+    finished = time.time()
+    _M_RUN.observe(finished - started, kind=kind)
+    _M_JOBS.inc(kind=kind, status=status)
+    with _connect() as conn:
+        # only finish a job that is still ours to finish; a row recovery already failed stays failed
+        conn.execute("UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? "
+                     "WHERE id = ? AND status = 'running'",
+                     (status, payload, error, finished, job_id))
+
+
+def get(job_id):
+    """{"id", "kind", "status", "result", "error", ...} for job_id, or None if unknown."""
+    with _connect() as conn:
+        conn.row_factory = sqlite3.Row
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if row is None:
+        return None
+    job = dict(row)
+    job.pop("dedupe_key", None)
+    job["params"] = json.loads(job["params"]) if job["params"] else {}
+    job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+    return job
+
+
+def purge(older_than_s=7 * 24 * 3600):
+    """Delete finished jobs older than the cutoff. Returns rows deleted."""
+    with _connect() as conn:
+        cur = conn.execute("DELETE FROM jobs WHERE status IN ('done', 'error') AND finished_at < ?",
+                           (time.time() - older_than_s,))
+        return cur.rowcount
@@ -0,0 +1,31 @@
+# backend/lazy_imports.py
+"""Defer heavy imports (requests, geopy, google.genai) until first attribute access."""
+import importlib
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """
+    Return module `name` without executing it yet; the real import runs the first
+    time an attribute is touched. Already-imported modules are returned as is.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named {name!r}")
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def is_available(name):
+    """Cheap check that a module can be imported, without importing it."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
@@ -0,0 +1,175 @@
+# backend/metrics.py
+"""
+Tiny in-process metrics registry (counters + fixed-bucket histograms).
+
+Cheap enough to leave on: every update is a dict lookup and an add under one lock.
+Read it with REGISTRY.snapshot() / REGISTRY.dump(path), or scrape it in Prometheus
+text format via REGISTRY.render_prometheus() or serve_metrics(port).
+"""
+import bisect
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536)
+
+
+class Counter:
+    def __init__(self, name, help_text, lock):
+        self.name = name
+        self.help = help_text
+        self._lock = lock
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def samples(self):
+        with self._lock:
+            return [(dict(k), v) for k, v in self._values.items()]
+
+
+class Histogram:
+    def __init__(self, name, help_text, lock, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._lock = lock
+        self._values = {}  # label key -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 2)
+            row[idx] += 1
+            row[-1] += value
+
+    def samples(self):
+        """[(labels, {"buckets": {le: cumulative count}, "count": n, "sum": s})]"""
+        with self._lock:
+            items = [(dict(k), list(v)) for k, v in self._values.items()]
+        out = []
+        for labels, row in items:
+            cumulative, running = {}, 0
+            for le, n in zip(self.buckets + ("+Inf",), row[:-1]):
+                running += n
+                cumulative[str(le)] = running
+            out.append((labels, {"buckets": cumulative, "count": running, "sum": row[-1]}))
+        return out
+
+    def quantile(self, q, **labels):
+        """Approximate quantile (upper bucket bound) for one label set."""
+        row = self._values.get(tuple(sorted(labels.items())))
+        if not row:
+            return None
+        total = sum(row[:-1])
+        running = 0
+        for le, n in zip(self.buckets + (float("inf"),), row[:-1]):
+            running += n
+            if running >= q * total:
+                return le
+        return float("inf")
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get(self, cls, name, help_text, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, threading.Lock(), **kwargs)
+        return metric
+
+    def counter(self, name, help_text=""):
+        return self._get(Counter, name, help_text)
+
+    def histogram(self, name, help_text="", buckets=LATENCY_BUCKETS):
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def snapshot(self):
+        """Plain dict of every metric, suitable for json.dumps."""
+        return {
+            name: [{"labels": labels, "value": value} for labels, value in metric.samples()]
+            for name, metric in list(self._metrics.items())
+        }
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def render_prometheus(self):
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            kind = "counter" if isinstance(metric, Counter) else "histogram"
+            if metric.help:
+                lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in metric.samples():
+                if kind == "counter":
+                    lines.append(f"{name}{_fmt_labels(labels)} {value}")
+                    continue
+                for le, n in value["buckets"].items():
+                    lines.append(f"{name}_bucket{_fmt_labels(dict(labels, le=le))} {n}")
+                lines.append(f"{name}_count{_fmt_labels(labels)} {value['count']}")
+                lines.append(f"{name}_sum{_fmt_labels(labels)} {value['sum']}")
+        return "\n".join(lines) + "\n"
+
+
+def _fmt_labels(labels):
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{str(v)}"' for k, v in sorted(labels.items()))
+    return "{" + inner + "}"
+
+
+REGISTRY = Registry()
+
+
+def serve_metrics(port, registry=REGISTRY, host="127.0.0.1"):
+    """Expose /metrics (Prometheus text) on a daemon thread; returns the server.
+    Binds loopback by default; pass host="0.0.0.0" to let a remote scraper in."""
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = registry.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+_SERVER = None
+
+
+def serve_metrics_from_env(var="PLANPAL_METRICS_PORT", host_var="PLANPAL_METRICS_HOST"):
+    """Start the /metrics endpoint once per process when the env var names a port
+    (bound to host_var's address, loopback if unset)."""
+    global _SERVER
+    port = os.getenv(var)
+    host = os.getenv(host_var) or "127.0.0.1"
+    if port and _SERVER is None:
+        try:
+            _SERVER = serve_metrics(int(port), host=host)
+        except OSError as e:
+            print(f"metrics: could not bind {host}:{port}:", e)
+    return _SERVER
@@ -0,0 +1,435 @@
+# backend/migrations.py
+"""
+Versioned schema migrations for the SQLite databases.
+
+Each database keeps a `schema_version` table keyed by (namespace, version), so the
+app ("app") and API ("api") histories can share one file without one's version 5
+counting as the other's; a migration is (version, name, step) where step is an SQL
+script or a callable(conn). Apply pending migrations once at
+deploy time:
+
+    python -m backend.migrations                    # app DB + API DB
+    python -m backend.migrations --db path/to.db    # just one app DB
+
+At import time modules only call ensure_schema(), which costs one SELECT the first
+time per process (then nothing) and only migrates if the database is behind.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    from backend.places import upsert_places
+except ImportError:
+    from places import upsert_places
+
+APP_DB_PATH = os.path.join(os.path.dirname(__file__), "backend.db")
+API_DB_PATH = os.getenv("PLANPAL_API_DB", "backend.db")
+
+# ---------- app database (users, events, groups) ----------
+APP_MIGRATIONS = [
+    (1, "create users", """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            name TEXT NOT NULL,
+            password TEXT NOT NULL,
+            email TEXT UNIQUE,
+            mobile TEXT UNIQUE,
+            age INTEGER,
+            gender TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """),
+    (2, "create events and event_participants", """
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            creator_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            event_datetime TIMESTAMP NOT NULL,
+            event_type TEXT NOT NULL,
+            location TEXT NOT NULL,
+            duration REAL NOT NULL,
+            description TEXT,
+            cost_estimate REAL,
+            max_participants INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            group_id INTEGER,
+            FOREIGN KEY (creator_id) REFERENCES users (id),
+            FOREIGN KEY (group_id) REFERENCES groups (id)
+        );
+        CREATE TABLE IF NOT EXISTS event_participants (
+            event_id INTEGER,
+            user_id INTEGER,
+            status TEXT CHECK(status IN ('attending', 'maybe', 'not_attending')),
+            joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (event_id, user_id),
+            FOREIGN KEY (event_id) REFERENCES events (id),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        );
+    """),
+    (3, "create groups and group_members", """
+        CREATE TABLE IF NOT EXISTS groups (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            token TEXT UNIQUE NOT NULL,
+            creator_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (creator_id) REFERENCES users (id)
+        );
+        CREATE TABLE IF NOT EXISTS group_members (
+            group_id INTEGER,
+            user_id INTEGER,
+            joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (group_id, user_id),
+            FOREIGN KEY (group_id) REFERENCES groups (id),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        );
+    """),
+    (4, "event coordinates and spatial index", """
+        ALTER TABLE events ADD COLUMN lat REAL;
+        ALTER TABLE events ADD COLUMN lon REAL;
+        -- R*Tree over (lat, lon, event time as epoch seconds); rows are points
+        CREATE VIRTUAL TABLE IF NOT EXISTS events_geo USING rtree(
+            id, min_lat, max_lat, min_lon, max_lon, min_t, max_t
+        );
+    """),
+    (5, "background jobs", """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            dedupe_key TEXT NOT NULL,
+            status TEXT NOT NULL CHECK(status IN ('queued', 'running', 'done', 'error')),
+            params TEXT,
+            result TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL
+        );
+        -- at most one in-flight job per (kind, params)
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_inflight ON jobs (dedupe_key)
+            WHERE status IN ('queued', 'running');
+        CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (finished_at) WHERE status IN ('done', 'error');
+    """),
+    (6, "shared cache entries", """
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            PRIMARY KEY (namespace, key)
+        ) WITHOUT ROWID;
+    """),
+    (7, "epoch event times and event archive", """
+        -- event_ts (epoch seconds, naive times read as UTC) is what queries sort and
+        -- filter on; event_datetime stays as the display/legacy copy
+        ALTER TABLE events ADD COLUMN event_ts INTEGER;
+        UPDATE events SET event_ts = CASE
+            WHEN typeof(event_datetime) IN ('integer', 'real') THEN CAST(event_datetime AS INTEGER)
+            ELSE CAST(strftime('%s', event_datetime) AS INTEGER) END;
+        -- writers that only set event_datetime (older code, other tools) still get event_ts
+        CREATE TRIGGER IF NOT EXISTS trg_events_ts_insert AFTER INSERT ON events
+        WHEN NEW.event_ts IS NULL BEGIN
+            UPDATE events SET event_ts = CAST(strftime('%s', NEW.event_datetime) AS INTEGER) WHERE id = NEW.id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_events_ts_update AFTER UPDATE OF event_datetime ON events
+        WHEN NEW.event_ts IS OLD.event_ts BEGIN
+            UPDATE events SET event_ts = CAST(strftime('%s', NEW.event_datetime) AS INTEGER) WHERE id = NEW.id;
+        END;
+        CREATE INDEX IF NOT EXISTS idx_events_ts ON events (event_ts);
+        CREATE INDEX IF NOT EXISTS idx_events_creator ON events (creator_id, event_ts);
+        CREATE INDEX IF NOT EXISTS idx_events_group ON events (group_id, event_ts);
+        CREATE INDEX IF NOT EXISTS idx_participants_user ON event_participants (user_id);
+        -- finished events are moved here by backend/archive.py (same columns + archived_at)
+        CREATE TABLE IF NOT EXISTS events_archive (
+            id INTEGER PRIMARY KEY,
+            creator_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            event_datetime TIMESTAMP NOT NULL,
+            event_type TEXT NOT NULL,
+            location TEXT NOT NULL,
+            duration REAL NOT NULL,
+            description TEXT,
+            cost_estimate REAL,
+            max_participants INTEGER,
+            created_at TIMESTAMP,
+            group_id INTEGER,
+            lat REAL,
+            lon REAL,
+            event_ts INTEGER,
+            archived_at INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_events_archive_creator ON events_archive (creator_id, event_ts);
+        CREATE INDEX IF NOT EXISTS idx_events_archive_group ON events_archive (group_id, event_ts);
+        CREATE TABLE IF NOT EXISTS event_participants_archive (
+            event_id INTEGER,
+            user_id INTEGER,
+            status TEXT,
+            joined_at TIMESTAMP,
+            PRIMARY KEY (event_id, user_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_participants_archive_user ON event_participants_archive (user_id);
+        -- hot + archived, for queries that opt into history
+        CREATE VIEW IF NOT EXISTS events_all AS
+            SELECT id, creator_id, title, event_datetime, event_type, location, duration, description,
+                   cost_estimate, max_participants, created_at, group_id, lat, lon, event_ts FROM events
+            UNION ALL
+            SELECT id, creator_id, title, event_datetime, event_type, location, duration, description,
+                   cost_estimate, max_participants, created_at, group_id, lat, lon, event_ts FROM events_archive;
+        CREATE VIEW IF NOT EXISTS event_participants_all AS
+            SELECT event_id, user_id, status, joined_at FROM event_participants
+            UNION ALL
+            SELECT event_id, user_id, status, joined_at FROM event_participants_archive;
+    """),
+    (8, "precomputed recommendations", """
+        -- top-k items per subject ("user:app:<id>", "group:api:<token>", "global", ...),
+        -- rebuilt and swapped in whole by backend/recommender.py
+        CREATE TABLE IF NOT EXISTS recommendations (
+            subject TEXT NOT NULL,
+            rank INTEGER NOT NULL,
+            item TEXT NOT NULL,
+            label TEXT,
+            score REAL NOT NULL,
+            PRIMARY KEY (subject, rank)
+        ) WITHOUT ROWID;
+    """),
+    (9, "job owners", """
+        -- "host:pid" of the submitting process; restart recovery only touches jobs whose owner is gone
+        ALTER TABLE jobs ADD COLUMN owner TEXT;
+    """),
+]
+
+# ---------- API database (backend/api.py: groups, plans, votes) ----------
+def _normalize_places(conn, chunk=1000):
+    """Create `places`, point plans at it and move existing place_json blobs over."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS places (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            osm_id TEXT UNIQUE NOT NULL,
+            name TEXT,
+            address TEXT,
+            lat REAL,
+            lon REAL,
+            attrs TEXT
+        )
+    """)
+    conn.execute("ALTER TABLE plans ADD COLUMN place_id INTEGER REFERENCES places(id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_places_lat_lon ON places (lat, lon)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_plans_place ON plans (place_id)")
+    rows = conn.execute("SELECT id, place_json FROM plans WHERE place_json IS NOT NULL").fetchall()
+    for start in range(0, len(rows), chunk):
+        parsed = []
+        for plan_id, place_json in rows[start:start + chunk]:
+            try:
+                place = json.loads(place_json)
+            except ValueError:
+                continue  # leave unparseable blobs in place_json
+            if isinstance(place, dict):
+                parsed.append((plan_id, place))
+        place_ids = upsert_places(conn, [place for _, place in parsed])
+        conn.executemany("UPDATE plans SET place_id=?, place_json=NULL WHERE id=?",
+                         [(place_id, plan_id) for (plan_id, _), place_id in zip(parsed, place_ids)])
+
+API_MIGRATIONS = [
+    (1, "create groups, plans and votes", """
+        CREATE TABLE IF NOT EXISTS groups (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            token TEXT UNIQUE,
+            name TEXT
+        );
+        CREATE TABLE IF NOT EXISTS plans (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            group_id INTEGER,
+            title TEXT,
+            place_json TEXT,
+            FOREIGN KEY(group_id) REFERENCES groups(id)
+        );
+        CREATE TABLE IF NOT EXISTS votes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            plan_id INTEGER,
+            user_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(plan_id) REFERENCES plans(id)
+        );
+    """),
+    (2, "unique vote per user and plan", """
+        DELETE FROM votes WHERE id NOT IN (SELECT MIN(id) FROM votes GROUP BY plan_id, user_id);
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_votes_plan_user ON votes (plan_id, user_id);
+    """),
+    (3, "index plans by group", """
+        CREATE INDEX IF NOT EXISTS idx_plans_group ON plans (group_id);
+    """),
+    (4, "normalize places", _normalize_places),
+    (5, "vote rollups", """
+        -- votes added/removed per plan per time bucket (bucket = epoch seconds at the
+        -- bucket start), kept up to date by backend/analytics.py; clustered by group so
+        -- a group's timeline is one range scan
+        CREATE TABLE IF NOT EXISTS vote_rollup_minute (
+            group_id INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            plan_id INTEGER NOT NULL,
+            added INTEGER NOT NULL DEFAULT 0,
+            removed INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (group_id, bucket, plan_id)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS vote_rollup_hour (
+            group_id INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            plan_id INTEGER NOT NULL,
+            added INTEGER NOT NULL DEFAULT 0,
+            removed INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (group_id, bucket, plan_id)
+        ) WITHOUT ROWID;
+        -- backfill from the current votes (removed votes left no trace, so added only)
+        INSERT OR IGNORE INTO vote_rollup_minute (group_id, bucket, plan_id, added)
+            SELECT p.group_id, CAST(strftime('%s', v.created_at) AS INTEGER) / 60 * 60, v.plan_id, COUNT(*)
+            FROM votes v JOIN plans p ON p.id = v.plan_id
+            WHERE v.created_at IS NOT NULL GROUP BY 1, 2, 3;
+        INSERT OR IGNORE INTO vote_rollup_hour (group_id, bucket, plan_id, added)
+            SELECT p.group_id, CAST(strftime('%s', v.created_at) AS INTEGER) / 3600 * 3600, v.plan_id, COUNT(*)
+            FROM votes v JOIN plans p ON p.id = v.plan_id
+            WHERE v.created_at IS NOT NULL GROUP BY 1, 2, 3;
+    """),
+]
+
+_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        namespace TEXT NOT NULL DEFAULT 'app',
+        version INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (namespace, version)
+    )
+"""
+
+_checked = set()  # (abs db path, namespace, target version) already known to be current
+_lock = threading.Lock()
+
+
+def namespace_of(migrations):
+    """'api' for API_MIGRATIONS (or a prefix of it), else 'app'."""
+    return "api" if migrations and migrations[0] is API_MIGRATIONS[0] else "app"
+
+
+def current_version(conn, namespace="app"):
+    try:
+        row = conn.execute("SELECT MAX(version) FROM schema_version WHERE namespace = ?", (namespace,)).fetchone()
+    except sqlite3.OperationalError:  # no schema_version table yet (or the pre-namespace one)
+        return 0
+    return row[0] or 0
+
+
+def _ensure_version_table(conn):
+    """Create schema_version, moving a pre-namespace table (keyed by version alone) over.
+    Old rows are assigned to "api" when their (version, name) is an API migration."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(schema_version)")]
+        if columns and "namespace" not in columns:
+            conn.execute("ALTER TABLE schema_version RENAME TO schema_version_old")
+            conn.execute(_VERSION_TABLE)
+            api_steps = {(version, name) for version, name, _ in API_MIGRATIONS}
+            conn.executemany(
+                "INSERT INTO schema_version (namespace, version, name, applied_at) VALUES (?, ?, ?, ?)",
+                [("api" if (version, name) in api_steps else "app", version, name, applied_at)
+                 for version, name, applied_at in conn.execute("SELECT version, name, applied_at FROM schema_version_old")])
+            conn.execute("DROP TABLE schema_version_old")
+        elif not columns:
+            conn.execute(_VERSION_TABLE)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def migrate(db_path, migrations=APP_MIGRATIONS, verbose=False, namespace=None):
+    """Apply pending migrations, each in its own transaction. Returns versions applied.
+    namespace defaults to namespace_of(migrations)."""
+    namespace = namespace or namespace_of(migrations)
+    applied = []
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        _ensure_version_table(conn)
+        for version, name, step in migrations:
+            # BEGIN IMMEDIATE takes the write lock, so a concurrent migrator waits and
+            # then sees the version we recorded instead of re-running the step.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if current_version(conn, namespace) >= version:
+                    conn.execute("ROLLBACK")
+                    continue
+                t0 = time.perf_counter()
+                if callable(step):
+                    step(conn)
+                else:
+                    for statement in _split_sql(step):
+                        conn.execute(statement)
+                conn.execute("INSERT INTO schema_version (namespace, version, name) VALUES (?, ?, ?)",
+                             (namespace, version, name))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            applied.append(version)
+            if verbose:
+                print(f"  {os.path.basename(db_path)}: applied {version} {name} ({(time.perf_counter() - t0) * 1000:.1f} ms)")
+    finally:
+        conn.close()
+    return applied
+
+
+def ensure_schema(db_path, migrations=APP_MIGRATIONS, namespace=None):
+    """Cheap import-time check: migrate only if the database is behind."""
+    namespace = namespace or namespace_of(migrations)
+    target = migrations[-1][0]
+    key = (os.path.abspath(db_path), namespace, target)
+    if key in _checked:
+        return
+    with _lock:
+        if key in _checked:
+            return
+        conn = sqlite3.connect(db_path)
+        try:
+            behind = current_version(conn, namespace) < target
+        finally:
+            conn.close()
+        if behind:
+            migrate(db_path, migrations, namespace=namespace)
+        _checked.add(key)
+
+
+def _split_sql(script):
+    """Split a migration script into statements (handles CREATE TRIGGER ... END bodies)."""
+    statements, buf = [], ""
+    for line in script.splitlines(keepends=True):
+        buf += line
+        if sqlite3.complete_statement(buf):
+            if buf.strip():
+                statements.append(buf.strip())
+            buf = ""
+    if buf.strip():
+        statements.append(buf.strip())
+    return statements
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations.")
+    parser.add_argument("--db", help="app database (default: backend/backend.db)")
+    parser.add_argument("--api-db", help="API database (default: $PLANPAL_API_DB or ./backend.db)")
+    parser.add_argument("--skip-api", action="store_true")
+    args = parser.parse_args(argv)
+
+    targets = [(args.db or APP_DB_PATH, APP_MIGRATIONS)]
+    if not args.skip_api:
+        targets.append((args.api_db or API_DB_PATH, API_MIGRATIONS))
+    for path, migrations in targets:
+        applied = migrate(path, migrations, verbose=True)
+        print(f"{path}: {'applied ' + str(applied) if applied else 'up to date'} (version {migrations[-1][0]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# backend/passwords.py
+"""
+Password hashing (PBKDF2-HMAC-SHA256) on a bounded worker pool.
+
+hashlib releases the GIL while it runs PBKDF2, so a login hashing inline doesn't
+stall other Streamlit sessions. PASSWORD_POOL runs the work that nobody waits on
+(bulk imports, background re-hashes) and the awaitable *_aio wrappers, which keep
+an asyncio event loop free; it uses up to one core per worker.
+
+The work factor is PLANPAL_PBKDF2_ITERATIONS. Stored hashes carry their own
+iteration count, so raising it only re-hashes users as they next log in.
+
+Stored format: pbkdf2_sha256$<iterations>$<salt b64>$<hash b64>
+Anything without that prefix is treated as a legacy plaintext password.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+ALGORITHM = "pbkdf2_sha256"
+DEFAULT_ITERATIONS = int(os.getenv("PLANPAL_PBKDF2_ITERATIONS", "310000"))
+PASSWORD_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("PLANPAL_HASH_WORKERS", str(os.cpu_count() or 2))),
+    thread_name_prefix="pwhash",
+)
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _unb64(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def hash_password(password, iterations=None):
+    """Return the encoded hash for `password` (runs on the calling thread)."""
+    iterations = iterations or DEFAULT_ITERATIONS
+    salt = os.urandom(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return f"{ALGORITHM}${iterations}${_b64(salt)}${_b64(digest)}"
+
+
+def is_hashed(stored):
+    return bool(stored) and stored.startswith(ALGORITHM + "$")
+
+
+def check_password(password, stored, iterations=None):
+    """
+    Verify `password` against a stored value (hash or legacy plaintext).
+    Returns (ok, needs_rehash): needs_rehash is True for plaintext rows and for
+    hashes made with a different work factor than the current setting.
+    """
+    if not stored:
+        return False, False
+    iterations = iterations or DEFAULT_ITERATIONS
+    if not is_hashed(stored):
+        ok = hmac.compare_digest(stored.encode("utf-8"), password.encode("utf-8"))
+        return ok, ok
+    try:
+        _, rounds, salt, digest = stored.split("$")
+        rounds = int(rounds)
+    except ValueError:
+        return False, False
+    candidate = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), _unb64(salt), rounds)
+    ok = hmac.compare_digest(candidate, _unb64(digest))
+    return ok, ok and rounds != iterations
+
+
+# ---------- off-thread wrappers ----------
+def hash_password_async(password, iterations=None):
+    """Submit hashing to PASSWORD_POOL; returns a concurrent.futures.Future."""
+    return PASSWORD_POOL.submit(hash_password, password, iterations)
+
+
+def check_password_async(password, stored, iterations=None):
+    return PASSWORD_POOL.submit(check_password, password, stored, iterations)
+
+
+async def hash_password_aio(password, iterations=None):
+    """Awaitable variant for asyncio callers (e.g. FastAPI async endpoints)."""
+    return await asyncio.wrap_future(hash_password_async(password, iterations))
+
+
+async def check_password_aio(password, stored, iterations=None):
+    return await asyncio.wrap_future(check_password_async(password, stored, iterations))
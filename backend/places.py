@@ -0,0 +1,85 @@
+# backend/places.py
+"""
+Normalized place storage for the API database.
+
+Each distinct place is stored once in `places`, keyed by its content (prefixed with
+its OSM type and id when it has them). Rows are never updated: groups share a row
+only when they sent identical places, so one client can't rewrite what another
+group sees. name/address/lat/lon get real columns, so
+coordinates can be indexed and queried. Any other keys go into `attrs` as compact
+JSON. PLACE_JSON_SQL rebuilds the original place object in SQL. (Coordinates come
+back with 15 significant digits, far below a millimetre.)
+"""
+import hashlib
+import json
+
+# the inner json_patch('{}', ...) drops NULL columns, so keys the place never had
+# stay absent and attrs values (nulls included) are kept as stored
+PLACE_JSON_SQL = ("json_patch(COALESCE(pl.attrs, '{}'), json_patch('{}', json_object("
+                  "'name', pl.name, 'address', pl.address, 'lat', pl.lat, 'lon', pl.lon)))")
+
+_TEXT_FIELDS = ("name", "address")
+_COORD_FIELDS = ("lat", "lon")
+
+
+def _compact(obj):
+    return json.dumps(obj, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
+
+
+def osm_identity(place):
+    """"<osm_type>:<osm_id>" when the place carries both (Nominatim style; `id` stands
+    in for a missing osm_id), else None. A bare id is not enough: node 1 and way 1 are
+    different places, and clients put their own ids in `id`."""
+    osm_type = place.get("osm_type")
+    osm_id = place.get("osm_id", place.get("id"))
+    if isinstance(osm_type, str) and osm_type and isinstance(osm_id, (int, str)) \
+            and not isinstance(osm_id, bool) and str(osm_id):
+        return f"{osm_type}:{osm_id}"
+    return None
+
+
+def place_key(place):
+    """
+    Dedup key: "<osm_type>:<osm_id>@<content hash>" for OSM places, else
+    "sha1:<content hash>". Only identical places share a key.
+    """
+    digest = hashlib.sha1(_compact(place).encode("utf-8")).hexdigest()[:20]
+    identity = osm_identity(place)
+    return f"{identity}@{digest}" if identity else "sha1:" + digest
+
+
+def split_place(place):
+    """(key, name, address, lat, lon, attrs_json) row for the places table."""
+    attrs = dict(place)
+    cols = {}
+    for field in _TEXT_FIELDS:
+        if isinstance(attrs.get(field), str):
+            cols[field] = attrs.pop(field)
+    for field in _COORD_FIELDS:
+        value = attrs.get(field)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            cols[field] = float(attrs.pop(field))
+    return (place_key(place), cols.get("name"), cols.get("address"),
+            cols.get("lat"), cols.get("lon"), _compact(attrs) if attrs else None)
+
+
+def upsert_places(c, places):
+    """Store places not seen before; returns their place ids in input order."""
+    rows = [split_place(p) for p in places]
+    if not rows:
+        return []
+    # a key is a content hash, so an existing row already holds exactly this place
+    c.executemany("INSERT INTO places (osm_id, name, address, lat, lon, attrs) VALUES (?, ?, ?, ?, ?, ?) "
+                  "ON CONFLICT (osm_id) DO NOTHING", rows)
+    keys = [row[0] for row in rows]
+    found = c.execute("SELECT p.osm_id, p.id FROM places p JOIN json_each(?) k ON p.osm_id = k.value",
+                      (json.dumps(sorted(set(keys))),)).fetchall()
+    ids = dict(found)
+    return [ids[key] for key in keys]
+
+
+def load_places(c, place_ids):
+    """{place id: place object} rebuilt from the stored rows (what GET /plans returns)."""
+    found = c.execute(f"SELECT pl.id, {PLACE_JSON_SQL} FROM places pl JOIN json_each(?) k ON pl.id = k.value",
+                      (json.dumps(sorted(set(place_ids))),)).fetchall()
+    return {place_id: json.loads(place) for place_id, place in found}
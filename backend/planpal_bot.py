@@ -2,26 +2,141 @@
 import os
 import streamlit as st
 import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import List, Dict, Any
 
-# Try to import the new genai SDK (we used this successfully)
-HAS_GENAI = False
 try:
+    from backend.metrics import REGISTRY, SIZE_BUCKETS, serve_metrics_from_env
+    from backend.ttl_cache import SQLiteTTLCache
+    from backend.lazy_imports import is_available
+    from backend import fake_genai, jobs, prefetch
+except ImportError:  # run from inside backend/ (the Streamlit apps import the backend package)
+    from metrics import REGISTRY, SIZE_BUCKETS, serve_metrics_from_env
+    from ttl_cache import SQLiteTTLCache
+    from lazy_imports import is_available
+    import fake_genai
+    import jobs
+    import prefetch
+
+# The new genai SDK (we used this successfully) is slow to import, so only check it
+# is installed here and import it when a client is first created.
+HAS_GENAI = is_available("google.genai")
+
+def _genai():
     from google import genai
-    HAS_GENAI = True
-except Exception:
-    HAS_GENAI = False
+    return genai
+
+@st.cache_resource(show_spinner=False)
+def _shared_client(api_key: str):
+    """genai.Client per API key, shared across sessions and reruns.
+    The HTTP timeout makes calls we stopped waiting for give their pool worker back."""
+    return _genai().Client(api_key=api_key, http_options={"timeout": int(DEFAULT_DEADLINE_S * 1000)})
+
+DEFAULT_FALLBACK_MODEL = os.getenv("PLANPAL_FALLBACK_MODEL", "models/gemini-2.5-flash-lite")
+DEFAULT_DEADLINE_S = float(os.getenv("PLANPAL_DEADLINE_S", "20"))
+DEFAULT_HEDGE_PERCENTILE = float(os.getenv("PLANPAL_HEDGE_PERCENTILE", "0.9"))
+
+# PLANPAL_FAKE_LLM=1 swaps Gemini for the offline stub (load tests, demos without keys)
+USE_FAKE_LLM = os.getenv("PLANPAL_FAKE_LLM", "").lower() in ("1", "true", "yes")
+
+# ---------- Instrumentation ----------
+_M_CALL_LATENCY = REGISTRY.histogram("planpal_call_latency_seconds", "End-to-end PlanPal call latency by method")
+_M_MODEL_LATENCY = REGISTRY.histogram("planpal_model_latency_seconds", "Latency of individual generate_content calls")
+_M_PROMPT_CHARS = REGISTRY.histogram("planpal_prompt_chars", "Prompt size in characters", buckets=SIZE_BUCKETS)
+_M_RESPONSE_CHARS = REGISTRY.histogram("planpal_response_chars", "Response size in characters", buckets=SIZE_BUCKETS)
+_M_TOKENS = REGISTRY.counter("planpal_tokens_total", "Tokens used (reported by the API, else estimated)")
+_M_COST = REGISTRY.counter("planpal_cost_usd_total", "Estimated spend from MODEL_PRICING")
+_M_ERRORS = REGISTRY.counter("planpal_errors_total", "Model call errors by exception type")
+_M_MOCK = REGISTRY.counter("planpal_mock_fallbacks_total", "get_event_suggestions answers served from the mock list")
+_M_PARSE = REGISTRY.counter("planpal_parse_failures_total", "Model replies that were not a parseable JSON array")
+_M_CACHE = REGISTRY.counter("planpal_suggestion_cache_total", "Suggestion cache lookups by caller and result")
+_M_HEDGE = REGISTRY.counter("planpal_hedge_total", "Hedged-call outcomes")
+serve_metrics_from_env()
+
+# USD per 1M (input, output) tokens — approximate list prices, used for cost estimates only
+MODEL_PRICING = {
+    "models/gemini-2.5-pro": (1.25, 10.0),
+    "models/gemini-2.5-flash": (0.30, 2.50),
+    "models/gemini-2.5-flash-lite": (0.10, 0.40),
+}
+
+# Parsed model suggestions, shared by every PlanPal (and process, via SQLite) so
+# prefetched answers serve the first click. Opt-in: with it on, repeat requests get
+# the same ideas for up to 15 minutes instead of a fresh generation.
+SUGGESTION_CACHE_ENABLED = os.getenv("PLANPAL_SUGGESTION_CACHE", "").lower() in ("1", "true", "yes")
+_SUGGESTION_CACHE = SQLiteTTLCache("suggestions", maxsize=512, ttl=900)
+
+# PLANPAL_DEBUG=1 shows call stats and the full metrics registry in the settings panel
+SHOW_DEBUG_STATS = os.getenv("PLANPAL_DEBUG", "").lower() in ("1", "true", "yes")
+
+# Model calls run on this shared pool so a slow Gemini response can be abandoned
+# at its deadline instead of pinning the Streamlit thread.
+MODEL_WORKERS = int(os.getenv("PLANPAL_MODEL_WORKERS", "8"))
+_MODEL_POOL = ThreadPoolExecutor(max_workers=MODEL_WORKERS, thread_name_prefix="planpal")
+
+# An abandoned call (deadline miss, or the loser of a hedge race) keeps its worker
+# until the SDK returns. Past this many, new calls fail fast and hedging is skipped
+# so stragglers can't take over the pool.
+MAX_ABANDONED = int(os.getenv("PLANPAL_MAX_ABANDONED", str(max(1, MODEL_WORKERS // 2))))
+_abandoned = 0
+_abandoned_lock = threading.Lock()
+
+def _release_abandoned(_fut):
+    global _abandoned
+    with _abandoned_lock:
+        _abandoned -= 1
+
+def _abandon(futures):
+    """Stop waiting on futures: cancel the ones still queued, count the running ones until they finish."""
+    global _abandoned
+    for fut in futures:
+        if fut.cancel():
+            continue
+        with _abandoned_lock:
+            _abandoned += 1
+        fut.add_done_callback(_release_abandoned)
+
+def abandoned_calls() -> int:
+    """Model calls still running that no caller is waiting for."""
+    with _abandoned_lock:
+        return _abandoned
+
+
+def _mock_suggestions(location):
+    return [
+        {"name":"Café Hangout","description":f"Chill café near {location}","estimated_cost":"₹300","duration":"2 hours"},
+        {"name":"Park Picnic","description":f"Relaxing picnic in a nearby park","estimated_cost":"₹150","duration":"3 hours"},
+        {"name":"Food Crawl","description":f"Try popular local eateries","estimated_cost":"₹800","duration":"4 hours"}
+    ]
 
 class PlanPal:
-    def __init__(self, model_name: str = "models/gemini-2.5-flash"):
+    def __init__(self, model_name: str = "models/gemini-2.5-flash",
+                 fallback_model_name: str = DEFAULT_FALLBACK_MODEL,
+                 deadline_s: float = DEFAULT_DEADLINE_S,
+                 hedge_percentile: float = DEFAULT_HEDGE_PERCENTILE,
+                 hedge_after_s: float = 4.0):
         self.model_name = model_name
+        # Deadline / hedging config: if the primary model hasn't answered by the
+        # hedge_percentile of its recent latencies, race the fallback model too.
+        self.fallback_model_name = fallback_model_name
+        self.deadline_s = deadline_s
+        self.hedge_percentile = hedge_percentile
+        self.hedge_after_s = hedge_after_s  # used until we have enough latency samples
+        self._latencies = deque(maxlen=200)
+        self.hedge_stats = {"calls": 0, "hedged": 0, "primary_wins": 0, "fallback_wins": 0, "timeouts": 0}
+        self._stats_lock = threading.Lock()  # concurrent _call_model calls share one PlanPal
         # Prefer server-side environment key
         self.api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
         self.client = None
+        if USE_FAKE_LLM:
+            self.client = fake_genai.FakeClient.from_env()
         # If server key exists and SDK is available, try to init client now
-        if self.api_key and HAS_GENAI:
+        elif self.api_key and HAS_GENAI:
             try:
-                self.client = genai.Client(api_key=self.api_key)
+                self.client = _shared_client(self.api_key)
             except Exception as e:
                 print("PlanPal: failed to create genai.Client:", e)
                 self.client = None
@@ -32,24 +147,75 @@ class PlanPal:
             self.api_key = api_key
         if model_name:
             self.model_name = model_name
+        if USE_FAKE_LLM:
+            self.client = fake_genai.FakeClient.from_env()
+            return True
         if not self.api_key or not HAS_GENAI:
             return False
         try:
-            self.client = genai.Client(api_key=self.api_key)
+            self.client = _shared_client(self.api_key)
             return True
         except Exception as e:
             print("PlanPal.ensure_client error:", e)
             return False
 
-    def _call_model(self, prompt: str, max_output_tokens: int = 512) -> str:
-        """Call the model (google.genai path). Returns text or raises exception."""
-        if not self.client:
-            raise RuntimeError("PlanPal client not initialized")
-        # Use models.generate_content which worked in your environment
-        resp = self.client.models.generate_content(
-            model=self.model_name,
-            contents=prompt
-        )
+    def _hedge_delay(self) -> float:
+        """Seconds to wait on the primary model before sending the hedged request."""
+        if len(self._latencies) < 10:
+            return min(self.hedge_after_s, self.deadline_s)
+        samples = sorted(self._latencies)
+        idx = min(len(samples) - 1, int(self.hedge_percentile * len(samples)))
+        return min(samples[idx], self.deadline_s)
+
+    def _count(self, stat: str) -> None:
+        with self._stats_lock:
+            self.hedge_stats[stat] += 1
+
+    def hedge_report(self) -> Dict[str, Any]:
+        """Hedge counters plus win rates (fallback_win_rate is over hedged calls only)."""
+        with self._stats_lock:
+            stats = dict(self.hedge_stats)
+        hedged = stats["hedged"]
+        stats["hedge_rate"] = hedged / stats["calls"] if stats["calls"] else 0.0
+        stats["fallback_win_rate"] = stats["fallback_wins"] / hedged if hedged else 0.0
+        stats["hedge_delay_s"] = self._hedge_delay()
+        stats["abandoned_calls"] = abandoned_calls()
+        return stats
+
+    def _generate(self, model_name: str, prompt: str):
+        start = time.perf_counter()
+        try:
+            # Use models.generate_content which worked in your environment
+            resp = self.client.models.generate_content(
+                model=model_name,
+                contents=prompt
+            )
+        except Exception as e:
+            _M_ERRORS.inc(model=model_name, error=type(e).__name__)
+            raise
+        _M_MODEL_LATENCY.observe(time.perf_counter() - start, model=model_name)
+        self._record_usage(model_name, prompt, resp)
+        return resp
+
+    def _record_usage(self, model_name: str, prompt: str, resp) -> None:
+        usage = getattr(resp, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", None)
+        response_tokens = getattr(usage, "candidates_token_count", None)
+        text = getattr(resp, "text", None) or ""
+        # no usage metadata (older SDKs / stubs): estimate ~4 chars per token
+        if prompt_tokens is None:
+            prompt_tokens = len(prompt) // 4
+        if response_tokens is None:
+            response_tokens = len(text) // 4
+        _M_PROMPT_CHARS.observe(len(prompt), model=model_name)
+        _M_RESPONSE_CHARS.observe(len(text), model=model_name)
+        _M_TOKENS.inc(prompt_tokens, model=model_name, kind="prompt")
+        _M_TOKENS.inc(response_tokens, model=model_name, kind="response")
+        price_in, price_out = MODEL_PRICING.get(model_name, (0.0, 0.0))
+        _M_COST.inc((prompt_tokens * price_in + response_tokens * price_out) / 1e6, model=model_name)
+
+    @staticmethod
+    def _response_text(resp) -> str:
         # Try typical response attributes
         text = getattr(resp, "text", None) or getattr(resp, "output_text", None)
         if not text and hasattr(resp, "output"):
@@ -65,19 +231,81 @@ class PlanPal:
                 text = str(resp)
         return text or str(resp)
 
+    def _call_model(self, prompt: str, max_output_tokens: int = 512, deadline_s: float = None) -> str:
+        """Call the model (google.genai path) under a deadline, hedging to the fallback model.
+        Returns text or raises (TimeoutError when neither tier answers in time)."""
+        if not self.client:
+            raise RuntimeError("PlanPal client not initialized")
+        deadline_s = deadline_s or self.deadline_s
+        start = time.monotonic()
+        self._count("calls")
+        if abandoned_calls() >= MAX_ABANDONED:
+            # the pool is busy with calls nobody waits for; queuing behind them would miss the deadline anyway
+            self._count("timeouts")
+            _M_HEDGE.inc(outcome="saturated")
+            raise TimeoutError(f"{abandoned_calls()} abandoned model calls still running")
+
+        primary = _MODEL_POOL.submit(self._generate, self.model_name, prompt)
+        # record every successful primary latency (even ones that lose the race) so the
+        # hedge percentile reflects the real distribution
+        primary.add_done_callback(
+            lambda f: f.exception() is None and self._latencies.append(time.monotonic() - start)
+        )
+        pending = {primary: "primary"}
+        done, _ = wait([primary], timeout=self._hedge_delay())
+        # hedge when the primary is slow, and also fail over when it errors out early
+        if ((not done or primary.exception() is not None) and self.fallback_model_name
+                and self.fallback_model_name != self.model_name and abandoned_calls() < MAX_ABANDONED):
+            self._count("hedged")
+            _M_HEDGE.inc(outcome="hedged")
+            pending[_MODEL_POOL.submit(self._generate, self.fallback_model_name, prompt)] = "fallback"
+
+        last_error = None
+        while pending:
+            remaining = deadline_s - (time.monotonic() - start)
+            if remaining <= 0:
+                break
+            done, _ = wait(list(pending), timeout=remaining, return_when=FIRST_COMPLETED)
+            for fut in done:
+                tier = pending.pop(fut)
+                if fut.exception() is None:
+                    self._count(f"{tier}_wins")
+                    _M_HEDGE.inc(outcome=f"{tier}_win")
+                    _abandon(pending)  # the race loser, if still running
+                    return self._response_text(fut.result())
+                last_error = fut.exception()
+        if pending:
+            self._count("timeouts")
+            _M_HEDGE.inc(outcome="timeout")
+            _abandon(pending)
+            raise TimeoutError(f"no model answered within {deadline_s:.1f}s")
+        raise last_error
+
     def chat_response(self, user_input: str) -> str:
         """Friendly chat response (with fallback)"""
         prompt = f"As PlanPal, a friendly event planning assistant, respond briefly and helpfully to: {user_input}"
         # If client not ready, return a helpful offline message
         if not self.client:
             return "(PlanPal offline) Paste a valid GEMINI_API_KEY in PlanPal settings to enable live AI."
+        start = time.perf_counter()
         try:
             return self._call_model(prompt)
+        except TimeoutError as e:
+            print("PlanPal.chat_response timeout:", e)
+            return "(PlanPal is taking too long to answer — please try again in a moment.)"
         except Exception as e:
             print("PlanPal.chat_response error:", e)
             return f"(PlanPal error calling model: {e})"
+        finally:
+            _M_CALL_LATENCY.observe(time.perf_counter() - start, method="chat_response")
+
+    def _suggestion_key(self, location, group_size, mood):
+        return (self.model_name, str(location).strip().lower(), int(group_size), mood)
 
-    def get_event_suggestions(self, location="your city", group_size=4, mood="Chill") -> List[Dict[str,Any]]:
+    def suggestion_cached(self, location="your city", group_size=4, mood="Chill") -> bool:
+        return SUGGESTION_CACHE_ENABLED and _SUGGESTION_CACHE.get(self._suggestion_key(location, group_size, mood)) is not None
+
+    def get_event_suggestions(self, location="your city", group_size=4, mood="Chill", caller="user") -> List[Dict[str,Any]]:
         """Return a list of suggestion dicts (tries to parse JSON; falls back to mock)"""
         prompt = (
             f"Suggest 3 concise event ideas for a group of {group_size} people in {location} "
@@ -85,30 +313,45 @@ class PlanPal:
         )
         # If no client, return mock suggestions
         if not self.client:
-            return [
-                {"name":"Café Hangout","description":f"Chill café near {location}","estimated_cost":"₹300","duration":"2 hours"},
-                {"name":"Park Picnic","description":f"Relaxing picnic in a nearby park","estimated_cost":"₹150","duration":"3 hours"},
-                {"name":"Food Crawl","description":f"Try popular local eateries","estimated_cost":"₹800","duration":"4 hours"}
-            ]
+            _M_MOCK.inc(reason="no_client")
+            return _mock_suggestions(location)
+        cache_key = self._suggestion_key(location, group_size, mood)
+        if SUGGESTION_CACHE_ENABLED:
+            cached = _SUGGESTION_CACHE.get(cache_key)
+            if cached is not None:
+                _M_CACHE.inc(caller=caller, result="hit")
+                return [dict(s) if isinstance(s, dict) else s for s in cached]
+            _M_CACHE.inc(caller=caller, result="miss")
+        start = time.perf_counter()
         try:
             text = self._call_model(prompt)
             # Attempt to extract JSON array from response
             if "[" in text and "]" in text:
                 j = text[text.find("["): text.rfind("]")+1]
                 try:
-                    return json.loads(j)
+                    suggestions = json.loads(j)
+                    if SUGGESTION_CACHE_ENABLED:
+                        _SUGGESTION_CACHE.set(cache_key, suggestions)
+                    return [dict(s) if isinstance(s, dict) else s for s in suggestions]
                 except Exception:
                     pass
             # If parsing fails, return single suggestion in list
+            _M_PARSE.inc(model=self.model_name)
             return [{"name":"Suggestion","description":text}]
         except Exception as e:
             print("PlanPal.get_event_suggestions error:", e)
-            # fallback mock
-            return [
-                {"name":"Café Hangout","description":f"Chill café near {location}","estimated_cost":"₹300","duration":"2 hours"},
-                {"name":"Park Picnic","description":f"Relaxing picnic in a nearby park","estimated_cost":"₹150","duration":"3 hours"},
-                {"name":"Food Crawl","description":f"Try popular local eateries","estimated_cost":"₹800","duration":"4 hours"}
-            ]
+            # fallback mock (also covers deadline misses on both model tiers)
+            _M_MOCK.inc(reason=type(e).__name__)
+            return _mock_suggestions(location)
+        finally:
+            _M_CALL_LATENCY.observe(time.perf_counter() - start, method="get_event_suggestions")
+
+@jobs.register("ai_suggestions")
+def _ai_suggestions_job(params, context=None):
+    """Background job: get_event_suggestions on the submitting session's PlanPal (context)."""
+    planpal = context or PlanPal(model_name=params["model_name"])
+    return planpal.get_event_suggestions(location=params["location"], group_size=params["group_size"],
+                                         mood=params["mood"])
 
 # Streamlit UI helpers ------------------------------------------------
 def _ensure_planpal():
@@ -176,6 +419,10 @@ def planpal_settings_ui(context: str = "global"):
             st.session_state.planpal.client = None
             st.success("PlanPal set to offline mock mode")
 
+    if SHOW_DEBUG_STATS:
+        with st.expander("📈 PlanPal call stats"):
+            st.json({"hedging": p.hedge_report(), "cache_hit_rate": prefetch.hit_rate(), "metrics": REGISTRY.snapshot()})
+
 def show_planpal_chat_ui():
     st.title("🤖 PlanPal Assistant")
     # pass a context so settings widgets don't collision with planner
@@ -211,10 +458,27 @@ def show_event_planner_ui():
     with col2:
         mood = st.selectbox("Mood", ["Chill","Foodie","Adventurous"], key=f"pp_planner_mood_{st.session_state.get('user_id','anon')}")
     if st.button("Get AI suggestions", key=f"pp_get_suggestions_{st.session_state.get('user_id','anon')}"):
-        with st.spinner("Generating suggestions..."):
-            suggestions = p.get_event_suggestions(location=location, group_size=group_size, mood=mood)
-            for s in suggestions:
-                with st.expander(s.get("name","Suggestion")):
-                    st.write(s.get("description",""))
-                    st.write("Estimated cost:", s.get("estimated_cost","N/A"))
-                    st.write("Duration:", s.get("duration","N/A"))
+        # the model call runs on the job pool; _planner_results polls for it
+        params = {"location": location, "group_size": int(group_size), "mood": mood, "model_name": p.model_name}
+        st.session_state.pp_suggestions_job = jobs.submit("ai_suggestions", params, context=p)
+    _planner_results()
+
+@st.fragment(run_every=1.0)
+def _planner_results():
+    job_id = st.session_state.get("pp_suggestions_job")
+    if not job_id:
+        return
+    done = st.session_state.get("pp_suggestions_done")
+    job = done if done and done["id"] == job_id else jobs.get(job_id)
+    if job is None or job["status"] in jobs.ACTIVE:
+        st.info("⏳ Generating suggestions...")
+        return
+    st.session_state.pp_suggestions_done = job  # finished: later polls skip the DB
+    if job["status"] == "error":
+        st.error(f"PlanPal could not generate suggestions: {job['error']}")
+        return
+    for s in job["result"]:
+        with st.expander(s.get("name","Suggestion")):
+            st.write(s.get("description",""))
+            st.write("Estimated cost:", s.get("estimated_cost","N/A"))
+            st.write("Duration:", s.get("duration","N/A"))
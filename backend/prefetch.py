@@ -0,0 +1,115 @@
+# backend/prefetch.py
+"""
+Speculative prefetch: as soon as a group exists with member locations, warm the
+geocode, places and PlanPal suggestion caches for every mood in the background,
+so the first "Suggest Places" / "Get AI suggestions" click is served from cache.
+(Suggestions are only warmed when PLANPAL_SUGGESTION_CACHE is on.)
+
+Runs as a `prefetch_group` job (see jobs.py), so identical prefetches dedupe and
+never block the caller. The jobs run on their own PREFETCH_POOL
+(PLANPAL_PREFETCH_WORKERS threads), never on the JOB_POOL workers user jobs need,
+and at most PLANPAL_PREFETCH_MAX_IN_FLIGHT are queued or running per process;
+further prefetches are dropped. Cost is capped per group
+(PLANPAL_PREFETCH_MAX_CITIES geocodes, one place search and at most one model call
+per mood) and model calls are also capped per process
+(PLANPAL_PREFETCH_LLM_PER_HOUR). Set PLANPAL_PREFETCH=0 to turn it off. hit_rate()
+reports how often user lookups found a warm entry.
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from backend import jobs
+    from backend.metrics import REGISTRY
+except ImportError:
+    import jobs
+    from metrics import REGISTRY
+
+ENABLED = os.getenv("PLANPAL_PREFETCH", "1").lower() not in ("0", "false", "no")
+MAX_CITIES = int(os.getenv("PLANPAL_PREFETCH_MAX_CITIES", "8"))
+LLM_CALLS_PER_HOUR = int(os.getenv("PLANPAL_PREFETCH_LLM_PER_HOUR", "30"))
+DEFAULT_GROUP_SIZE = 4  # matches the planner UI default
+# one worker is plenty: live lookups are spaced to 1/s by the Nominatim throttle anyway
+PREFETCH_POOL = ThreadPoolExecutor(max_workers=int(os.getenv("PLANPAL_PREFETCH_WORKERS", "1")),
+                                   thread_name_prefix="planpal-prefetch")
+MAX_IN_FLIGHT = int(os.getenv("PLANPAL_PREFETCH_MAX_IN_FLIGHT", "4"))
+
+_M_PREFETCH = REGISTRY.counter("planpal_prefetch_total", "Prefetch work by stage and outcome")
+_llm_calls = deque()  # monotonic timestamps of prefetch model calls in the last hour
+_llm_lock = threading.Lock()
+
+
+def _take_llm_budget():
+    now = time.monotonic()
+    with _llm_lock:
+        while _llm_calls and now - _llm_calls[0] > 3600:
+            _llm_calls.popleft()
+        if len(_llm_calls) >= LLM_CALLS_PER_HOUR:
+            return False
+        _llm_calls.append(now)
+        return True
+
+
+def prefetch_group(member_locations, group_size=DEFAULT_GROUP_SIZE):
+    """Queue a background warm-up for these member locations; returns the job id, or None
+    when disabled, given no cities or already at MAX_IN_FLIGHT prefetches."""
+    cities = [c.strip() for c in member_locations if c and c.strip()][:MAX_CITIES]
+    if not ENABLED or not cities:
+        return None
+    return jobs.submit("prefetch_group", {"cities": cities, "group_size": int(group_size)})
+
+
+@jobs.register("prefetch_group", pool=PREFETCH_POOL, max_in_flight=MAX_IN_FLIGHT)
+def _prefetch_group_job(params, context=None):
+    try:
+        from backend import event_management as em
+        from backend import planpal_bot
+    except ImportError:
+        import event_management as em
+        import planpal_bot
+
+    cities = params["cities"]
+    summary = {"geocoded": 0, "places": 0, "suggestions": 0, "already_warm": 0, "over_budget": 0, "failed": 0}
+    lat, lon = em.compute_centroid(cities, caller="prefetch")
+    if lat is not None:
+        summary["geocoded"] = len(cities)
+        for mood in em.MOODS:
+            try:
+                em.get_places_nearby(lat, lon, mood, caller="prefetch")
+                summary["places"] += 1
+            except Exception as e:  # best effort: a flaky place search must not stop the rest
+                print(f"Prefetch place search failed ({mood}): {e}")
+                summary["failed"] += 1
+
+    # AI suggestions for the first member's location (the planner's usual input);
+    # only worth a model call when the suggestion cache will keep the answer
+    planpal = planpal_bot.PlanPal()
+    if planpal.client is not None and planpal_bot.SUGGESTION_CACHE_ENABLED:
+        for mood in em.MOODS:
+            if planpal.suggestion_cached(cities[0], params["group_size"], mood):
+                summary["already_warm"] += 1
+            elif not _take_llm_budget():
+                summary["over_budget"] += 1
+            else:
+                planpal.get_event_suggestions(cities[0], params["group_size"], mood, caller="prefetch")
+                summary["suggestions"] += 1
+    for stage, count in summary.items():
+        _M_PREFETCH.inc(count, stage=stage)
+    return summary
+
+
+def hit_rate():
+    """Share of user (non-prefetch) cache lookups that hit, per cache; None if no lookups yet."""
+    geo = REGISTRY.counter("planpal_geo_cache_total")
+    suggestions = REGISTRY.counter("planpal_suggestion_cache_total")
+    rates = {}
+    for name, counter, labels in (("geocode", geo, {"cache": "geocode"}),
+                                  ("places", geo, {"cache": "places"}),
+                                  ("suggestions", suggestions, {})):
+        hits = counter.value(caller="user", result="hit", **labels)
+        misses = counter.value(caller="user", result="miss", **labels)
+        rates[name] = round(hits / (hits + misses), 3) if hits + misses else None
+    return rates
@@ -0,0 +1,307 @@
+# backend/recommender.py
+"""
+Collaborative-filtering recommendations of event types and places, computed offline.
+
+    python -m backend.recommender                    # rebuild (cron, e.g. nightly)
+    python -m backend.recommender --rank 32 --top-k 20
+
+The batch job:
+1. Aggregates interactions in SQL into a sparse user x item matrix held as COO
+   arrays. RSVPs (hot and archived) give "type:<event type>" and
+   "place:<location>" items. API votes give "place:osm:<id>" items for the voted
+   plan's place. Weights are log1p-damped so a handful of heavy users can't dominate.
+2. Factorizes it with a randomized truncated SVD (Halko et al.). The only matrix
+   products are A @ X and A.T @ X, each done as `rank + oversample` np.bincount
+   passes over the nonzeros. Memory is O(nnz + (users + items) * rank), so millions
+   of interactions fit on one machine and there is no SciPy dependency.
+3. Scores users in blocks and keeps the top k per user (places they already know are
+   excluded). Groups score with the sum of their members' factors. group_members
+   defines app groups; an API group's members are the people who voted in it.
+   "global" holds the most popular items for cold-start users.
+4. Writes everything to a staging table and swaps it in, so readers never see a
+   half-built set.
+
+At request time for_user() / for_group() are one primary-key range read.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from array import array
+
+try:
+    from backend.lazy_imports import lazy_import
+    from backend.migrations import API_DB_PATH, APP_DB_PATH, ensure_schema
+except ImportError:
+    from lazy_imports import lazy_import
+    from migrations import API_DB_PATH, APP_DB_PATH, ensure_schema
+
+np = lazy_import("numpy")  # only the batch job needs it; lookups stay import-free
+
+RANK = int(os.getenv("PLANPAL_RECS_RANK", "16"))
+TOP_K = int(os.getenv("PLANPAL_RECS_TOP_K", "10"))
+SCORE_BLOCK = 1 << 22  # score-matrix cells per block (~16 MB of float32)
+VOTE_WEIGHT = 2.0
+
+# same shape as app migration 8; the staging copy is renamed over it
+_RECS_DDL = """
+    CREATE TABLE {name} (
+        subject TEXT NOT NULL,
+        rank INTEGER NOT NULL,
+        item TEXT NOT NULL,
+        label TEXT,
+        score REAL NOT NULL,
+        PRIMARY KEY (subject, rank)
+    ) WITHOUT ROWID
+"""
+
+
+# ---------- interactions ----------
+def _app_interactions(conn):
+    """(user, item, label, weight) from RSVPs in the hot and archive tables."""
+    for events, participants in (("events", "event_participants"),
+                                 ("events_archive", "event_participants_archive")):
+        yield from conn.execute(f"""
+            SELECT 'user:app:' || ep.user_id, 'type:' || e.event_type, e.event_type,
+                   SUM(CASE ep.status WHEN 'attending' THEN 3.0 ELSE 1.0 END)
+            FROM {participants} ep JOIN {events} e ON e.id = ep.event_id
+            WHERE ep.status IN ('attending', 'maybe')
+            GROUP BY 1, 2
+        """)
+        yield from conn.execute(f"""
+            SELECT 'user:app:' || ep.user_id, 'place:' || lower(trim(e.location)), MIN(e.location),
+                   SUM(CASE ep.status WHEN 'attending' THEN 3.0 ELSE 1.0 END)
+            FROM {participants} ep JOIN {events} e ON e.id = ep.event_id
+            WHERE ep.status IN ('attending', 'maybe') AND trim(e.location) != ''
+            GROUP BY 1, 2
+        """)
+
+
+def _api_interactions(conn):
+    """(user, item, label, weight) from votes on plans that have a place."""
+    return conn.execute("""
+        SELECT 'user:api:' || v.user_id,
+               'place:osm:' || CASE WHEN instr(pl.osm_id, '@') THEN substr(pl.osm_id, 1, instr(pl.osm_id, '@') - 1)
+                                    ELSE pl.osm_id END,
+               MIN(pl.name), COUNT(*) * ?
+        FROM votes v JOIN plans p ON p.id = v.plan_id JOIN places pl ON pl.id = p.place_id
+        GROUP BY 1, 2
+    """, (VOTE_WEIGHT,))
+
+
+def _app_groups(conn):
+    return conn.execute("SELECT 'group:app:' || group_id, 'user:app:' || user_id FROM group_members")
+
+
+def _api_groups(conn):
+    return conn.execute("""
+        SELECT DISTINCT 'group:api:' || g.token, 'user:api:' || v.user_id
+        FROM votes v JOIN plans p ON p.id = v.plan_id JOIN groups g ON g.id = p.group_id
+    """)
+
+
+def _has_tables(conn, *names):
+    found = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    return set(names) <= found
+
+
+# ---------- linear algebra ----------
+def _coo_matmul(rows, cols, vals, x, n_out):
+    """A @ x for A given as COO (rows, cols, vals) with n_out rows; x is dense (n_cols, l)."""
+    xt = np.ascontiguousarray(x.T)  # gather from contiguous columns
+    out = np.empty((x.shape[1], n_out), dtype=np.float32)
+    for j in range(x.shape[1]):
+        out[j] = np.bincount(rows, weights=vals * xt[j][cols], minlength=n_out)
+    return out.T
+
+
+def randomized_svd(rows, cols, vals, shape, rank, oversample=10, n_iter=4, seed=0):
+    """Truncated SVD of a COO matrix: (U, s, Vt) with U (m, k), s (k,), Vt (k, n)."""
+    rng = np.random.default_rng(seed)
+    m, n = shape
+    width = min(rank + oversample, m, n)
+    q, _ = np.linalg.qr(_coo_matmul(rows, cols, vals, rng.standard_normal((n, width), dtype=np.float32), m))
+    for _ in range(n_iter):  # power iterations sharpen the spectrum for noisy data
+        z, _ = np.linalg.qr(_coo_matmul(cols, rows, vals, q, n))
+        q, _ = np.linalg.qr(_coo_matmul(rows, cols, vals, z, m))
+    b = _coo_matmul(cols, rows, vals, q, n).T  # Q^T A, (width, n)
+    ub, s, vt = np.linalg.svd(b, full_matrices=False)
+    k = min(rank, len(s))
+    return q @ ub[:, :k], s[:k], vt[:k]
+
+
+def _top_k(scores, k):
+    """Per row: (indices, scores) of the k best finite scores, best first."""
+    k = min(k, scores.shape[1])
+    idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    part = np.take_along_axis(scores, idx, axis=1)
+    order = np.argsort(-part, axis=1, kind="stable")
+    return np.take_along_axis(idx, order, axis=1), np.take_along_axis(part, order, axis=1)
+
+
+# ---------- batch job ----------
+def build(app_db=None, api_db=None, rank=RANK, top_k=TOP_K, n_iter=4, seed=0):
+    """Recompute every user's, group's and the global top-k. Returns run statistics."""
+    t0 = time.perf_counter()
+    app_db = app_db or APP_DB_PATH
+    ensure_schema(app_db)
+    users, items, labels = {}, {}, {}
+    u_idx, i_idx, weights = array("i"), array("i"), array("d")
+
+    def add(interactions):
+        for user, item, label, weight in interactions:
+            u_idx.append(users.setdefault(user, len(users)))
+            i_idx.append(items.setdefault(item, len(items)))
+            weights.append(weight)
+            labels.setdefault(item, label)
+
+    conn = sqlite3.connect(app_db)
+    try:
+        add(_app_interactions(conn))
+        app_groups = _app_groups(conn).fetchall()
+    finally:
+        conn.close()
+    api_groups = []
+    api_db = api_db or API_DB_PATH
+    if os.path.exists(api_db):
+        conn = sqlite3.connect(api_db)
+        try:
+            if _has_tables(conn, "votes", "plans", "places", "groups"):
+                add(_api_interactions(conn))
+                api_groups = _api_groups(conn).fetchall()
+        finally:
+            conn.close()
+    if not weights:
+        return {"users": 0, "items": 0, "interactions": 0, "groups": 0, "seconds": 0.0}
+
+    # consolidate duplicate (user, item) cells (hot + archived rows of the same pair)
+    n_users, n_items = len(users), len(items)
+    keys = np.frombuffer(u_idx, dtype=np.int32).astype(np.int64) * n_items + np.frombuffer(i_idx, dtype=np.int32)
+    cells, inverse = np.unique(keys, return_inverse=True)
+    vals = np.log1p(np.bincount(inverse, weights=np.frombuffer(weights, dtype=np.float64))).astype(np.float32)
+    rows, cols = (cells // n_items).astype(np.int32), (cells % n_items).astype(np.int32)
+
+    u, s, vt = randomized_svd(rows, cols, vals, (n_users, n_items), rank, n_iter=n_iter, seed=seed)
+    user_factors = (u * s).astype(np.float32)
+    vt = vt.astype(np.float32)
+    item_keys = list(items)
+    is_place = np.fromiter((key.startswith("place:") for key in item_keys), dtype=bool, count=n_items)
+
+    group_keys, g_rows, g_cols = {}, array("i"), array("i")
+    for group, user in app_groups + api_groups:
+        if user in users:
+            g_rows.append(group_keys.setdefault(group, len(group_keys)))
+            g_cols.append(users[user])
+
+    def user_rows():
+        block = max(1, SCORE_BLOCK // n_items)
+        subjects = list(users)
+        for start in range(0, n_users, block):
+            end = min(start + block, n_users)
+            scores = user_factors[start:end] @ vt
+            # don't recommend places the user already went to / voted for
+            lo, hi = np.searchsorted(rows, [start, end])
+            r, c = rows[lo:hi] - start, cols[lo:hi]
+            seen = is_place[c]
+            scores[r[seen], c[seen]] = -np.inf
+            yield from _rows_for(subjects[start:end], scores)
+
+    def group_rows():
+        if not g_rows:
+            return
+        n_groups = len(group_keys)
+        member_rows = np.frombuffer(g_rows, dtype=np.int32)
+        member_cols = np.frombuffer(g_cols, dtype=np.int32)
+        group_factors = _coo_matmul(member_rows, member_cols, np.ones(len(member_rows), dtype=np.float32),
+                                    user_factors, n_groups)
+        subjects = list(group_keys)
+        block = max(1, SCORE_BLOCK // n_items)
+        for start in range(0, n_groups, block):
+            yield from _rows_for(subjects[start:start + block], group_factors[start:start + block] @ vt)
+
+    def global_rows():
+        popularity = np.bincount(cols, weights=vals, minlength=n_items)[None, :]
+        yield from _rows_for(["global"], popularity)
+
+    def _rows_for(subjects, scores):
+        idx, best = _top_k(scores, top_k)
+        for subject, item_row, score_row in zip(subjects, idx.tolist(), best.tolist()):
+            for rank_no, (item, score) in enumerate(zip(item_row, score_row)):
+                if score <= 0:  # -inf (already known) or no signal at all
+                    break
+                key = item_keys[item]
+                yield subject, rank_no, key, labels.get(key), round(score, 6)
+
+    written = _swap_in(app_db, (row for part in (user_rows(), group_rows(), global_rows()) for row in part))
+    return {"users": n_users, "items": n_items, "interactions": int(len(vals)), "groups": len(group_keys),
+            "rank": int(len(s)), "rows": written, "seconds": round(time.perf_counter() - t0, 2)}
+
+
+def _swap_in(db_path, rows, chunk=10000):
+    """Load rows into a staging table, then replace `recommendations` in one transaction."""
+    conn = sqlite3.connect(db_path, isolation_level=None, timeout=30)
+    try:
+        conn.execute("DROP TABLE IF EXISTS recommendations_new")
+        conn.execute(_RECS_DDL.format(name="recommendations_new"))
+        written, batch = 0, []
+        conn.execute("BEGIN")
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk:
+                conn.executemany("INSERT INTO recommendations_new VALUES (?, ?, ?, ?, ?)", batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            conn.executemany("INSERT INTO recommendations_new VALUES (?, ?, ?, ?, ?)", batch)
+            written += len(batch)
+        conn.execute("COMMIT")
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DROP TABLE IF EXISTS recommendations")
+        conn.execute("ALTER TABLE recommendations_new RENAME TO recommendations")
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    return written
+
+
+# ---------- request time ----------
+def recommendations(subject, limit=TOP_K, db_path=None):
+    """Precomputed [{"item", "kind", "label", "score"}] for a subject, best first."""
+    db_path = db_path or APP_DB_PATH
+    ensure_schema(db_path)
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT item, label, score FROM recommendations WHERE subject = ? "
+                            "ORDER BY rank LIMIT ?", (subject, limit)).fetchall()
+    return [{"item": item, "kind": item.split(":", 1)[0], "label": label, "score": score}
+            for item, label, score in rows]
+
+
+def for_user(user_id, source="app", limit=TOP_K, db_path=None):
+    """Top items for an app user id (source="app") or API voter id (source="api"); popular items if unknown."""
+    return (recommendations(f"user:{source}:{user_id}", limit, db_path)
+            or recommendations("global", limit, db_path))
+
+
+def for_group(group, source="app", limit=TOP_K, db_path=None):
+    """Top items for an app group id (source="app") or API group token (source="api")."""
+    return (recommendations(f"group:{source}:{group}", limit, db_path)
+            or recommendations("global", limit, db_path))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild precomputed event-type/place recommendations.")
+    parser.add_argument("--db", help="app database (default: backend/backend.db)")
+    parser.add_argument("--api-db", help="API database (default: $PLANPAL_API_DB or ./backend.db)")
+    parser.add_argument("--rank", type=int, default=RANK, help="latent factors")
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    parser.add_argument("--iterations", type=int, default=4, help="power iterations")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    stats = build(args.db, args.api_db, args.rank, args.top_k, args.iterations, args.seed)
+    print(" ".join(f"{k}={v}" for k, v in stats.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+# backend/ttl_cache.py
+"""Small thread-safe LRU cache with per-entry expiry (optionally backed by SQLite)."""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    from backend.migrations import APP_DB_PATH, ensure_schema
+except ImportError:
+    from migrations import APP_DB_PATH, ensure_schema
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, maxsize=256, ttl=900):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, _MISSING)
+        return default if item is _MISSING else item[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteTTLCache(TTLCache):
+    """
+    TTLCache whose entries are also written to the app database's cache_entries
+    table. Misses fall through to SQLite, so warm entries survive restarts and are
+    shared by every process on the same database (Streamlit UI, API, workers).
+    Keys and values must be JSON-serializable (tuples come back as lists).
+    """
+    PURGE_EVERY = 256  # sets between sweeps of expired rows
+
+    def __init__(self, namespace, maxsize=256, ttl=900, db_path=None):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.namespace = namespace
+        self.db_path = db_path or APP_DB_PATH
+        self._sets = 0
+
+    def _connect(self):
+        ensure_schema(self.db_path)
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    @staticmethod
+    def _dbkey(key):
+        return key if isinstance(key, str) else json.dumps(key, separators=(",", ":"), default=str)
+
+    def get(self, key, default=None):
+        value = super().get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+                    (self.namespace, self._dbkey(key), now)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Cache read failed ({self.namespace}): {e}")
+            return default
+        if row is None:
+            return default
+        value = json.loads(row[0])
+        super().set(key, value, ttl=row[1] - now)
+        return value
+
+    def set(self, key, value, ttl=None):
+        super().set(key, value, ttl)
+        now = time.time()
+        self._sets += 1
+        try:
+            with self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                             (self.namespace, self._dbkey(key), json.dumps(value, default=str), now + (ttl or self.ttl)))
+                if self._sets % self.PURGE_EVERY == 0:
+                    conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?", (self.namespace, now))
+        except sqlite3.Error as e:
+            print(f"Cache write failed ({self.namespace}): {e}")
+
+    def pop(self, key, default=None):
+        value = super().pop(key, _MISSING)
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                             (self.namespace, self._dbkey(key)))
+        except sqlite3.Error as e:
+            print(f"Cache delete failed ({self.namespace}): {e}")
+        return default if value is _MISSING else value
+
+    def clear(self):
+        super().clear()
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+        except sqlite3.Error as e:
+            print(f"Cache clear failed ({self.namespace}): {e}")
@@ -0,0 +1,171 @@
+# backend/user_import.py
+"""
+Bulk user import from CSV or NDJSON.
+
+    python -m backend.user_import members.csv
+    python -m backend.user_import members.ndjson --chunk-size 1000 --errors errors.csv
+
+Columns / keys: username, name, password (required), email, mobile, age, gender.
+Rows are streamed, validated with the same rules as the sign-up form, hashed on
+PASSWORD_POOL and inserted with one executemany per chunk (one transaction per
+chunk). Duplicates are left to the UNIQUE constraints: a chunk that trips one is
+retried row by row so only the offending rows are reported; the batch continues.
+"""
+import argparse
+import csv
+import io
+import json
+import sqlite3
+import sys
+from dataclasses import dataclass, field
+
+try:
+    from backend import authentication_new as auth
+    from backend.passwords import PASSWORD_POOL, hash_password
+except ImportError:
+    import authentication_new as auth
+    from passwords import PASSWORD_POOL, hash_password
+
+INSERT_SQL = """
+    INSERT INTO users (username, name, password, email, mobile, age, gender)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+@dataclass
+class ImportReport:
+    inserted: int = 0
+    errors: list = field(default_factory=list)  # (line number, username, message)
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+
+def iter_rows(fh, fmt):
+    """Yield (line number, dict) from a CSV or NDJSON stream without reading it all."""
+    if fmt == "csv":
+        reader = csv.DictReader(fh)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_no, line in enumerate(fh, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, {"__error__": f"invalid JSON: {e.msg}"}
+            continue
+        yield line_no, row if isinstance(row, dict) else {"__error__": "expected a JSON object"}
+
+
+def validate_row(row):
+    """Return (cleaned values or None, list of error messages)."""
+    if "__error__" in row:
+        return None, [row["__error__"]]
+    get = lambda k: (str(row.get(k) or "")).strip()
+    username, name, password = get("username"), get("name"), str(row.get("password") or "")
+    email, mobile, gender = get("email") or None, get("mobile") or None, get("gender").lower() or None
+    errors = []
+    if not username or not name or not password:
+        errors.append("username, name and password are required")
+    if not auth.is_valid_email(email):
+        errors.append("invalid email")
+    if not auth.is_valid_mobile(mobile):
+        errors.append("invalid mobile")
+    if password:
+        errors.extend(e.strip() for e in auth.validate_password(password))
+    age = None
+    if get("age"):
+        try:
+            age = int(get("age"))
+        except ValueError:
+            errors.append("age must be a number")
+    if errors:
+        return None, errors
+    return [username, name, password, email, mobile, age, gender], []
+
+
+def _flush(conn, batch, report, iterations):
+    """Hash and insert one chunk; batch is [(line number, values)]."""
+    hashes = PASSWORD_POOL.map(lambda item: hash_password(item[1][2], iterations), batch)
+    for (_, values), hashed in zip(batch, hashes):
+        values[2] = hashed
+    try:
+        with conn:
+            conn.executemany(INSERT_SQL, [values for _, values in batch])
+        report.inserted += len(batch)
+        return
+    except sqlite3.IntegrityError:
+        pass  # the whole chunk rolled back; redo it row by row to pin down the duplicates
+    with conn:
+        for line_no, values in batch:
+            try:
+                conn.execute(INSERT_SQL, values)
+                report.inserted += 1
+            except sqlite3.IntegrityError as e:
+                report.errors.append((line_no, values[0], auth.integrity_message(e).lstrip("❌ ")))
+
+
+def import_users(fh, fmt="csv", chunk_size=500, iterations=None):
+    """Import users from an open text stream into auth.DB_PATH; returns an ImportReport."""
+    report = ImportReport()
+    conn = auth.get_db()
+    try:
+        batch = []
+        for line_no, row in iter_rows(fh, fmt):
+            values, errors = validate_row(row)
+            if errors:
+                report.errors.append((line_no, row.get("username"), "; ".join(errors)))
+                continue
+            batch.append((line_no, values))
+            if len(batch) >= chunk_size:
+                _flush(conn, batch, report, iterations)
+                batch = []
+        if batch:
+            _flush(conn, batch, report, iterations)
+    finally:
+        conn.close()
+    report.errors.sort(key=lambda e: e[0])
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-import users from CSV or NDJSON.")
+    parser.add_argument("path", help="input file, or - for stdin")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="defaults to the file extension")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--iterations", type=int,
+                        help="PBKDF2 work factor for imported hashes (lower = faster import; "
+                             "upgraded to the current setting at each user's first login)")
+    parser.add_argument("--db", help="database path (default: backend/backend.db)")
+    parser.add_argument("--errors", help="write per-row errors to this CSV file")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        auth.DB_PATH = args.db
+        auth.init_user_db()
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    fh = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="") if args.path == "-" \
+        else open(args.path, encoding="utf-8", newline="")
+    with fh:
+        report = import_users(fh, fmt, args.chunk_size, args.iterations)
+
+    print(f"Imported {report.inserted} users, {report.failed} rows rejected.")
+    if args.errors:
+        with open(args.errors, "w", newline="", encoding="utf-8") as out:
+            writer = csv.writer(out)
+            writer.writerow(["line", "username", "error"])
+            writer.writerows(report.errors)
+    else:
+        for line_no, username, message in report.errors[:50]:
+            print(f"  line {line_no} ({username}): {message}", file=sys.stderr)
+        if report.failed > 50:
+            print(f"  ... {report.failed - 50} more (use --errors FILE)", file=sys.stderr)
+    return 0 if not report.failed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
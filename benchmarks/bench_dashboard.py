@@ -0,0 +1,110 @@
+"""
+Dashboard query latency with years of history: the old "all events" query (OR across
+two outer joins, sorted on the event_datetime text) over every event ever created,
+vs. event_management.get_user_events after backend/archive.py has moved finished
+events out of the hot tables. Caches are cleared before every call.
+
+    python benchmarks/bench_dashboard.py --users 2000 --years 3 --queries 300
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from backend import archive  # noqa: E402
+from backend import event_management as em  # noqa: E402
+from backend import migrations  # noqa: E402
+
+NOW = datetime(2026, 6, 1)
+
+LEGACY_ALL = """
+    SELECT DISTINCT e.* FROM events e
+    LEFT JOIN event_participants ep ON e.id = ep.event_id
+    LEFT JOIN group_members gm ON e.group_id = gm.group_id
+    WHERE e.creator_id = ? OR ep.user_id = ? OR gm.user_id = ?
+    ORDER BY e.event_datetime DESC
+"""
+
+
+def populate(db_path, users, years, per_user_year, seed=3):
+    migrations.migrate(db_path, migrations.APP_MIGRATIONS)
+    rnd = random.Random(seed)
+    groups = max(1, users // 8)
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany("INSERT INTO users (id, username, name, password) VALUES (?, ?, ?, 'x')",
+                         [(u, f"user{u}", f"User {u}") for u in range(1, users + 1)])
+        conn.executemany("INSERT INTO groups (id, name, token, creator_id) VALUES (?, ?, ?, 1)",
+                         [(g, f"Group {g}", f"T{g:06d}") for g in range(1, groups + 1)])
+        conn.executemany("INSERT INTO group_members (group_id, user_id) VALUES (?, ?)",
+                         [(1 + (u - 1) // 8, u) for u in range(1, users + 1)])
+        events, rsvps = [], []
+        n = users * years * per_user_year
+        for i in range(1, n + 1):
+            creator = rnd.randint(1, users)
+            when = NOW - timedelta(days=years * 365) + timedelta(minutes=rnd.randrange((years * 365 + 30) * 1440))
+            events.append((i, creator, f"Event {i}", when, em._epoch(when), "Other", "Delhi", 2.0,
+                           1 + (creator - 1) // 8))
+            rsvps.extend((i, u, "attending") for u in {creator, rnd.randint(1, users), rnd.randint(1, users)})
+        conn.executemany("INSERT INTO events (id, creator_id, title, event_datetime, event_ts, event_type, "
+                         "location, duration, group_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", events)
+        conn.executemany("INSERT INTO event_participants (event_id, user_id, status) VALUES (?, ?, ?)", rsvps)
+    return n
+
+
+def legacy(db_path, user_id):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(LEGACY_ALL, (user_id, user_id, user_id)).fetchall()
+
+
+def hot(user_id, include_history=False):
+    em._cached_user_events.clear()
+    return em.get_user_events(user_id, "all", include_history=include_history)
+
+
+def timed(fn, users):
+    t0 = time.perf_counter()
+    sizes = [len(fn(u)) for u in users]
+    return (time.perf_counter() - t0) / len(users) * 1e3, sum(sizes) / len(sizes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--per-user-year", type=int, default=20, help="events each user creates per year")
+    parser.add_argument("--queries", type=int, default=300)
+    args = parser.parse_args()
+
+    rnd = random.Random(5)
+    sample = [rnd.randint(1, args.users) for _ in range(args.queries)]
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "app.db")
+        t0 = time.perf_counter()
+        n = populate(db_path, args.users, args.years, args.per_user_year)
+        print(f"populated {n} events in {time.perf_counter() - t0:.1f} s")
+        em.DB_PATH = db_path
+
+        before, rows_before = timed(lambda u: legacy(db_path, u), sample)
+        t0 = time.perf_counter()
+        moved = archive.archive_finished_events(db_path, now=em._epoch(NOW))
+        print(f"archived {moved['events']} events / {moved['participants']} RSVPs "
+              f"in {time.perf_counter() - t0:.1f} s")
+        after, rows_after = timed(hot, sample)
+        history, rows_history = timed(lambda u: hot(u, include_history=True), sample)
+
+    print(f"legacy query, all history      {before:>8.2f} ms/user  ({rows_before:.0f} events)")
+    print(f"get_user_events, hot set       {after:>8.2f} ms/user  ({rows_after:.0f} events)"
+          f"   {before / after:.0f}x faster")
+    print(f"get_user_events, with history  {history:>8.2f} ms/user  ({rows_history:.0f} events)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+"Events near me" query latency: event_management.get_events_near (R*Tree bounding box
++ time slab, exact haversine on the candidates) vs. a full scan computing the
+distance for every event, over a synthetic city-scale table.
+
+    python benchmarks/bench_events_near.py --events 300000 --queries 200
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from backend import event_management as em  # noqa: E402
+from backend import migrations  # noqa: E402
+
+CITIES = [(28.6139, 77.2090), (19.0760, 72.8777), (12.9716, 77.5946), (22.5726, 88.3639), (13.0827, 80.2707)]
+T0 = datetime(2025, 1, 1)
+
+
+def populate(db_path, n, seed=7):
+    migrations.migrate(db_path, migrations.APP_MIGRATIONS)
+    rnd = random.Random(seed)
+    rows, geo = [], []
+    for i in range(1, n + 1):
+        clat, clon = rnd.choice(CITIES)
+        lat, lon = clat + rnd.gauss(0, 0.3), clon + rnd.gauss(0, 0.3)
+        when = T0 + timedelta(minutes=rnd.randrange(365 * 24 * 60))
+        t = em._epoch(when)
+        rows.append((i, 1, f"Event {i}", when, t, "Other", "somewhere", 2.0, lat, lon))
+        geo.append((i, lat, lat, lon, lon, t, t))
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany("INSERT INTO events (id, creator_id, title, event_datetime, event_ts, event_type, "
+                         "location, duration, lat, lon) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.executemany("INSERT INTO events_geo VALUES (?, ?, ?, ?, ?, ?, ?)", geo)
+
+
+def full_scan(db_path, lat, lon, radius_km, start, end):
+    with sqlite3.connect(db_path) as conn:
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute("SELECT * FROM events WHERE lat IS NOT NULL AND event_datetime BETWEEN ? AND ?",
+                            (start, end)).fetchall()
+    hits = [r for r in rows if em._haversine_km(lat, lon, r["lat"], r["lon"]) <= radius_km]
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=300000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--radius", type=float, default=5.0, help="km")
+    parser.add_argument("--window-days", type=int, default=30)
+    args = parser.parse_args()
+
+    rnd = random.Random(11)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "events.db")
+        t0 = time.perf_counter()
+        populate(db_path, args.events)
+        print(f"populated {args.events} events in {time.perf_counter() - t0:.1f} s")
+        em.DB_PATH = db_path
+
+        queries = []
+        for _ in range(args.queries):
+            clat, clon = rnd.choice(CITIES)
+            start = T0 + timedelta(days=rnd.randrange(365 - args.window_days))
+            queries.append((clat + rnd.gauss(0, 0.2), clon + rnd.gauss(0, 0.2), start,
+                            start + timedelta(days=args.window_days)))
+
+        t0 = time.perf_counter()
+        found = [len(em.get_events_near(lat, lon, args.radius, s, e, limit=None)) for lat, lon, s, e in queries]
+        indexed = (time.perf_counter() - t0) / len(queries) * 1e3
+
+        scan_queries = queries[:max(1, len(queries) // 20)]
+        t0 = time.perf_counter()
+        for (lat, lon, s, e), n in zip(scan_queries, found):
+            assert len(full_scan(db_path, lat, lon, args.radius, s, e)) == n
+        scan = (time.perf_counter() - t0) / len(scan_queries) * 1e3
+
+    print(f"radius {args.radius} km, {args.window_days}-day window, avg {sum(found) / len(found):.1f} hits/query")
+    print(f"R*Tree get_events_near   {indexed:>9.2f} ms/query")
+    print(f"full scan + haversine    {scan:>9.2f} ms/query   ({scan / indexed:.0f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
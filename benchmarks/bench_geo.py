@@ -0,0 +1,87 @@
+# benchmarks/bench_geo.py
+"""
+Offline benchmark of the geo/suggestion pipeline (compute_centroid -> get_places_nearby)
+and the TMDB helpers, driven by an http_replay cassette.
+
+    # capture once against the live services
+    python benchmarks/bench_geo.py --record --cassette benchmarks/geo.json.gz
+    # replay deterministically (no network), with recorded or fixed latency
+    python benchmarks/bench_geo.py --cassette benchmarks/geo.json.gz --latency 0 --out run.json
+    python benchmarks/bench_geo.py --cassette benchmarks/geo.json.gz --compare run.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+SCENARIOS = [
+    ["Connaught Place", "Saket", "Hauz Khas"],
+    ["Delhi", "Noida", "Gurgaon"],
+    ["Andheri", "Bandra", "Powai"],
+    ["Koramangala", "Indiranagar", "Whitefield"],
+]
+MOODS = ["Chill", "Foodie", "Adventurous"]
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - t0) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cassette", default=os.path.join(PROJECT_ROOT, "benchmarks", "geo.json.gz"))
+    parser.add_argument("--record", action="store_true", help="call live services and record them")
+    parser.add_argument("--latency", default="recorded", help='"recorded", a fixed ms value, or 0')
+    parser.add_argument("--tmdb", action="store_true", help="include the TMDB helpers")
+    parser.add_argument("--out", help="write per-step timings as JSON")
+    parser.add_argument("--compare", help="previous --out file to diff against")
+    args = parser.parse_args()
+
+    os.environ["PLANPAL_HTTP_MODE"] = "record" if args.record else "replay"
+    os.environ["PLANPAL_CASSETTE"] = args.cassette
+    os.environ["PLANPAL_REPLAY_LATENCY"] = args.latency
+
+    from backend import event_management, http_replay
+
+    timings = {}
+    for cities in SCENARIOS:
+        label = "/".join(cities)
+        (lat, lon), ms = timed(event_management.compute_centroid, cities)
+        timings[f"centroid {label}"] = ms
+        for mood in MOODS:
+            places, ms = timed(event_management.get_places_nearby, lat, lon, mood)
+            timings[f"places {label} {mood}"] = ms
+    if args.tmdb:
+        from backend import api_handler
+        with contextlib.redirect_stdout(io.StringIO()):
+            timings["tmdb now_playing"] = timed(api_handler.get_now_playing_movies)[1]
+            timings["tmdb best_rated"] = timed(api_handler.get_best_rated_movies)[1]
+    if args.record:
+        http_replay.get_cassette().save()
+
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    for name, ms in timings.items():
+        line = f"{name:<55}{ms:>10.1f} ms"
+        if name in previous:
+            line += f"   (was {previous[name]:.1f} ms, {ms - previous[name]:+.1f})"
+        print(line)
+    print(f"{'TOTAL':<55}{sum(timings.values()):>10.1f} ms")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(timings, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
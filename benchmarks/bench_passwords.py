@@ -0,0 +1,48 @@
+# benchmarks/bench_passwords.py
+"""
+Login throughput at each password work factor.
+
+    python benchmarks/bench_passwords.py --iterations 100000 310000 600000 --logins 40
+
+For every PBKDF2 iteration count, reports single-thread logins/sec (= per core)
+and the aggregate rate through PASSWORD_POOL with all its workers busy.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import wait
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from backend.passwords import PASSWORD_POOL, check_password, check_password_async, hash_password  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, nargs="+", default=[100_000, 310_000, 600_000])
+    parser.add_argument("--logins", type=int, default=40, help="logins per measurement")
+    args = parser.parse_args()
+
+    workers = PASSWORD_POOL._max_workers
+    print(f"cpu_count={os.cpu_count()} pool_workers={workers}")
+    print(f"{'iterations':>12}{'ms/login':>10}{'logins/s/core':>15}{'pool logins/s':>15}{'scaling':>9}")
+    for iterations in args.iterations:
+        stored = hash_password("Secr3t!pass", iterations)
+
+        t0 = time.perf_counter()
+        for _ in range(args.logins):
+            check_password("Secr3t!pass", stored, iterations)
+        single = args.logins / (time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        wait([check_password_async("Secr3t!pass", stored, iterations) for _ in range(args.logins * workers)])
+        pooled = args.logins * workers / (time.perf_counter() - t0)
+
+        print(f"{iterations:>12}{1000 / single:>10.1f}{single:>15.1f}{pooled:>15.1f}{pooled / single:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Plan ingestion throughput: one POST /groups/{token}/plans per group (row-by-row
+inserts, one commit each) vs. a single POST /plans/bulk (one token lookup, chunked
+executemany, one transaction). Calls the endpoint functions directly, so HTTP
+overhead per request is left out and the gap is a lower bound.
+
+    python benchmarks/bench_plan_ingest.py --groups 2000 --plans 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def make_plans(api, n, g):
+    return [api.PlanItem(title=f"{i}. Curated place {g}-{i}",
+                         place={"name": f"Place {g}-{i}", "address": "Somewhere", "lat": 28.6 + i / 1000, "lon": 77.2})
+            for i in range(1, n + 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", type=int, default=2000)
+    parser.add_argument("--plans", type=int, default=5, help="plans per group")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["PLANPAL_API_DB"] = os.path.join(tmp, "ingest.db")
+        from backend import api  # noqa: E402  (reads PLANPAL_API_DB at import)
+
+        tokens = [api.create_group(api.CreateGroup(name=f"g{i}"))["token"] for i in range(args.groups)]
+        batches = [(t, make_plans(api, args.plans, g)) for g, t in enumerate(tokens)]
+        total = args.groups * args.plans
+
+        t0 = time.perf_counter()
+        for token, plans in batches:
+            api.add_plans(token, api.CreatePlans(plans=plans))
+        per_group = time.perf_counter() - t0
+
+        payload = api.BulkPlans(groups=[api.GroupPlans(token=t, plans=p) for t, p in batches])
+        t0 = time.perf_counter()
+        result = api.bulk_add_plans(payload)
+        bulk = time.perf_counter() - t0
+        assert result["inserted"] == total and not result["missing"]
+
+    print(f"{args.groups} groups x {args.plans} plans = {total} rows")
+    print(f"per-group endpoint   {per_group:8.3f} s   {total / per_group:>10.0f} rows/s")
+    print(f"bulk endpoint        {bulk:8.3f} s   {total / bulk:>10.0f} rows/s")
+    print(f"speedup              {per_group / bulk:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
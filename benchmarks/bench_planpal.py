@@ -0,0 +1,95 @@
+# benchmarks/bench_planpal.py
+"""
+Throughput / tail-latency benchmark for PlanPal.chat_response and
+PlanPal.get_event_suggestions, run against the offline fake_genai client.
+
+    python benchmarks/bench_planpal.py --requests 200 --concurrency 1 8 32 \
+        --latency-ms 800 --sigma 0.6 --malformed-rate 0.05 --seed 42
+
+Each (method, concurrency) pair gets a fresh PlanPal and a fresh seeded stub, so
+runs are reproducible. Suggestion requests use distinct locations unless
+--cache-hit-ratio is set, so the suggestion cache doesn't hide model latency.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from backend import planpal_bot  # noqa: E402
+from backend.fake_genai import FakeClient  # noqa: E402
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def run_one(method, n, concurrency, args):
+    planpal_bot.SUGGESTION_CACHE_ENABLED = True
+    planpal_bot._SUGGESTION_CACHE.clear()
+    p = planpal_bot.PlanPal(deadline_s=args.deadline, hedge_after_s=args.hedge_after)
+    p.client = FakeClient(latency_ms=args.latency_ms, latency_sigma=args.sigma,
+                          malformed_rate=args.malformed_rate, error_rate=args.error_rate,
+                          seed=args.seed)
+    hot = max(1, int(n * (1 - args.cache_hit_ratio)))
+
+    def task(i):
+        t0 = time.perf_counter()
+        if method == "chat_response":
+            p.chat_response(f"Plan an evening for friends #{i}")
+        else:
+            p.get_event_suggestions(location=f"City {i % hot}", group_size=4, mood="Chill")
+        return time.perf_counter() - t0
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(task, range(n)))
+    wall = time.perf_counter() - start
+    hedge = p.hedge_report()
+    return {
+        "method": method,
+        "concurrency": concurrency,
+        "rps": n / wall,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "max": latencies[-1],
+        "hedged": hedge["hedged"],
+        "timeouts": hedge["timeouts"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--method", choices=["chat_response", "get_event_suggestions", "both"], default="both")
+    parser.add_argument("--latency-ms", type=float, default=800.0)
+    parser.add_argument("--sigma", type=float, default=0.5)
+    parser.add_argument("--malformed-rate", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--cache-hit-ratio", type=float, default=0.0)
+    parser.add_argument("--deadline", type=float, default=planpal_bot.DEFAULT_DEADLINE_S)
+    parser.add_argument("--hedge-after", type=float, default=4.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    methods = ["chat_response", "get_event_suggestions"] if args.method == "both" else [args.method]
+    print(f"{'method':<22}{'conc':>5}{'req/s':>9}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}{'hedged':>8}{'t/o':>5}")
+    for method in methods:
+        for concurrency in args.concurrency:
+            r = run_one(method, args.requests, concurrency, args)
+            print(f"{r['method']:<22}{r['concurrency']:>5}{r['rps']:>9.1f}{r['p50']:>8.3f}{r['p95']:>8.3f}"
+                  f"{r['p99']:>8.3f}{r['max']:>8.3f}{r['hedged']:>8}{r['timeouts']:>5}")
+    print(f"\nmodel worker pool: {planpal_bot._MODEL_POOL._max_workers} threads (PLANPAL_MODEL_WORKERS)")
+
+
+if __name__ == "__main__":
+    main()
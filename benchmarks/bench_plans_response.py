@@ -0,0 +1,110 @@
+"""
+GET /groups/{token}/plans body cost: the old path (a COUNT query per plan, json.loads
+of every place_json, stdlib json encoding of the dicts) vs. the new one (one LEFT JOIN
+... GROUP BY, place JSON built by SQLite from the places table and spliced in
+undecoded, orjson for the rest), over plan count and place payload size. Runs
+against throwaway SQLite files; no server needed.
+
+    python benchmarks/bench_plans_response.py --runs 50
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from backend import fastjson  # noqa: E402
+from backend.migrations import API_MIGRATIONS, migrate  # noqa: E402
+from backend.places import PLACE_JSON_SQL, upsert_places  # noqa: E402
+
+
+def make_place(i, size):
+    place = {"id": f"osm{i}", "name": f"Place {i}", "address": f"{i} Example Road, Delhi",
+             "lat": 28.6 + i / 1e4, "lon": 77.2 - i / 1e4}
+    # pad with tag-like attributes up to roughly `size` bytes
+    n = 0
+    while len(json.dumps(place)) < size:
+        place[f"tag_{n}"] = "x" * 24
+        n += 1
+    return place
+
+
+def build_db(db_path, plans, size):
+    migrate(db_path, API_MIGRATIONS)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO groups (token, name) VALUES ('bench', 'bench')")
+    places = [make_place(i, size) for i in range(plans)]
+    # each row keeps both encodings: place_json for the legacy path, place_id for the new one
+    conn.executemany("INSERT INTO plans (group_id, title, place_json, place_id) VALUES (1, ?, ?, ?)",
+                     [(f"{i}. Place {i}", json.dumps(p), place_id)
+                      for i, (p, place_id) in enumerate(zip(places, upsert_places(conn, places)))])
+    conn.executemany("INSERT INTO votes (plan_id, user_id) VALUES (?, ?)",
+                     [(p, f"u{u}") for p in range(1, plans + 1) for u in range(p % 5)])
+    return conn
+
+
+def legacy_body(conn):
+    c = conn.cursor()
+    c.execute("SELECT id, title, place_json FROM plans WHERE group_id=?", (1,))
+    plans = []
+    for plan_id, title, place_json in c.fetchall():
+        c.execute("SELECT COUNT(*) FROM votes WHERE plan_id=?", (plan_id,))
+        plans.append({"id": plan_id, "title": title,
+                      "place": json.loads(place_json) if place_json else {},
+                      "votes": c.fetchone()[0]})
+    return json.dumps({"plans": plans}).encode("utf-8")
+
+
+def spliced_body(conn):
+    c = conn.cursor()
+    c.execute(f"""
+        SELECT p.id, p.title,
+               CASE WHEN p.place_id IS NULL THEN p.place_json ELSE {PLACE_JSON_SQL} END,
+               COUNT(v.id)
+        FROM plans p
+        LEFT JOIN places pl ON pl.id = p.place_id
+        LEFT JOIN votes v ON v.plan_id = p.id
+        WHERE p.group_id=?
+        GROUP BY p.id
+        ORDER BY p.id
+    """, (1,))
+    return fastjson.plans_body(c.fetchall())
+
+
+def per_call_ms(fn, conn, runs):
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        fn(conn)
+    return (time.perf_counter() - t0) / runs * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--plans", type=int, nargs="+", default=[3, 30, 300, 3000])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 2000, 20000], help="place JSON bytes")
+    args = parser.parse_args()
+
+    print(f"encoder: {'orjson' if fastjson.orjson else 'stdlib json'}")
+    print(f"{'plans':>6} {'place B':>8} {'body KB':>8} {'legacy ms':>10} {'spliced ms':>11} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            for plans in args.plans:
+                conn = build_db(os.path.join(tmp, f"plans_{plans}_{size}.db"), plans, size)
+                # SQLite prints REALs with 15 significant digits, so compare coordinates rounded
+                as_rounded = lambda body: json.loads(body, parse_float=lambda x: round(float(x), 9))  # noqa: E731
+                assert as_rounded(legacy_body(conn)) == as_rounded(spliced_body(conn))
+                legacy = per_call_ms(legacy_body, conn, args.runs)
+                spliced = per_call_ms(spliced_body, conn, args.runs)
+                kb = len(spliced_body(conn)) / 1024
+                print(f"{plans:>6} {size:>8} {kb:>8.1f} {legacy:>10.3f} {spliced:>11.3f} {legacy / spliced:>7.1f}x")
+                conn.close()
+
+if __name__ == "__main__":
+    main()
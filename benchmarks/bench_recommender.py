@@ -0,0 +1,78 @@
+"""
+Recommender batch job at scale: recommender.build over a synthetic app database with
+taste clusters (each user mostly RSVPs to a few event types / places), reporting the
+build time and the share of users whose top recommendation is in their own cluster.
+
+    python benchmarks/bench_recommender.py --users 100000 --rsvps-per-user 20
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from backend import migrations  # noqa: E402
+from backend import recommender  # noqa: E402
+
+TYPES = ["Restaurant", "Movie", "Sports", "Shopping", "Outdoor Activity", "Indoor Activity", "Other"]
+
+
+def populate(db_path, users, per_user, places, clusters, seed=1):
+    migrations.migrate(db_path, migrations.APP_MIGRATIONS)
+    rnd = random.Random(seed)
+    # event i: type and place both drawn from cluster i % clusters
+    n_events = places * 4
+    events = []
+    for i in range(1, n_events + 1):
+        k = i % clusters
+        events.append((i, 1, f"Event {i}", "2026-01-01 10:00:00", TYPES[k % len(TYPES)],
+                       f"Place {k}-{rnd.randrange(places // clusters)}", 2.0))
+    by_cluster = [[e[0] for e in events if e[0] % clusters == k] for k in range(clusters)]
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany("INSERT INTO events (id, creator_id, title, event_datetime, event_type, location, duration) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?)", events)
+        rows = set()
+        for u in range(1, users + 1):
+            own = by_cluster[u % clusters]
+            for _ in range(per_user):
+                pool = own if rnd.random() < 0.8 else by_cluster[rnd.randrange(clusters)]
+                rows.add((rnd.choice(pool), u))
+        conn.executemany("INSERT INTO event_participants (event_id, user_id, status) VALUES (?, ?, 'attending')",
+                         rows)
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--rsvps-per-user", type=int, default=20)
+    parser.add_argument("--places", type=int, default=2000)
+    parser.add_argument("--clusters", type=int, default=5)
+    parser.add_argument("--rank", type=int, default=recommender.RANK)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "app.db")
+        t0 = time.perf_counter()
+        n = populate(db_path, args.users, args.rsvps_per_user, args.places, args.clusters)
+        print(f"populated {n} RSVPs in {time.perf_counter() - t0:.1f} s")
+        stats = recommender.build(db_path, os.path.join(tmp, "missing-api.db"), rank=args.rank)
+        print("build: " + " ".join(f"{k}={v}" for k, v in stats.items()))
+
+        sample = random.Random(2).sample(range(1, args.users + 1), min(500, args.users))
+        t0 = time.perf_counter()
+        tops = [recommender.for_user(u, limit=1, db_path=db_path) for u in sample]
+        lookup = (time.perf_counter() - t0) / len(sample) * 1e3
+        hits = sum(1 for u, top in zip(sample, tops)
+                   if top and top[0]["label"] == TYPES[(u % args.clusters) % len(TYPES)])
+    print(f"lookup {lookup:.3f} ms/user; top item is the user's own cluster type for {hits / len(sample):.0%}")
+
+
+if __name__ == "__main__":
+    main()
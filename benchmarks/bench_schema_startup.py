@@ -0,0 +1,133 @@
+# benchmarks/bench_schema_startup.py
+"""
+Startup cost of schema setup: the old per-import/per-rerun CREATE TABLE IF NOT EXISTS
+path vs. migrations.ensure_schema (first check per process, then memoized).
+
+    python benchmarks/bench_schema_startup.py --runs 200
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from backend import migrations  # noqa: E402
+
+# the DDL init_user_db / init_events_db / init_groups_db used to issue, frozen here so
+# later ALTER TABLE migrations don't leak into the baseline
+LEGACY_USERS = """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        name TEXT NOT NULL,
+        password TEXT NOT NULL,
+        email TEXT UNIQUE,
+        mobile TEXT UNIQUE,
+        age INTEGER,
+        gender TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+LEGACY_EVENTS = """
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        creator_id INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        event_datetime TIMESTAMP NOT NULL,
+        event_type TEXT NOT NULL,
+        location TEXT NOT NULL,
+        duration REAL NOT NULL,
+        description TEXT,
+        cost_estimate REAL,
+        max_participants INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        group_id INTEGER,
+        FOREIGN KEY (creator_id) REFERENCES users (id),
+        FOREIGN KEY (group_id) REFERENCES groups (id)
+    );
+    CREATE TABLE IF NOT EXISTS event_participants (
+        event_id INTEGER,
+        user_id INTEGER,
+        status TEXT CHECK(status IN ('attending', 'maybe', 'not_attending')),
+        joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (event_id, user_id),
+        FOREIGN KEY (event_id) REFERENCES events (id),
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    );
+"""
+LEGACY_GROUPS = """
+    CREATE TABLE IF NOT EXISTS groups (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        token TEXT UNIQUE NOT NULL,
+        creator_id INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (creator_id) REFERENCES users (id)
+    );
+    CREATE TABLE IF NOT EXISTS group_members (
+        group_id INTEGER,
+        user_id INTEGER,
+        joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (group_id, user_id),
+        FOREIGN KEY (group_id) REFERENCES groups (id),
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    );
+"""
+
+
+def legacy_init(db_path, scripts):
+    """What init_user_db/init_events_db/init_groups_db/api.init_db used to do: reconnect and re-issue DDL."""
+    for script in scripts:
+        with sqlite3.connect(db_path) as conn:
+            for statement in migrations._split_sql(script):
+                conn.execute(statement)
+            conn.commit()
+
+
+def per_call_us(fn, runs):
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - t0) / runs * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        t0 = time.perf_counter()
+        migrations.migrate(db_path, migrations.APP_MIGRATIONS)
+        first = (time.perf_counter() - t0) * 1e3
+
+        # the old code ran init_events_db twice plus init_user_db/init_groups_db on import,
+        # and the Streamlit pages re-ran init_user_db + init_events_db on every rerun
+        import_scripts = [LEGACY_USERS, LEGACY_EVENTS, LEGACY_GROUPS, LEGACY_EVENTS]
+        rerun_scripts = [LEGACY_USERS, LEGACY_EVENTS]
+        legacy_import = per_call_us(lambda: legacy_init(db_path, import_scripts), args.runs)
+        legacy_rerun = per_call_us(lambda: legacy_init(db_path, rerun_scripts), args.runs)
+
+        def cold_check():
+            migrations._checked.clear()
+            migrations.ensure_schema(db_path, migrations.APP_MIGRATIONS)
+        cold = per_call_us(cold_check, args.runs)
+        warm = per_call_us(lambda: migrations.ensure_schema(db_path, migrations.APP_MIGRATIONS), args.runs * 100)
+
+    print(f"initial migration (deploy-time, once)      {first:>10.1f} ms")
+    print(f"legacy DDL on import                       {legacy_import:>10.1f} us")
+    print(f"legacy DDL per Streamlit rerun             {legacy_rerun:>10.1f} us")
+    print(f"ensure_schema first check in a process     {cold:>10.1f} us")
+    print(f"ensure_schema afterwards (memoized)        {warm:>10.3f} us")
+    print(f"saved per process start                    {legacy_import - cold:>10.1f} us")
+    print(f"saved per rerun                            {legacy_rerun - warm:>10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_startup.py
+"""
+Cold-start benchmark for the Streamlit entry points.
+
+    python benchmarks/bench_startup.py                 # all entry points, 3 cold starts each
+    python benchmarks/bench_startup.py --runs 5 --entry temp_app.py
+
+Each cold start is a fresh interpreter running the page once with Streamlit's
+AppTest harness (no browser), then once more to get a warm rerun. Reports:
+  first render  = imports + first script run
+  rerun         = script run with modules already imported
+  import (est.) = first render - rerun
+and which heavy dependencies (geopy, requests, google.genai) were loaded just to
+show the first page, so lazy-import regressions show up.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ENTRY_POINTS = ["temp_app.py", "main.py", "app.py", "frontend.py"]
+HEAVY = ["geopy", "requests", "google.genai"]
+
+_CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+t2 = time.perf_counter()
+at.run()
+t3 = time.perf_counter()
+print(json.dumps({
+    "streamlit_import": t1 - t0,
+    "first_render": t2 - t1,
+    "rerun": t3 - t2,
+    "heavy": [m for m in sys.argv[2:] if m in sys.modules],
+    "modules": len(sys.modules),
+    "errors": [str(e.value)[:120] for e in at.exception],
+}))
+"""
+
+
+def cold_start(path):
+    env = dict(os.environ, PLANPAL_HTTP_MODE=os.environ.get("PLANPAL_HTTP_MODE", "replay"))
+    out = subprocess.run([sys.executable, "-c", _CHILD, path, *HEAVY], cwd=os.path.dirname(path),
+                         env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--entry", nargs="+", default=ENTRY_POINTS)
+    args = parser.parse_args()
+
+    print(f"{'entry point':<16}{'first render':>14}{'rerun':>10}{'import est.':>13}{'modules':>9}  heavy deps loaded")
+    for name in args.entry:
+        runs = [cold_start(os.path.join(PROJECT_ROOT, "streamlit_app", name)) for _ in range(args.runs)]
+        first = statistics.median(r["first_render"] for r in runs) * 1000
+        rerun = statistics.median(r["rerun"] for r in runs) * 1000
+        print(f"{name:<16}{first:>11.0f} ms{rerun:>7.0f} ms{first - rerun:>10.0f} ms{runs[-1]['modules']:>9}  "
+              f"{', '.join(runs[-1]['heavy']) or '-'}")
+        for err in runs[-1]["errors"]:
+            print(f"{'':<16}! {err}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Vote timeline / momentum latency: analytics.timeline and analytics.momentum over the
+rollup tables vs. the same answers computed from the raw `votes` table
+(GROUP BY strftime over a join with plans), for groups with a long voting history.
+
+    python benchmarks/bench_vote_analytics.py --groups 200 --votes 500000 --queries 200
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from backend import analytics  # noqa: E402
+from backend import migrations  # noqa: E402
+
+NOW = datetime(2026, 6, 1, tzinfo=timezone.utc).timestamp()
+PLANS_PER_GROUP = 6
+
+
+def populate(db_path, groups, votes, days, seed=9):
+    migrations.migrate(db_path, migrations.API_MIGRATIONS[:4])  # before the rollups exist
+    rnd = random.Random(seed)
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany("INSERT INTO groups (id, token, name) VALUES (?, ?, ?)",
+                         [(g, f"t{g}", f"Group {g}") for g in range(1, groups + 1)])
+        conn.executemany("INSERT INTO plans (id, group_id, title) VALUES (?, ?, ?)",
+                         [(p, 1 + (p - 1) // PLANS_PER_GROUP, f"Plan {p}")
+                          for p in range(1, groups * PLANS_PER_GROUP + 1)])
+        rows = []
+        for i in range(votes):
+            at = NOW - rnd.random() * days * 86400
+            rows.append((rnd.randint(1, groups * PLANS_PER_GROUP), f"user{i}",
+                         datetime.fromtimestamp(at, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")))
+        conn.executemany("INSERT INTO votes (plan_id, user_id, created_at) VALUES (?, ?, ?)", rows)
+    migrations.migrate(db_path, migrations.API_MIGRATIONS)  # backfills the rollups
+
+
+def raw_timeline(c, group_id):
+    c.execute("SELECT CAST(strftime('%s', v.created_at) AS INTEGER) / 3600 * 3600 AS bucket, v.plan_id, COUNT(*) "
+              "FROM votes v JOIN plans p ON p.id = v.plan_id WHERE p.group_id = ? "
+              "GROUP BY bucket, v.plan_id ORDER BY bucket", (group_id,))
+    return c.fetchall()
+
+
+def raw_momentum(c, group_id, window_s):
+    c.execute("SELECT v.plan_id, COUNT(*) FROM votes v JOIN plans p ON p.id = v.plan_id "
+              "WHERE p.group_id = ? AND v.created_at >= ? GROUP BY v.plan_id",
+              (group_id, datetime.fromtimestamp(NOW - window_s, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")))
+    return Counter(dict(c.fetchall()))
+
+
+def timed(fn, groups):
+    t0 = time.perf_counter()
+    for g in groups:
+        fn(g)
+    return (time.perf_counter() - t0) / len(groups) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", type=int, default=200)
+    parser.add_argument("--votes", type=int, default=500000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rnd = random.Random(4)
+    sample = [rnd.randint(1, args.groups) for _ in range(args.queries)]
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "api.db")
+        t0 = time.perf_counter()
+        populate(db_path, args.groups, args.votes, args.days)
+        print(f"populated {args.votes} votes + rollups in {time.perf_counter() - t0:.1f} s")
+        conn = sqlite3.connect(db_path)
+        c = conn.cursor()
+
+        # same totals either way
+        g = sample[0]
+        rolled = analytics.timeline(c, g, "hour")
+        assert sum(add for _, add, _ in rolled["group"]) == sum(n for _, _, n in raw_timeline(c, g))
+
+        raw_t = timed(lambda g: raw_timeline(c, g), sample)
+        roll_t = timed(lambda g: analytics.timeline(c, g, "hour"), sample)
+        raw_m = timed(lambda g: raw_momentum(c, g, 86400), sample)
+        roll_m = timed(lambda g: analytics.momentum(c, g, 86400, now=NOW), sample)
+        conn.close()
+
+    print(f"hourly timeline  raw votes {raw_t:>8.2f} ms   rollups {roll_t:>8.2f} ms   ({raw_t / roll_t:.0f}x)")
+    print(f"24h momentum     raw votes {raw_m:>8.2f} ms   rollups {roll_m:>8.2f} ms   ({raw_m / roll_m:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
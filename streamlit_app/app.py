@@ -4,10 +4,8 @@ import os
 import sys
 import time
 import uuid
-import requests
 
 import streamlit as st
-from geopy.geocoders import Nominatim
 
 # ---------------- page config ----------------
 st.set_page_config(
@@ -20,16 +18,25 @@ st.set_page_config(
 # Use env var BACKEND_URL if present, otherwise a placeholder
 BACKEND_URL = os.environ.get("BACKEND_URL", "http://localhost:8000")
 
-# Add the backend directory to Python path (if your repo has a backend folder)
-backend_path = os.path.join(os.path.dirname(__file__), "..", "backend")
-if os.path.exists(backend_path) and backend_path not in sys.path:
-    sys.path.append(backend_path)
+# Import backend modules as the `backend` package only: a second import path
+# (backend/ itself on sys.path) would load every module twice, each copy with its
+# own job pool and Nominatim throttle.
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# record/replay-aware HTTP (PLANPAL_HTTP_MODE=record|replay for offline runs)
+from backend import http_replay, jobs
+from backend.lazy_imports import lazy_import
+
+# heavy deps load on first use, not on every cold start / login page
+requests = lazy_import("requests")  # only needed for its exception types here
 
 # ---------------- optional imports (safe) ----------------
 # If you have these modules in your project, they'll be imported.
 # Otherwise we continue with useful fallbacks and friendly warnings.
 try:
-    from authentication_new import (
+    from backend.authentication_new import (
         init_user_db,
         login_page,
         register_page,
@@ -41,16 +48,19 @@ except Exception:
     st.warning("Optional: `authentication_new` module not found. Authentication pages disabled.")
 
 try:
-    from event_management import (
+    from backend.event_management import (
         init_events_db,
         create_event_form,
         save_event,
         get_user_events,
         display_event,
         update_participation_status,
+        compute_centroid,
+        get_places_nearby,
     )
 except Exception:
     init_events_db = create_event_form = save_event = get_user_events = display_event = update_participation_status = None
+    compute_centroid = get_places_nearby = None
     st.warning("Optional: `event_management` module not found. Event management disabled.")
 
 try:
@@ -78,62 +88,6 @@ if 'group_token' not in st.session_state:
 if 'plans_local' not in st.session_state:
     st.session_state.plans_local = []  # local representation of current plans
 
-# ---------------- geolocator ----------------
-geolocator = Nominatim(user_agent="plan_my_outings_app", timeout=10)
-
-def geocode_city(city: str):
-    """Return (lat, lon) for a city or (None, None) on failure."""
-    try:
-        loc = geolocator.geocode(city)
-        if loc:
-            return float(loc.latitude), float(loc.longitude)
-    except Exception:
-        return None, None
-    return None, None
-
-def compute_centroid(members_csv: str):
-    """Given comma-separated city names, compute centroid lat/lon."""
-    cities = [c.strip() for c in members_csv.split(",") if c.strip()]
-    coords = []
-    for c in cities:
-        latlon = geocode_city(c)
-        if latlon[0] is not None:
-            coords.append(latlon)
-    if not coords:
-        return None, None
-    lat = sum(p[0] for p in coords) / len(coords)
-    lon = sum(p[1] for p in coords) / len(coords)
-    return lat, lon
-
-def places_near_viewbox(lat: float, lon: float, query: str = "restaurant", limit: int = 6, box_km: float = 6):
-    """Query Nominatim for places within a square viewbox around centroid."""
-    try:
-        deg = box_km / 111.0  # approx degrees per km
-        min_lat = lat - deg
-        max_lat = lat + deg
-        min_lon = lon - deg
-        max_lon = lon + deg
-        viewbox = f"{min_lon},{max_lat},{max_lon},{min_lat}"
-        url = "https://nominatim.openstreetmap.org/search"
-        params = {"q": query, "format": "json", "limit": limit, "viewbox": viewbox, "bounded": 1}
-        r = requests.get(url, params=params, headers={"User-Agent": "plan-my-outings-demo"}, timeout=8)
-        arr = r.json() if r.status_code == 200 else []
-        results = []
-        for a in arr:
-            display_name = a.get("display_name", "")
-            name = display_name.split(",")[0] if display_name else a.get("type", "place")
-            results.append({
-                "id": a.get("osm_id") or str(uuid.uuid4().hex),  # ensure some id
-                "name": name,
-                "address": display_name,
-                "lat": float(a.get("lat", 0)),
-                "lon": float(a.get("lon", 0))
-            })
-        return results
-    except Exception as e:
-        st.error(f"Places lookup failed: {e}")
-        return []
-
 # ---------------- sidebar navigation ----------------
 def sidebar_nav():
     st.sidebar.title("Navigation")
@@ -171,67 +125,18 @@ def run_core_ui():
     col1, col2 = st.columns(2)
     with col1:
         if st.button("Find Suggestions & Publish Plans"):
-            # compute centroid and places
-            latlon = compute_centroid(members)
-            if not latlon or latlon == (None, None):
-                st.error("Could not compute centroid. Try simpler city names or Load Demo Data.")
-            else:
-                lat, lon = latlon
-                qmap = {"Chill":"cafe","Foodie":"restaurant","Adventurous":"park"}
-                query = qmap.get(mood, "restaurant")
-                candidates = places_near_viewbox(lat, lon, query=query, limit=8, box_km=6)
-                # pick first 3 (or fallback demo)
-                if len(candidates) < 3:
-                    candidates = [
-                        {"id": str(uuid.uuid4().hex), "name":"Demo Place A","address":"Demo address A","lat":lat+0.001,"lon":lon+0.001},
-                        {"id": str(uuid.uuid4().hex), "name":"Demo Place B","address":"Demo address B","lat":lat-0.001,"lon":lon+0.001},
-                        {"id": str(uuid.uuid4().hex), "name":"Demo Place C","address":"Demo address C","lat":lat+0.001,"lon":lon-0.001},
-                    ]
-                chosen = candidates[:3]
-
-                # 1) create group on backend (if backend available)
-                token = None
-                try:
-                    resp = requests.post(f"{BACKEND_URL}/groups", json={"name": group_name}, timeout=8)
-                    resp.raise_for_status()
-                    token = resp.json().get("token")
-                    if not token:
-                        # fallback generate a simple token if backend didn't provide one
-                        token = uuid.uuid4().hex[:8]
-                    st.session_state.group_token = token
-                    st.success(f"Group created. Token: `{token}`")
-                    st.text_input("Group token (copy to share)", value=token, key="group_token_input")
-                except requests.exceptions.RequestException as e:
-                    # backend not reachable -> create a client-only token
-                    st.warning(f"Could not contact backend to create group. Working locally. ({e})")
-                    token = uuid.uuid4().hex[:8]
-                    st.session_state.group_token = token
-                    st.text_input("Group token (local)", value=token, key="local_group_token_input")
-
-                # 2) publish plans to backend (if available), otherwise store locally
-                plans_payload = {"plans": []}
-                for i, p in enumerate(chosen, start=1):
-                    title = f"{i}. {p.get('name')}"
-                    plans_payload['plans'].append({"title": title, "place": p, "votes": 0, "id": p.get("id", str(uuid.uuid4().hex))})
-
-                try:
-                    # attempt to publish; if backend fails we'll fallback
-                    r2 = requests.post(f"{BACKEND_URL}/groups/{token}/plans", json=plans_payload, timeout=8)
-                    r2.raise_for_status()
-                    # fetch full plans (with ids) from backend
-                    time.sleep(0.3)
-                    resp = requests.get(f"{BACKEND_URL}/groups/{token}/plans", timeout=8)
-                    resp.raise_for_status()
-                    st.session_state.plans_local = resp.json().get("plans", plans_payload["plans"])
-                except requests.exceptions.RequestException:
-                    st.warning("Failed to publish plans to backend — using a local copy.")
-                    st.session_state.plans_local = plans_payload["plans"]
-
-                st.success("Plans prepared. Use the voting UI below and share the group token with friends.")
+            # geocoding, place search and publishing run on the job pool; the
+            # publish_status fragment polls the job and applies the result
+            # dedupe=False: every click creates its own group (and token)
+            st.session_state.publish_job = jobs.submit(
+                "publish_plans", {"group_name": group_name, "members": members, "mood": mood}, dedupe=False)
+            st.session_state.my_votes = set()
+        publish_status()
 
     with col2:
         if st.button("Load Demo Data"):
             st.session_state.group_token = None
+            st.session_state.my_votes = set()
             # demo plans
             demo_lat, demo_lon = 28.6139, 77.2090  # New Delhi center as example
             st.session_state.plans_local = [
@@ -240,93 +145,174 @@ def run_core_ui():
                 {"id": "demo_c", "title": "3. Demo Park", "place": {"address": "Hauz Khas, Delhi"}, "votes": 1},
             ]
             st.success("Loaded demo data.")
-            st.experimental_rerun()
+            st.rerun()
 
     # ---------- Voting UI ----------
     st.divider()
     st.subheader("Vote for a plan")
+    voting_panel()
+
+# ---------------- publishing (background job) ----------------
+@jobs.register("publish_plans")
+def _publish_plans_job(params, context=None):
+    """Centroid -> nearby places -> POST /groups/with-plans. Runs on jobs.JOB_POOL."""
+    if compute_centroid is None:
+        return {"error": "Event management module not available; use Load Demo Data."}
+    # event_management's lookups are cached and share the process-wide Nominatim throttle
+    cities = [c.strip() for c in params["members"].split(",") if c.strip()]
+    latlon = compute_centroid(cities)
+    if not latlon or latlon == (None, None):
+        return {"error": "Could not compute centroid. Try simpler city names or Load Demo Data."}
+    lat, lon = latlon
+    try:
+        candidates = get_places_nearby(lat, lon, params["mood"])
+    except requests.exceptions.RequestException:
+        candidates = []
+    # pick first 3 (or fallback demo)
+    if len(candidates) < 3:
+        candidates = [
+            {"id": str(uuid.uuid4().hex), "name":"Demo Place A","address":"Demo address A","lat":lat+0.001,"lon":lon+0.001},
+            {"id": str(uuid.uuid4().hex), "name":"Demo Place B","address":"Demo address B","lat":lat-0.001,"lon":lon+0.001},
+            {"id": str(uuid.uuid4().hex), "name":"Demo Place C","address":"Demo address C","lat":lat+0.001,"lon":lon-0.001},
+        ]
+    chosen = candidates[:3]
+
+    plans_payload = {"name": params["group_name"], "plans": []}
+    for i, p in enumerate(chosen, start=1):
+        title = f"{i}. {p.get('name')}"
+        plans_payload['plans'].append({"title": title, "place": p, "votes": 0, "id": p.get("id") or str(uuid.uuid4().hex)})
+
+    # create the group and publish its plans in one request; the response
+    # carries the token and the stored plans (with ids), so no follow-up GET
+    try:
+        resp = http_replay.post(f"{BACKEND_URL}/groups/with-plans", json=plans_payload, timeout=8)
+        resp.raise_for_status()
+        data = resp.json()
+        return {"token": data.get("token") or uuid.uuid4().hex[:8],
+                "plans": data.get("plans", plans_payload["plans"]), "local": False}
+    except requests.exceptions.RequestException as e:
+        # backend not reachable -> client-only token, plans kept locally
+        return {"token": uuid.uuid4().hex[:8], "plans": plans_payload["plans"], "local": True,
+                "warning": f"Could not contact backend to publish the group. Working locally. ({e})"}
+
+@st.fragment(run_every=1.0)
+def publish_status():
+    job_id = st.session_state.get("publish_job")
+    if not job_id:
+        return
+    done = st.session_state.get("publish_done")
+    job = done if done and done["id"] == job_id else jobs.get(job_id)
+    if job is None or job["status"] in jobs.ACTIVE:
+        st.info("⏳ Finding places and publishing plans...")
+        return
+    if job["status"] == "error":
+        st.error(f"Publishing failed: {job['error']}")
+        return
+    result = job["result"]
+    if "error" in result:
+        st.error(result["error"])
+        return
+    if done is None or done["id"] != job_id:
+        # first time we see this result: adopt it and rerun the page so the voting panel shows it
+        st.session_state.publish_done = job
+        st.session_state.group_token = result["token"]
+        st.session_state.plans_local = result["plans"]
+        st.session_state.plans_fetched_at = time.time()
+        st.rerun()
+    if result["local"]:
+        st.warning(result["warning"])
+        st.text_input("Group token (local)", value=result["token"], key="local_group_token_input")
+    else:
+        st.success(f"Group created. Token: `{result['token']}`")
+        st.text_input("Group token (copy to share)", value=result["token"], key="group_token_input")
+    st.success("Plans prepared. Use the voting UI below and share the group token with friends.")
+
+# ---------------- voting panel (fragment) ----------------
+# The panel is a fragment: a vote or refresh click re-renders only this panel
+# (no geolocator setup, group form or other backend calls), a vote costs one POST,
+# and the panel polls for other members' votes every VOTE_REFRESH_S seconds.
+VOTE_REFRESH_S = 10
+
+def _fetch_plans(token):
+    resp = http_replay.get(f"{BACKEND_URL}/groups/{token}/plans", timeout=6)
+    resp.raise_for_status()
+    return resp.json().get("plans", [])
+
+def _request_refresh():
+    st.session_state.plans_fetched_at = 0
+
+def _cast_vote(token, p_id):
+    """Button callback: update the local count immediately, then reconcile with the backend."""
+    plan = next((p for p in st.session_state.plans_local if p.get("id") == p_id), None)
+    if plan is None:
+        return
+    if not token:
+        # update local copy only
+        plan["votes"] = plan.get("votes", 0) + 1
+        st.session_state.vote_notice = ("success", "Vote recorded locally.")
+        return
+    my_votes = st.session_state.setdefault("my_votes", set())
+    want = p_id not in my_votes  # send the intended state, so a retried request can't flip it back
+    delta = 1 if want else -1
+    plan["votes"] = plan.get("votes", 0) + delta
+    my_votes.symmetric_difference_update({p_id})
+    try:
+        r = http_replay.post(
+            f"{BACKEND_URL}/groups/{token}/votes",
+            json={"ops": [{"plan_id": p_id, "user_id": st.session_state.user_id, "vote": want}]},
+            timeout=6
+        )
+        r.raise_for_status()
+        for updated in r.json().get("plans", []):
+            if updated.get("id") == p_id:
+                plan["votes"] = updated.get("votes", plan["votes"])
+    except requests.exceptions.RequestException as exc:
+        plan["votes"] -= delta
+        my_votes.symmetric_difference_update({p_id})
+        st.session_state.vote_notice = ("error", f"Vote failed: {exc} (tried {BACKEND_URL}/groups/{token}/votes)")
+
+@st.fragment(run_every=VOTE_REFRESH_S)
+def voting_panel():
     if not st.session_state.plans_local:
         st.info("No plans published yet. Click 'Find Suggestions & Publish Plans' first or Load Demo Data.")
+        return
+    token = st.session_state.group_token
+
+    # poll the backend only when our copy is stale; a vote click reruns this fragment
+    # with the count already updated by _cast_vote, so it doesn't fetch again
+    if token and time.time() - st.session_state.get("plans_fetched_at", 0) >= VOTE_REFRESH_S:
+        try:
+            st.session_state.plans_local = _fetch_plans(token)
+        except requests.exceptions.HTTPError as he:
+            st.error(f"HTTP error when refreshing: {he}")
+            st.write("Tried URL:", f"{BACKEND_URL}/groups/{token}/plans")
+        except Exception as e:
+            # keep existing local plans
+            st.caption(f"Showing last known votes (refresh failed: {e})")
+        st.session_state.plans_fetched_at = time.time()
+
+    notice = st.session_state.pop("vote_notice", None)
+    if notice:
+        getattr(st, notice[0])(notice[1])
+
+    # render plans
+    for idx, p in enumerate(st.session_state.plans_local):
+        p_id = p.get("id", f"plan_{idx}")
+        colA, colB = st.columns([4, 1])
+        with colA:
+            address = p.get("place", {}).get("address", "")
+            st.markdown(f"**{p.get('title', 'Untitled')}**  \n{address}")
+        with colB:
+            st.write(f"Votes: {p.get('votes', 0)}")
+            st.button("👍 Vote", key=f"vote_{p_id}", on_click=_cast_vote, args=(token, p_id))
+
+    st.write("")  # spacer
+
+    # manual refresh
+    if not token:
+        st.caption("Local plans only — publish to a backend group to sync votes.")
     else:
-        token = st.session_state.group_token
-        placeholder = st.empty()
-
-        def fetch_and_render():
-            # try to get latest plans from backend, fallback to local
-            plans = st.session_state.plans_local
-            if token:
-                try:
-                    resp = requests.get(f"{BACKEND_URL}/groups/{token}/plans", timeout=6)
-                    resp.raise_for_status()
-                    plans = resp.json().get("plans", plans)
-                    # store local copy
-                    st.session_state.plans_local = plans
-                except Exception:
-                    # keep existing local plans
-                    plans = st.session_state.plans_local
-
-            # render plans
-            for idx, p in enumerate(plans):
-                p_id = p.get("id", f"plan_{idx}")
-                colA, colB = st.columns([4, 1])
-                with colA:
-                    address = p.get("place", {}).get("address", "")
-                    st.markdown(f"**{p.get('title', 'Untitled')}**  \n{address}")
-                with colB:
-                    votes = p.get("votes", 0)
-                    st.write(f"Votes: {votes}")
-                    # voting button per plan
-                    if st.button("👍 Vote", key=f"vote_{p_id}"):
-                        # optimistic UI: call backend vote endpoint if possible, otherwise update local
-                        if token:
-                            try:
-                                r = requests.post(
-                                    f"{BACKEND_URL}/groups/{token}/plans/{p_id}/vote",
-                                    json={"user_id": st.session_state.user_id},
-                                    timeout=6
-                                )
-                                r.raise_for_status()
-                                # refresh plans
-                                new = requests.get(f"{BACKEND_URL}/groups/{token}/plans", timeout=6).json()
-                                st.session_state.plans_local = new.get("plans", st.session_state.plans_local)
-                                st.experimental_rerun()
-                            except requests.exceptions.RequestException as exc:
-                                st.error(f"Vote failed: {exc}")
-                                st.write("Tried URL:", f"{BACKEND_URL}/groups/{token}/plans/{p_id}/vote")
-                        else:
-                            # update local copy only
-                            for pv in st.session_state.plans_local:
-                                if pv.get("id") == p_id:
-                                    pv["votes"] = pv.get("votes", 0) + 1
-                            st.success("Vote recorded locally.")
-                            st.experimental_rerun()
-
-        # initial render
-        fetch_and_render()
-
-        st.write("")  # spacer
-
-        # manual refresh
-        if st.button("Refresh votes"):
-            if not token:
-                st.warning("No group token available. Create/publish plans first or use demo data.")
-            else:
-                try:
-                    resp = requests.get(f"{BACKEND_URL}/groups/{token}/plans", timeout=6)
-                    resp.raise_for_status()
-                    data = resp.json()
-                    st.session_state.plans_local = data.get("plans", [])
-                    st.success("Votes refreshed.")
-                    st.experimental_rerun()
-                except requests.exceptions.HTTPError as he:
-                    st.error(f"HTTP error when refreshing: {he}")
-                    st.write("Tried URL:", f"{BACKEND_URL}/groups/{token}/plans")
-                    st.write("HTTP status:", resp.status_code if 'resp' in locals() else "no response")
-                except requests.exceptions.RequestException as re:
-                    st.error(f"Request failed when refreshing: {re}")
-                    st.write("Tried URL:", f"{BACKEND_URL}/groups/{token}/plans")
-                except Exception as e:
-                    st.error(f"Unexpected error when refreshing: {e}")
+        st.button("Refresh votes", on_click=_request_refresh)
 
 # ---------------- run app ----------------
 if __name__ == "__main__":
@@ -3,33 +3,40 @@ import sys
 import os
 import uuid
 import time
-import requests
 from datetime import datetime
-from geopy.geocoders import Nominatim
 
 # Backend URL configuration
 BACKEND_URL = "http://localhost:8000"
 
-# Add the backend directory to Python path
-backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
-print(f"Adding backend path: {backend_path}")  # Debug print
-sys.path.append(backend_path)
+# Import backend modules as the `backend` package only (see app.py)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# record/replay-aware HTTP (PLANPAL_HTTP_MODE=record|replay for offline runs)
+from backend import http_replay
+from backend.lazy_imports import lazy_import
+
+# heavy deps load on first use, not on every cold start / login page
+requests = lazy_import("requests")  # only needed for its exception types here
 
 # Import all components
-from authentication_new import (
+from backend.authentication_new import (
     init_user_db,
     login_page,
     register_page,
     verify_user,
     delete_user
 )
-from event_management import (
+from backend.event_management import (
     init_events_db,
     create_event_form,
     save_event,
     get_user_events,
     display_event,
-    update_participation_status
+    update_participation_status,
+    compute_centroid,
+    get_places_nearby
 )
 
 # Page configuration
@@ -39,9 +46,6 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize geolocation
-geolocator = Nominatim(user_agent="plan_my_outings_app", timeout=10)
-
 def show_planpal_interface():
     from backend.planpal_bot import generate_plan, init_gemini_client
     
@@ -83,53 +87,6 @@ if 'group_token' not in st.session_state:
 if 'plans_local' not in st.session_state:
     st.session_state.plans_local = []  # local representation of current plans
 
-# ---------- helper: geocode & places (reuse your working code) ----------
-geolocator = Nominatim(user_agent="plan_my_outings_app", timeout=10)
-
-def geocode_city(city):
-    try:
-        loc = geolocator.geocode(city)
-        if loc:
-            return float(loc.latitude), float(loc.longitude)
-    except Exception:
-        return None, None
-    return None, None
-
-def compute_centroid(members_csv):
-    cities = [c.strip() for c in members_csv.split(",") if c.strip()]
-    coords = []
-    for c in cities:
-        latlon = geocode_city(c)
-        if latlon[0] is not None:
-            coords.append(latlon)
-    if not coords:
-        return None, None
-    lat = sum(p[0] for p in coords) / len(coords)
-    lon = sum(p[1] for p in coords) / len(coords)
-    return lat, lon
-
-def places_near_viewbox(lat, lon, query="restaurant", limit=6, box_km=6):
-    import requests, math
-    deg = box_km / 111.0
-    min_lat = lat - deg
-    max_lat = lat + deg
-    min_lon = lon - deg
-    max_lon = lon + deg
-    viewbox = f"{min_lon},{max_lat},{max_lon},{min_lat}"
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {"q": query, "format": "json", "limit": limit, "viewbox": viewbox, "bounded": 1}
-    r = requests.get(url, params=params, headers={"User-Agent": "plan-my-outings-demo"})
-    arr = r.json() if r.status_code == 200 else []
-    results = []
-    for a in arr:
-        results.append({
-            "name": a.get("display_name").split(",")[0],
-            "address": a.get("display_name"),
-            "lat": float(a.get("lat")),
-            "lon": float(a.get("lon"))
-        })
-    return results
-
 # ---------- UI: inputs ----------
 st.subheader("Group details")
 group_name = st.text_input("Group name", value="Friends Night")
@@ -139,15 +96,13 @@ mood = st.selectbox("Mood", ["Chill", "Foodie", "Adventurous"])
 col1, col2 = st.columns(2)
 with col1:
     if st.button("Find Suggestions & Publish Plans"):
-        # compute centroid and places
-        latlon = compute_centroid(members)
+        # compute centroid and places (cached, rate-limited lookups from event_management)
+        latlon = compute_centroid([c.strip() for c in members.split(",") if c.strip()])
         if not latlon or latlon == (None, None):
             st.error("Could not compute centroid. Try simpler city names or Load Demo Data.")
         else:
             lat, lon = latlon
-            qmap = {"Chill":"cafe","Foodie":"restaurant","Adventurous":"park"}
-            query = qmap.get(mood, "restaurant")
-            candidates = places_near_viewbox(lat, lon, query=query, limit=8, box_km=6)
+            candidates = get_places_nearby(lat, lon, mood)
             # pick first 3 (or fallback)
             if len(candidates) < 3:
                 # fallback demo points near centroid
@@ -157,31 +112,26 @@ with col1:
                     {"name":"Demo Place C","address":"Demo address C","lat":lat+0.001,"lon":lon-0.001},
                 ]
             chosen = candidates[:3]
-            # 1) create group on backend
-            try:
-                resp = requests.post(f"{BACKEND_URL}/groups", json={"name": group_name}, timeout=8)
-                token = resp.json().get("token")
-                st.session_state.group_token = token
-                st.info(f"Group created. Token: `{token}`")
-                st.text_input("Group token (copy to share)", value=token)
-            except Exception as e:
-                st.error("Could not contact backend to create group. Is it running?")
-                st.stop()
-            # 2) publish plans
-            plans_payload = {"plans": []}
+            plans_payload = {"name": group_name, "plans": []}
             for i,p in enumerate(chosen, start=1):
                 title = f"{i}. {p['name']}"
                 plans_payload['plans'].append({"title": title, "place": p})
+            # create group and publish plans in one request (response includes plan ids)
             try:
-                r2 = requests.post(f"{BACKEND_URL}/groups/{token}/plans", json=plans_payload, timeout=8)
-            except Exception:
-                st.error("Failed to publish plans to backend.")
+                resp = http_replay.post(f"{BACKEND_URL}/groups/with-plans", json=plans_payload, timeout=8)
+                resp.raise_for_status()
+                data = resp.json()
+            except Exception as e:
+                st.error("Could not publish the group to backend. Is it running?")
                 st.stop()
+            token = data.get("token")
+            st.session_state.group_token = token
+            st.info(f"Group created. Token: `{token}`")
+            st.text_input("Group token (copy to share)", value=token)
             st.success("Plans published to backend. Use the voting UI below (and share the group token).")
-            # store local copy and fetch full plans (with ids)
-            time.sleep(0.3)
-            resp = requests.get(f"{BACKEND_URL}/groups/{token}/plans", timeout=8).json()
-            st.session_state.plans_local = resp.get("plans", [])
+            st.session_state.plans_local = data.get("plans", [])
+            st.session_state.plans_fetched_at = time.time()
+            st.session_state.my_votes = set()
 with col2:
     if st.button("Load Demo Data"):
         st.session_state.group_token = None
@@ -189,70 +139,66 @@ with col2:
         st.rerun()
 
 # ---------- Voting UI ----------
-st.divider()
-st.subheader("Vote for a plan")
-if not st.session_state.plans_local:
-    st.info("No plans published yet. Click 'Find Suggestions & Publish Plans' first.")
-else:
-    # display plans with votes and vote buttons
+# Fragment-scoped: a vote re-renders only this panel with one POST (the count is
+# updated optimistically in the button callback), and the panel polls every
+# VOTE_REFRESH_S seconds for other members' votes instead of refetching per click.
+VOTE_REFRESH_S = 10
+
+def _request_refresh():
+    st.session_state.plans_fetched_at = 0
+
+def _cast_vote(token, p_id):
+    plan = next((p for p in st.session_state.plans_local if p["id"] == p_id), None)
+    if plan is None:
+        return
+    my_votes = st.session_state.setdefault("my_votes", set())
+    want = p_id not in my_votes  # explicit set/unset, safe to retry
+    delta = 1 if want else -1
+    plan["votes"] = plan.get("votes", 0) + delta
+    my_votes.symmetric_difference_update({p_id})
+    try:
+        r = http_replay.post(
+            f"{BACKEND_URL}/groups/{token}/votes",
+            json={"ops": [{"plan_id": p_id, "user_id": st.session_state.user_id, "vote": want}]},
+            timeout=6
+        )
+        r.raise_for_status()
+        for updated in r.json().get("plans", []):
+            if updated.get("id") == p_id:
+                plan["votes"] = updated.get("votes", plan["votes"])
+    except requests.exceptions.RequestException as exc:
+        plan["votes"] -= delta
+        my_votes.symmetric_difference_update({p_id})
+        st.session_state.vote_error = f"Vote failed: {exc} (tried {BACKEND_URL}/groups/{token}/votes)"
+
+@st.fragment(run_every=VOTE_REFRESH_S)
+def voting_panel():
+    if not st.session_state.plans_local:
+        st.info("No plans published yet. Click 'Find Suggestions & Publish Plans' first.")
+        return
     token = st.session_state.group_token
-    placeholder = st.empty()
-    def fetch_and_render():
+    if token and time.time() - st.session_state.get("plans_fetched_at", 0) >= VOTE_REFRESH_S:
         try:
-            resp = requests.get(f"{BACKEND_URL}/groups/{token}/plans", timeout=6).json()
-            plans = resp.get("plans", [])
-        except Exception:
-            plans = st.session_state.plans_local  # fallback
-        # render
-        for p in plans:
-            colA, colB = st.columns([4,1])
-            with colA:
-                st.markdown(f"**{p['title']}**  \n{p.get('place',{}).get('address','')}")
-            with colB:
-                st.write(f"Votes: {p.get('votes',0)}")
-                # vote button
-                if st.button("👍 Vote", key=f"vote_{p['id']}"):
-
-                    # toggle vote for this user via backend
-                    try:
-                        r = requests.post(
-                            f"{BACKEND_URL}/groups/{token}/plans/{p['id']}/vote",
-                            json={"user_id": st.session_state.user_id},
-                            timeout=6
-                        )
-                        r.raise_for_status()
-                    except requests.exceptions.RequestException as exc:
-                        st.error(f"Vote failed: {exc}")
-                        st.write("Tried URL:", f"{BACKEND_URL}/groups/{token}/plans/{p['id']}/vote")
-                        st.stop()
-                    else:
-                        new = requests.get(f"{BACKEND_URL}/groups/{token}/plans", timeout=6).json()
-                        st.session_state.plans_local = new.get("plans", [])
-                        st.rerun()
-
-    
-    # initial render
-    fetch_and_render()
+            resp = http_replay.get(f"{BACKEND_URL}/groups/{token}/plans", timeout=6)
+            resp.raise_for_status()
+            st.session_state.plans_local = resp.json().get("plans", [])
+        except requests.exceptions.RequestException as re:
+            st.error(f"Request failed when refreshing: {re}")
+            st.write("Tried URL:", f"{BACKEND_URL}/groups/{token}/plans")
+        st.session_state.plans_fetched_at = time.time()
+    if st.session_state.get("vote_error"):
+        st.error(st.session_state.pop("vote_error"))
+    # render
+    for p in st.session_state.plans_local:
+        colA, colB = st.columns([4,1])
+        with colA:
+            st.markdown(f"**{p['title']}**  \n{p.get('place',{}).get('address','')}")
+        with colB:
+            st.write(f"Votes: {p.get('votes',0)}")
+            st.button("👍 Vote", key=f"vote_{p['id']}", on_click=_cast_vote, args=(token, p["id"]))
     st.write("")  # spacer
-    # manual refresh (improved error reporting)
-    if st.button("Refresh votes"):
-        if not token:
-            st.error("No group token available. Create/publish plans first.")
-        else:
-            try:
-                resp = requests.get(f"{BACKEND_URL}/groups/{token}/plans", timeout=6)
-                resp.raise_for_status()
-                data = resp.json()
-                st.session_state.plans_local = data.get("plans", [])
-                st.success("Votes refreshed.")
-                st.rerun()
-            except requests.exceptions.HTTPError as he:
-                st.error(f"HTTP error when refreshing: {he}")
-                st.write("Tried URL:", f"{BACKEND_URL}/groups/{token}/plans")
-                st.write("HTTP status:", resp.status_code if 'resp' in locals() else "no response")
-            except requests.exceptions.RequestException as re:
-                st.error(f"Request failed when refreshing: {re}")
-                st.write("Tried URL:", f"{BACKEND_URL}/groups/{token}/plans")
-            except Exception as e:
-                st.error(f"Unexpected error when refreshing: {e}")
+    st.button("Refresh votes", on_click=_request_refresh, disabled=not token)
 
+st.divider()
+st.subheader("Vote for a plan")
+voting_panel()
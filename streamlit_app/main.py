@@ -2,29 +2,34 @@ import streamlit as st
 import sys
 import os
 import uuid
-import requests
 from datetime import datetime
-from geopy.geocoders import Nominatim
 
-# Add the backend directory to Python path
-backend_path = os.path.join(os.path.dirname(__file__), '..', 'backend')
-sys.path.append(backend_path)
+# Import backend modules as the `backend` package only (see app.py)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from backend import gazetteer  # offline names -> coordinates, and type-ahead options
+from backend import prefetch
 
 # Import all components
-from authentication_new import (
+from backend.authentication_new import (
     init_user_db,
     login_page,
     register_page,
     verify_user,
-    delete_user
+    delete_user,
+    restore_session
 )
-from event_management import (
+from backend.event_management import (
     init_events_db,
     create_event_form,
     save_event,
     get_user_events,
     display_event,
-    update_participation_status
+    update_participation_status,
+    compute_centroid,
+    get_places_nearby
 )
 
 # Configuration
@@ -68,65 +73,6 @@ if 'group_token' not in st.session_state:
 if 'user_id' not in st.session_state:
     st.session_state.user_id = uuid.uuid4().hex[:8]
 
-# Initialize databases
-init_user_db()
-init_events_db()
-
-# Initialize geolocation
-geolocator = Nominatim(user_agent="plan_my_outings_app", timeout=10)
-
-def geocode_city(city):
-    """Get coordinates for a city"""
-    try:
-        loc = geolocator.geocode(city)
-        if loc:
-            return float(loc.latitude), float(loc.longitude)
-    except Exception:
-        return None, None
-    return None, None
-
-def compute_centroid(members_csv):
-    """Compute the center point of multiple cities"""
-    cities = [c.strip() for c in members_csv.split(",") if c.strip()]
-    coords = []
-    for c in cities:
-        latlon = geocode_city(c)
-        if latlon[0] is not None:
-            coords.append(latlon)
-    if not coords:
-        return None, None
-    lat = sum(p[0] for p in coords) / len(coords)
-    lon = sum(p[1] for p in coords) / len(coords)
-    return lat, lon
-
-def places_near_viewbox(lat, lon, query="restaurant", limit=6, box_km=6):
-    """Find places near a location"""
-    deg = box_km / 111.0
-    min_lat = lat - deg
-    max_lat = lat + deg
-    min_lon = lon - deg
-    max_lon = lon + deg
-    viewbox = f"{min_lon},{max_lat},{max_lon},{min_lat}"
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {
-        "q": query,
-        "format": "json",
-        "limit": limit,
-        "viewbox": viewbox,
-        "bounded": 1
-    }
-    r = requests.get(url, params=params, headers={"User-Agent": "plan-my-outings-app"})
-    arr = r.json() if r.status_code == 200 else []
-    results = []
-    for a in arr:
-        results.append({
-            "name": a.get("display_name").split(",")[0],
-            "address": a.get("display_name"),
-            "lat": float(a.get("lat")),
-            "lon": float(a.get("lon"))
-        })
-    return results
-
 def show_groups():
     """Display groups page"""
     st.header("👥 My Groups")
@@ -134,10 +80,12 @@ def show_groups():
     # Create New Group
     with st.expander("Create New Group"):
         group_name = st.text_input("Group Name", key="new_group_name")
-        members = st.text_area(
-            "Member locations (comma-separated)", 
+        members = st.multiselect(
+            "Member locations",
+            gazetteer.labels(),
             key="group_members",
-            help="Enter city names separated by commas"
+            accept_new_options=True,
+            help="Start typing a city or locality; anything not listed can be added as typed"
         )
         mood = st.selectbox(
             "Group Mood",
@@ -155,26 +103,21 @@ def show_groups():
                         st.error("Could not locate cities. Try using simpler city names.")
                     else:
                         lat, lon = latlon
-                        qmap = {
-                            "Chill": "cafe",
-                            "Foodie": "restaurant",
-                            "Adventurous": "park"
-                        }
-                        query = qmap.get(mood, "restaurant")
-                        candidates = places_near_viewbox(lat, lon, query=query, limit=8, box_km=6)
+                        # same cached, rate-limited lookups that prefetch_group warms
+                        candidates = get_places_nearby(lat, lon, mood)
                         
                         if candidates:
                             st.success("Found some great spots!")
                             for place in candidates[:3]:
                                 with st.container():
                                     st.write(f"**{place['name']}**")
-                                    st.write(f"📍 {place['address']}")
+                                    st.write(f"📍 {place.get('address') or place['name']}")
                                     if st.button("Create Event Here", key=f"create_event_{place['name']}"):
                                         # Pre-fill event creation form
                                         st.session_state.current_page = "events"
                                         st.session_state.pre_fill_event = {
                                             "title": f"{mood} outing at {place['name']}",
-                                            "location": place['address'],
+                                            "location": place.get('address') or place['name'],
                                             "type": mood
                                         }
                                         st.rerun()
@@ -185,11 +128,12 @@ def show_groups():
             if st.button("✨ Create Group", use_container_width=True):
                 if not group_name.strip():
                     st.error("Please enter a group name")
-                elif not members.strip():
+                elif not members:
                     st.error("Please enter member locations")
                 else:
                     # Here you would integrate with your group creation backend
                     token = uuid.uuid4().hex[:8]
+                    prefetch.prefetch_group(members)  # warm suggestions for every mood
                     st.success(f"Group '{group_name}' created!")
                     st.info(f"Share this group code with members: `{token}`")
                     st.session_state.group_token = token
@@ -210,7 +154,7 @@ def show_groups():
     if st.session_state.group_token:
         with st.container():
             st.write(f"**Active Group Code:** `{st.session_state.group_token}`")
-            st.write("Members: " + members)
+            st.write("Members: " + ", ".join(members))
             st.write(f"Mood: {mood}")
             
             # Show group actions
@@ -231,6 +175,7 @@ def main():
     st.markdown('<p class="main-header">🗺️ Planning My Outings</p>', unsafe_allow_html=True)
     st.markdown('<p class="sub-header">Your adventure planner companion</p>', unsafe_allow_html=True)
     
+    restore_session()
     if st.session_state.logged_in and st.session_state.current_user:
         # Main navigation
         tab1, tab2, tab3, tab4 = st.tabs(["🏠 Dashboard", "👥 Groups", "📅 Events", "👤 Profile"])
@@ -277,7 +222,9 @@ def main():
                         st.error(message)
             
             with event_tab2:
-                my_events = get_user_events(st.session_state.current_user['id'], 'created')
+                show_past = st.checkbox("Include past events", key="my_events_history")
+                my_events = get_user_events(st.session_state.current_user['id'], 'created',
+                                            include_history=show_past)
                 if my_events:
                     for event in my_events:
                         display_event(event)
@@ -29,11 +29,11 @@ if PROJECT_ROOT not in sys.path:
 # ---------- Now normal imports ----------
 import streamlit as st
 from datetime import datetime
-from geopy.geocoders import Nominatim
 
 # Import backend modules using package-qualified imports
 from backend.planpal_bot import show_planpal_chat_ui, show_event_planner_ui
-from backend.authentication_new import init_user_db, login_page, register_page, verify_user
+from backend.authentication_new import init_user_db, login_page, register_page, verify_user, restore_session, revoke_session
+from backend import jobs, recommender
 from backend.event_management import (
     init_events_db,
     create_event_form,
@@ -46,10 +46,6 @@ from backend.event_management import (
 # ---------- STREAMLIT CONFIG ----------
 st.set_page_config(page_title="Plan My Outings", page_icon="🗺️", layout="wide")
 
-# ---------- INITIALIZE DATABASES ----------
-init_user_db()
-init_events_db()
-
 # ---------- SESSION STATE ----------
 defaults = {
     "logged_in": False,
@@ -73,6 +69,10 @@ def show_login_page():
 
 def show_dashboard():
     st.header("🏠 Your Dashboard")
+    # precomputed by `python -m backend.recommender` (one indexed read)
+    recs = recommender.for_user(st.session_state.user_id, limit=5)
+    if recs:
+        st.caption("✨ Recommended for you: " + ", ".join(r["label"] or r["item"] for r in recs))
     events = get_user_events(st.session_state.user_id)
     if events:
         for event in events:
@@ -120,7 +120,8 @@ def show_join_events():
 
 def show_my_events():
     st.header("🎯 My Events")
-    events = get_user_events(st.session_state.user_id, event_type='created')
+    show_past = st.checkbox("Include past events", key="my_events_history")
+    events = get_user_events(st.session_state.user_id, event_type='created', include_history=show_past)
     if events:
         for event in events:
             display_event(event)
@@ -133,10 +134,18 @@ def show_groups():
     # Create new group
     with st.expander("➕ Create a Group"):
         group_name = st.text_input("Group Name", key="create_group_name")
+        from backend import gazetteer
+        member_locations = st.multiselect(
+            "Member locations (optional)",
+            gazetteer.labels(),
+            key="create_group_locations",
+            accept_new_options=True,
+            help="If given, suggestions for every mood are prepared in the background",
+        )
         if st.button("Create Group", use_container_width=True, key="btn_create_group"):
             if group_name.strip():
                 from backend.event_management import create_group
-                success, msg = create_group(group_name.strip(), st.session_state.user_id)
+                success, msg = create_group(group_name.strip(), st.session_state.user_id, member_locations)
                 if success:
                     st.success(msg)
                 else:
@@ -164,28 +173,51 @@ def show_smart_suggestions():
     st.caption("Get outing ideas based on your group's mood and member locations!")
 
     # Collect inputs
-    group_cities = st.text_area("Enter group members' cities (comma separated)", value="Delhi, Noida, Gurgaon")
+    from backend import gazetteer
+
+    cities = st.multiselect(
+        "Group members' cities",
+        gazetteer.labels(),
+        default=["Delhi", "Noida, Uttar Pradesh", "Gurugram, Haryana"],
+        accept_new_options=True,
+        help="Start typing a city or locality; anything not listed can be added as typed",
+    )
     mood = st.selectbox("Choose a mood", ["Chill", "Foodie", "Adventurous"])
 
     if st.button("✨ Suggest Places"):
-        from backend.event_management import compute_centroid, get_places_nearby
+        # geocoding + place search run on the job pool; the fragment below polls for the result
+        st.session_state.suggest_job = jobs.submit("smart_suggestions", {"cities": cities, "mood": mood})
+        st.session_state.suggest_mood = mood
 
-        cities = [c.strip() for c in group_cities.split(",") if c.strip()]
-        lat, lon = compute_centroid(cities)
-        if not lat or not lon:
-            st.error("Couldn't compute midpoint — check city names.")
-            return
+    smart_suggestions_results()
 
-        places = get_places_nearby(lat, lon, mood)
-        if not places:
-            st.warning("No suggestions found nearby. Try again with simpler names.")
-        else:
-            st.success(f"Top suggestions for '{mood}' mood:")
-            for i, p in enumerate(places, 1):
-                st.write(f"{i}. 📍 {p['name']}")
+@st.fragment(run_every=1.0)
+def smart_suggestions_results():
+    job_id = st.session_state.get("suggest_job")
+    if not job_id:
+        return
+    done = st.session_state.get("suggest_job_done")
+    job = done if done and done["id"] == job_id else jobs.get(job_id)
+    if job is None or job["status"] in jobs.ACTIVE:
+        st.info("⏳ Finding places near your group...")
+        return
+    st.session_state.suggest_job_done = job  # finished: later polls skip the DB
+    if job["status"] == "error":
+        st.error(f"Suggestion lookup failed: {job['error']}")
+        return
+    result = job["result"]
+    if result["lat"] is None:
+        st.error("Couldn't compute midpoint — check city names.")
+    elif not result["places"]:
+        st.warning("No suggestions found nearby. Try again with simpler names.")
+    else:
+        st.success(f"Top suggestions for '{st.session_state.get('suggest_mood')}' mood:")
+        for i, p in enumerate(result["places"], 1):
+            st.write(f"{i}. 📍 {p['name']}")
 
 # ---------- MAIN APP ----------
 def main():
+    restore_session()
     if not st.session_state.logged_in:
         # Show login/register page
         show_login_page()
@@ -220,6 +252,8 @@ def main():
         # Logout
         st.sidebar.write("---")
         if st.sidebar.button("🚪 Logout", use_container_width=True):
+            revoke_session(st.session_state.get("session_token"))
+            st.session_state.session_token = None
             st.session_state.logged_in = False
             st.session_state.username = None
             st.session_state.user_id = None
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# keep the API database out of the working tree and group creation off the network
+os.environ.setdefault("PLANPAL_API_DB", os.path.join(tempfile.mkdtemp(prefix="planpal-tests-"), "api.db"))
+os.environ.setdefault("PLANPAL_PREFETCH", "0")
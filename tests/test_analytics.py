@@ -0,0 +1,58 @@
+import sqlite3
+
+import pytest
+
+from backend import analytics
+from backend.migrations import API_MIGRATIONS, migrate
+
+NOW = 1_779_998_400  # on an hour boundary
+
+
+@pytest.fixture
+def c(tmp_path):
+    db_path = str(tmp_path / "api.db")
+    migrate(db_path, API_MIGRATIONS)
+    conn = sqlite3.connect(db_path)
+    yield conn.cursor()
+    conn.close()
+
+
+def test_timeline_buckets_adds_and_removes(c):
+    analytics.record(c, 1, added=[10, 10, 11], now=NOW + 5)
+    analytics.record(c, 1, removed=[10], now=NOW + 65)
+    analytics.record(c, 2, added=[20], now=NOW + 5)  # another group
+
+    minutes = analytics.timeline(c, 1, "minute")
+    assert minutes["group"] == [[NOW, 3, 0], [NOW + 60, 0, 1]]
+    assert minutes["plans"] == {10: [[NOW, 2, 0], [NOW + 60, 0, 1]], 11: [[NOW, 1, 0]]}
+    assert analytics.timeline(c, 1, "hour")["group"] == [[NOW, 3, 1]]
+    assert analytics.timeline(c, 1, "minute", since=NOW + 60)["group"] == [[NOW + 60, 0, 1]]
+    assert analytics.timeline(c, 1, "minute", plan_id=11)["group"] == [[NOW, 1, 0]]
+    with pytest.raises(ValueError):
+        analytics.timeline(c, 1, "day")
+
+
+def test_momentum_favours_recent_votes(c):
+    analytics.record(c, 1, added=[10, 10], now=NOW - 3000)  # older, more votes
+    analytics.record(c, 1, added=[11], now=NOW - 60)
+    analytics.record(c, 1, added=[12], removed=[12], now=NOW - 60)
+    analytics.record(c, 1, added=[13], now=NOW - 7200)  # outside the window
+
+    ranked = analytics.momentum(c, 1, window_s=3600, now=NOW)
+    assert [(pid, net) for pid, _, net in ranked] == [(11, 1), (10, 2), (12, 0)]
+    # with a long half-life the older plan's two votes win
+    assert analytics.momentum(c, 1, window_s=3600, half_life_s=10 ** 6, now=NOW)[0][0] == 10
+
+
+@pytest.mark.parametrize("window_s, half_life_s", [(3600, -1), (3600, 0), (0, None), (-60, 60)])
+def test_momentum_rejects_non_positive_parameters(c, window_s, half_life_s):
+    with pytest.raises(ValueError):
+        analytics.momentum(c, 1, window_s=window_s, half_life_s=half_life_s, now=NOW)
+
+
+def test_prune_drops_old_minute_rows_only(c):
+    analytics.record(c, 1, added=[10], now=NOW - analytics.MINUTE_RETENTION_S - 120)
+    analytics.record(c, 1, added=[10], now=NOW)
+    assert analytics.prune(c, NOW) == 1
+    assert analytics.timeline(c, 1, "minute")["group"] == [[NOW, 1, 0]]
+    assert len(analytics.timeline(c, 1, "hour")["group"]) == 2
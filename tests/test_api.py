@@ -0,0 +1,102 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import api
+from backend.migrations import API_MIGRATIONS, migrate
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "api.db")
+    migrate(db_path, API_MIGRATIONS)
+    monkeypatch.setattr(api, "DB_PATH", db_path)
+    api._GROUPS.clear()
+    return TestClient(api.app)
+
+
+def _create(client, *places):
+    r = client.post("/groups/with-plans", json={"name": "Trip", "plans": [
+        {"title": f"Plan {i}", "place": place} for i, place in enumerate(places)]})
+    assert r.status_code == 200
+    return r.json()
+
+
+def test_plan_places_come_back_as_stored(client):
+    created = _create(client, {"id": 1, "name": "A", "lat": 28}, {"id": 1, "name": "DIFFERENT"})
+    places = [p["place"] for p in created["plans"]]
+    assert places == [{"id": 1, "name": "A", "lat": 28.0}, {"id": 1, "name": "DIFFERENT"}]
+    served = client.get(f"/groups/{created['token']}/plans").json()["plans"]
+    assert [p["place"] for p in served] == places
+
+
+def test_export_needs_the_admin_token(client, monkeypatch):
+    token = _create(client, {"osm_type": "node", "osm_id": 1, "name": "A"})["token"]
+    monkeypatch.setattr(api, "EXPORT_TOKEN", None)
+    assert client.get("/export/groups").status_code == 404
+
+    monkeypatch.setattr(api, "EXPORT_TOKEN", "s3cret")
+    assert client.get("/export/groups").status_code == 401
+    assert client.get("/export/groups", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    r = client.get("/export/groups", headers={"Authorization": "Bearer s3cret"})
+    assert r.status_code == 200 and token in r.text
+    assert client.get("/export/nope", headers={"Authorization": "Bearer s3cret"}).status_code == 404
+
+
+def test_batch_votes_feed_momentum(client):
+    created = _create(client, {"name": "A"}, {"name": "B"})
+    token, (a, b) = created["token"], [p["id"] for p in created["plans"]]
+    ops = [{"plan_id": a, "user_id": "u1", "vote": True}, {"plan_id": a, "user_id": "u2", "vote": True},
+           {"plan_id": b, "user_id": "u1", "vote": True}]
+    r = client.post(f"/groups/{token}/votes", json={"ops": ops})
+    assert r.json()["plans"] == [{"id": a, "votes": 2}, {"id": b, "votes": 1}]
+    # replaying the same ops changes nothing, so the rollups don't count them twice
+    client.post(f"/groups/{token}/votes", json={"ops": ops})
+    client.post(f"/groups/{token}/votes", json={"ops": [{"plan_id": b, "user_id": "u1", "vote": False}]})
+
+    ranked = client.get(f"/groups/{token}/analytics/momentum").json()["plans"]
+    assert [(p["id"], p["net"]) for p in ranked] == [(a, 2), (b, 0)]
+
+
+def test_momentum_rejects_non_positive_parameters(client):
+    token = _create(client, {"name": "A"})["token"]
+    assert client.get(f"/groups/{token}/analytics/momentum", params={"half_life": -1}).status_code == 400
+    assert client.get(f"/groups/{token}/analytics/momentum", params={"half_life": 0}).status_code == 400
+    assert client.get(f"/groups/{token}/analytics/momentum", params={"window": 0}).status_code == 400
+    assert client.get(f"/groups/{token}/analytics/momentum", params={"half_life": 60}).status_code == 200
+
+
+def test_concurrent_toggles_by_one_user_dont_collide(client):
+    created = _create(client, {"name": "A"})
+    token, plan_id = created["token"], created["plans"][0]["id"]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: api.vote_plan(token, plan_id, {"user_id": "u1"}), range(40)))
+    assert sorted(r["status"] for r in results) == ["unvoted"] * 20 + ["voted"] * 20
+    served = client.get(f"/groups/{token}/plans").json()["plans"]
+    assert served[0]["votes"] == 0
+
+
+def test_votes_see_plans_added_by_another_worker(client):
+    created = _create(client, {"name": "A"})
+    token = created["token"]
+    client.post(f"/groups/{token}/plans/{created['plans'][0]['id']}/vote", json={"user_id": "u1"})  # caches the group
+    with sqlite3.connect(api.DB_PATH) as conn:  # another process adds a plan behind our cache
+        plan_id = conn.execute("INSERT INTO plans (group_id, title) SELECT id, 'Late' FROM groups WHERE token = ?",
+                               (token,)).lastrowid
+    r = client.post(f"/groups/{token}/votes", json={"ops": [{"plan_id": plan_id, "user_id": "u1", "vote": True}]})
+    assert r.status_code == 200
+    assert client.post(f"/groups/{token}/plans/{plan_id}/vote", json={"user_id": "u2"}).json()["votes"] == 2
+    assert client.post(f"/groups/{token}/plans/{plan_id + 1}/vote", json={"user_id": "u2"}).status_code == 404
+
+
+def test_groups_cannot_rewrite_each_others_places(client):
+    cafe = {"osm_type": "node", "osm_id": 5, "name": "Cafe", "note": "g1"}
+    mine = _create(client, cafe)["token"]
+    _create(client, {"osm_type": "node", "osm_id": 5, "name": "HACKED"})
+    served = client.get(f"/groups/{mine}/plans").json()["plans"]
+    assert served[0]["place"] == cafe
+    # two versions of one OSM place in a single publish keep their own attributes
+    both = _create(client, cafe, dict(cafe, note="g2"))["token"]
+    assert [p["place"]["note"] for p in client.get(f"/groups/{both}/plans").json()["plans"]] == ["g1", "g2"]
@@ -0,0 +1,63 @@
+import sqlite3
+from datetime import datetime
+
+from backend import archive
+from backend import event_management as em
+from backend.migrations import APP_MIGRATIONS, migrate
+
+NOW = em._epoch(datetime(2026, 6, 1))
+
+
+def _populate(db_path):
+    migrate(db_path, APP_MIGRATIONS)
+    events = [  # (id, start, duration hours)
+        (1, datetime(2026, 5, 1, 18), 2.0),    # long over
+        (2, datetime(2026, 5, 24, 21), 2.0),   # ended 7 days + 1 h before NOW
+        (3, datetime(2026, 5, 25, 18), 2.0),   # inside the grace period
+        (4, datetime(2026, 6, 2, 18), 2.0),    # upcoming
+        (5, datetime(2026, 5, 20, 0), 300.0),  # started long ago, still running
+    ]
+    with sqlite3.connect(db_path) as conn:
+        c = conn.cursor()
+        for event_id, start, hours in events:
+            c.execute("INSERT INTO events (id, creator_id, title, event_datetime, event_ts, event_type, location, "
+                      "duration) VALUES (?, 1, ?, ?, ?, 'Other', 'Delhi', ?)",
+                      (event_id, f"E{event_id}", start, em._epoch(start), hours))
+            c.executemany("INSERT INTO event_participants (event_id, user_id, status) VALUES (?, ?, 'attending')",
+                          [(event_id, 1), (event_id, 2)])
+            em._index_event_location(c, event_id, 28.6, 77.2, start)
+
+
+def _ids(conn, table, column="id"):
+    return sorted({row[0] for row in conn.execute(f"SELECT {column} FROM {table}")})
+
+
+def test_finished_events_move_with_their_rsvps(tmp_path):
+    db_path = str(tmp_path / "app.db")
+    _populate(db_path)
+    totals = archive.archive_finished_events(db_path, grace_days=7, batch=1, now=NOW)
+    assert totals == {"events": 2, "participants": 4}
+    with sqlite3.connect(db_path) as conn:
+        assert _ids(conn, "events") == [3, 4, 5]
+        assert _ids(conn, "events_archive") == [1, 2]
+        assert _ids(conn, "event_participants", "event_id") == [3, 4, 5]
+        assert _ids(conn, "event_participants_archive", "event_id") == [1, 2]
+        assert _ids(conn, "events_geo") == [3, 4, 5]
+        assert _ids(conn, "events_all") == [1, 2, 3, 4, 5]
+        assert conn.execute("SELECT COUNT(*) FROM event_participants_all").fetchone()[0] == 10
+
+    # re-running is a no-op
+    assert archive.archive_finished_events(db_path, grace_days=7, now=NOW) == {"events": 0, "participants": 0}
+
+
+def test_history_view_still_lists_archived_events(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "app.db")
+    _populate(db_path)
+    archive.archive_finished_events(db_path, grace_days=7, now=NOW)
+    monkeypatch.setattr(em, "DB_PATH", db_path)
+    em._cached_user_events.clear()
+    hot = {e["id"] for e in em.get_user_events(2, "all")}
+    em._cached_user_events.clear()
+    everything = {e["id"] for e in em.get_user_events(2, "all", include_history=True)}
+    assert hot == {3, 4, 5}
+    assert everything == {1, 2, 3, 4, 5}
@@ -0,0 +1,102 @@
+import sqlite3
+import time
+
+import pytest
+import streamlit as st
+
+from backend import authentication_new as auth
+from backend import passwords
+from backend.migrations import migrate, APP_MIGRATIONS
+
+
+@pytest.fixture
+def users_db(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "app.db")
+    migrate(db_path, APP_MIGRATIONS)
+    statements = []
+
+    def traced_db():
+        conn = sqlite3.connect(db_path)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(auth, "DB_PATH", db_path)
+    monkeypatch.setattr(auth, "get_db", traced_db)
+    monkeypatch.setattr(passwords, "DEFAULT_ITERATIONS", 1000)
+    return statements
+
+
+def _login(username="alice", password="Secr3t!pass"):
+    ok, msg = auth.create_user(username, username.title(), password, f"{username}@example.com")
+    assert ok, msg
+    ok, user = auth.verify_user(username, password)
+    assert ok
+    return user
+
+
+def _users_queries(statements):
+    return [s for s in statements if "FROM users" in s]
+
+
+def test_valid_token_skips_the_users_table(users_db):
+    user = _login()
+    token = auth.create_session(user)
+    users_db.clear()
+    resolved = auth.get_session_user(token)
+    assert resolved["username"] == "alice"
+    assert "password" not in resolved
+    assert _users_queries(users_db) == []
+
+
+def test_tampered_expired_and_revoked_tokens_are_rejected(users_db, monkeypatch):
+    user = _login()
+    token = auth.create_session(user)
+    user_id, expires, nonce, sig = token.split(".")
+    assert auth.get_session_user(f"{int(user_id) + 1}.{expires}.{nonce}.{sig}") is None
+    assert auth.get_session_user(f"{user_id}.{expires}.{nonce}.{'0' * len(sig)}") is None
+
+    with monkeypatch.context() as m:
+        m.setattr(time, "time", lambda: int(expires) + 1)
+        assert auth.get_session_user(token) is None
+
+    auth.revoke_session(token)
+    assert auth.get_session_user(token) is None
+
+
+def test_restore_session_on_rerun(users_db):
+    user = _login()
+    st.session_state.logged_in = True
+    st.session_state.session_token = auth.create_session(user)
+    st.session_state.current_user = None
+    users_db.clear()
+    assert auth.restore_session()["id"] == user["id"]
+    assert st.session_state.current_user["username"] == "alice"
+    assert _users_queries(users_db) == []
+
+    st.session_state.session_token += "0"  # tampered
+    assert auth.restore_session() is None
+    assert not st.session_state.logged_in
+    assert st.session_state.current_user is None
+
+
+def test_duplicate_signup_is_rejected_before_hashing(users_db, monkeypatch):
+    _login()
+    hashed = []
+    monkeypatch.setattr(auth, "hash_password", lambda pw: hashed.append(pw) or passwords.hash_password(pw))
+    assert auth.create_user("alice", "Other", "Secr3t!pass") == (False, "❌ Username already exists")
+    assert auth.create_user("bob", "Bob", "Secr3t!pass", "alice@example.com") == (False, "❌ Email already registered")
+    assert hashed == []
+    assert auth.create_user("bob", "Bob", "Secr3t!pass")[0]
+    assert len(hashed) == 1
+
+
+def test_unknown_user_is_checked_against_a_dummy_hash(users_db, monkeypatch):
+    _login()
+    checked = []
+    real_check = auth.check_password
+    monkeypatch.setattr(auth, "check_password", lambda pw, stored: checked.append(stored) or real_check(pw, stored))
+    assert auth.verify_user("nobody", "Secr3t!pass") == (False, None)
+    assert auth.verify_user("alice", "wrong") == (False, None)
+    assert len(checked) == 2
+    assert checked[0] == auth._dummy_hash() and passwords.is_hashed(checked[0])
+    assert auth.verify_user("alice@example.com", "Secr3t!pass")[0]
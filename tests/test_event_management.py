@@ -0,0 +1,93 @@
+import sqlite3
+import uuid
+from datetime import date, datetime, time
+
+import pytest
+
+from backend import event_management as em
+from backend.migrations import APP_MIGRATIONS, migrate
+from backend.ttl_cache import TTLCache
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "app.db")
+    migrate(db_path, APP_MIGRATIONS)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO users (id, username, name, password) VALUES (1, 'alice', 'Alice', 'x')")
+    monkeypatch.setattr(em, "DB_PATH", db_path)
+    em._cached_user_events.clear()
+    yield db_path
+    em._cached_user_events.clear()
+
+
+def _event(location):
+    return {"title": "Meetup", "date": date(2030, 1, 1), "time": time(18, 0), "type": "Other",
+            "duration": 2.0, "location": location, "description": "", "cost_estimate": 0,
+            "max_participants": 10}
+
+
+def _drain_geo_pool():
+    em._GEO_POOL.submit(lambda: None).result()
+
+
+def test_geocoding_refreshes_cached_event_lists(db, monkeypatch):
+    monkeypatch.setattr(em, "geocode_city", lambda city, caller="user": (None, None))
+    assert em.save_event(_event("Somewhere"), creator_id=1)[0]
+    _drain_geo_pool()
+    assert em.get_user_events(1)[0]["lat"] is None  # cached without coordinates
+
+    monkeypatch.setattr(em, "geocode_city", lambda city, caller="user": (28.61, 77.21))
+    assert em.geocode_missing_events() == 1
+    (event,) = em.get_user_events(1)
+    assert (event["lat"], event["lon"]) == (28.61, 77.21)
+
+
+def test_events_near_the_antimeridian(db):
+    with sqlite3.connect(db) as conn:
+        c = conn.cursor()
+        for event_id, lon in ((1, 179.95), (2, -179.95), (3, 170.0)):
+            when = datetime(2030, 1, 1, 18)
+            c.execute("INSERT INTO events (id, creator_id, title, event_datetime, event_ts, event_type, location, "
+                      "duration) VALUES (?, 1, 'E', ?, ?, 'Other', 'Fiji', 2)", (event_id, when, em._epoch(when)))
+            em._index_event_location(c, event_id, -17.0, lon, when)
+    for lon in (179.99, -179.99):
+        assert sorted(e["id"] for e in em.get_events_near(-17.0, lon, radius_km=25)) == [1, 2]
+    assert em._lon_ranges(179.0, 2.0) == [(177.0, 180.0), (-180.0, -179.0)]
+    assert em._lon_ranges(0.0, 2.0) == [(-2.0, 2.0)]
+
+
+def test_live_lookups_are_spaced(monkeypatch):
+    calls = []
+
+    class Geolocator:
+        def geocode(self, city):
+            calls.append(em.monotonic())
+            return None
+
+    monkeypatch.setattr(em, "geolocator", Geolocator())
+    monkeypatch.setattr(em, "NOMINATIM_INTERVAL_S", 0.1)
+    for _ in range(3):
+        em.geocode_city(f"nowhere-{uuid.uuid4().hex}")
+    assert len(calls) == 3
+    assert min(b - a for a, b in zip(calls, calls[1:])) >= 0.095
+
+
+def test_place_search_returns_publishable_places(monkeypatch):
+    class Response:
+        status_code = 200
+
+        def json(self):
+            return [{"osm_type": "node", "osm_id": 42, "display_name": "Blue Cafe, Saket, Delhi",
+                     "lat": "28.52", "lon": "77.21"}]
+
+    requested = []
+    monkeypatch.setattr(em, "_PLACES_CACHE", TTLCache(maxsize=8, ttl=60))
+    monkeypatch.setattr(em, "NOMINATIM_INTERVAL_S", 0.0)
+    monkeypatch.setattr(em.http_replay, "get", lambda url, **kw: requested.append(kw["params"]) or Response())
+    places = em.get_places_nearby(28.5, 77.2, "Foodie")
+    assert places == [{"id": 42, "osm_type": "node", "name": "Blue Cafe", "address": "Blue Cafe, Saket, Delhi",
+                       "lat": 28.52, "lon": 77.21}]
+    assert requested[0]["q"] == "restaurant"
+    assert em.get_places_nearby(28.5, 77.2, "Foodie") == places  # cached
+    assert len(requested) == 1
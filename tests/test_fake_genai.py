@@ -0,0 +1,42 @@
+import json
+import time
+
+import pytest
+
+from backend.fake_genai import FakeClient
+
+
+def _json_body(text):
+    return text[text.find("["):]
+
+
+def test_replies_are_seeded_and_parseable():
+    a = FakeClient(latency_ms=1.0, malformed_rate=0.0, seed=7)
+    b = FakeClient(latency_ms=1.0, malformed_rate=0.0, seed=7)
+    prompt = "Return the results as JSON array"
+    ra = a.models.generate_content(model="m", contents=prompt)
+    rb = b.models.generate_content(model="m", contents=prompt)
+    assert ra.text == rb.text
+    assert len(json.loads(_json_body(ra.text))) == 3
+    assert ra.usage_metadata.prompt_token_count == len(prompt) // 4
+
+
+def test_malformed_and_error_rates():
+    broken = FakeClient(latency_ms=1.0, malformed_rate=1.0, seed=1)
+    with pytest.raises(ValueError):
+        json.loads(_json_body(broken.models.generate_content(model="m", contents="JSON please").text))
+    failing = FakeClient(latency_ms=1.0, error_rate=1.0, seed=1)
+    with pytest.raises(RuntimeError):
+        failing.models.generate_content(model="m", contents="hi")
+
+
+def test_stream_yields_the_reply_in_timed_chunks():
+    prompt = "Return the results as JSON array"
+    whole = FakeClient(latency_ms=1.0, malformed_rate=0.0, seed=3).models.generate_content(model="m", contents=prompt)
+    client = FakeClient(latency_ms=1.0, chunk_ms=20.0, chunks=4, malformed_rate=0.0, seed=3)
+    t0 = time.perf_counter()
+    parts = list(client.models.generate_content_stream(model="m", contents=prompt))
+    elapsed = time.perf_counter() - t0
+    assert len(parts) == 4
+    assert "".join(p.text for p in parts) == whole.text
+    assert elapsed >= 3 * 0.020  # three gaps between four chunks
@@ -0,0 +1,44 @@
+import pytest
+
+from backend import gazetteer
+
+ROWS = [
+    # name, region, country, lat, lon, population, aliases
+    ("Delhi", "Delhi", "India", 28.61, 77.21, 16000000, "New Delhi|Dilli"),
+    ("Gurgaon", "Haryana", "India", 28.46, 77.03, 900000, "Gurugram"),
+    ("Saket", "Delhi", "India", 28.52, 77.21, 50000, ""),
+    ("Springfield", "Illinois", "United States", 39.80, -89.64, 114000, ""),
+    ("Springfield", "Missouri", "United States", 37.21, -93.29, 169000, ""),
+    ("São Paulo", "São Paulo", "Brazil", -23.55, -46.63, 12300000, "Sampa"),
+]
+
+
+@pytest.fixture(autouse=True)
+def small_gazetteer(tmp_path, monkeypatch):
+    path = tmp_path / "gazetteer.tsv"
+    path.write_text("# test extract\n" + "".join("\t".join(map(str, row)) + "\n" for row in ROWS), encoding="utf-8")
+    monkeypatch.setattr(gazetteer, "GAZETTEER_PATH", str(path))
+    monkeypatch.setattr(gazetteer, "_index", None)
+
+
+def test_lookup_names_aliases_and_accents():
+    assert gazetteer.lookup("saket") == (28.52, 77.21)
+    assert gazetteer.lookup("  NEW   delhi ") == (28.61, 77.21)
+    assert gazetteer.lookup("Gurugram, Haryana, India") == (28.46, 77.03)
+    assert gazetteer.lookup("sao paulo") == (-23.55, -46.63)
+    assert gazetteer.lookup("Atlantis") is None
+    assert gazetteer.lookup(", Delhi") is None
+
+
+def test_qualifier_narrows_ambiguous_names():
+    assert gazetteer.lookup("Springfield") == (37.21, -93.29)  # most populous wins
+    assert gazetteer.lookup("Springfield, Illinois") == (39.80, -89.64)
+    assert gazetteer.lookup("Springfield, Nowhere") == (37.21, -93.29)
+
+
+def test_suggest_and_labels_rank_by_population():
+    assert gazetteer.suggest("s") == ["São Paulo", "Springfield, Missouri", "Springfield, Illinois", "Saket, Delhi"]
+    assert gazetteer.suggest("s", limit=1) == ["São Paulo"]
+    assert gazetteer.suggest("dil") == ["Delhi"]
+    assert gazetteer.suggest("") == []
+    assert gazetteer.labels()[:2] == ["Delhi", "São Paulo"]
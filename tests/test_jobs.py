@@ -0,0 +1,141 @@
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend import jobs
+
+release = threading.Event()
+
+
+@jobs.register("test_echo")
+def _echo_job(params, context=None):
+    release.wait(5)
+    if params.get("fail"):
+        raise RuntimeError("boom")
+    return {"params": params, "context": getattr(context, "name", None)}
+
+
+_SIDE_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="test-side")
+
+
+@jobs.register("test_capped", pool=_SIDE_POOL, max_in_flight=2)
+def _capped_job(params, context=None):
+    release.wait(5)
+    return threading.current_thread().name
+
+
+class Session:
+    def __init__(self, name):
+        self.name = name
+
+
+@pytest.fixture(autouse=True)
+def jobs_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "DB_PATH", str(tmp_path / "jobs.db"))
+    release.clear()
+    yield
+    release.set()
+
+
+def _wait(job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = jobs.get(job_id)
+        if job["status"] not in jobs.ACTIVE:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} still {job['status']}")
+
+
+def test_identical_jobs_share_one_id():
+    first = jobs.submit("test_echo", {"x": 1})
+    assert jobs.submit("test_echo", {"x": 1}) == first
+    assert jobs.submit("test_echo", {"x": 2}) != first
+    release.set()
+    job = _wait(first)
+    assert job["status"] == "done" and job["result"] == {"params": {"x": 1}, "context": None}
+    assert jobs.submit("test_echo", {"x": 1}) != first  # finished jobs aren't reused
+
+
+def test_jobs_with_a_context_only_dedupe_within_that_context():
+    alice, bob = Session("alice"), Session("bob")
+    a = jobs.submit("test_echo", {"x": 1}, context=alice)
+    b = jobs.submit("test_echo", {"x": 1}, context=bob)
+    assert a != b
+    assert jobs.submit("test_echo", {"x": 1}, context=alice) == a
+    release.set()
+    assert _wait(a)["result"]["context"] == "alice"
+    assert _wait(b)["result"]["context"] == "bob"
+
+
+def test_dedupe_false_and_errors():
+    a = jobs.submit("test_echo", {"fail": True}, dedupe=False)
+    b = jobs.submit("test_echo", {"fail": True}, dedupe=False)
+    assert a != b
+    release.set()
+    assert _wait(a)["status"] == "error" and _wait(a)["error"] == "boom"
+    with pytest.raises(ValueError):
+        jobs.submit("no_such_kind", {})
+
+
+def _dead_pid():
+    pid = 4_000_000
+    while True:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return pid
+        except PermissionError:
+            pass
+        pid += 1
+
+
+def test_recovery_only_fails_jobs_of_exited_processes():
+    with jobs._connect() as conn:
+        for job_id, owner in (("orphan", f"{jobs._HOST}:{_dead_pid()}"), ("legacy", None),
+                              ("live", f"{jobs._HOST}:{os.getppid()}"), ("remote", "other-host:1")):
+            conn.execute("INSERT INTO jobs (id, kind, dedupe_key, status, created_at, owner) "
+                         "VALUES (?, 'test_echo', ?, 'running', 0, ?)", (job_id, job_id, owner))
+    jobs._recovered.discard(jobs.DB_PATH)
+    jobs._recover_once()
+    assert {job_id: jobs.get(job_id)["status"] for job_id in ("orphan", "legacy", "live", "remote")} == {
+        "orphan": "error", "legacy": "error", "live": "running", "remote": "running"}
+
+
+def test_a_failed_job_is_not_overwritten_when_its_handler_returns():
+    job_id = jobs.submit("test_echo", {"x": 3})
+    while jobs.get(job_id)["status"] == "queued":
+        time.sleep(0.01)
+    with jobs._connect() as conn:
+        conn.execute("UPDATE jobs SET status = 'error', error = 'cancelled' WHERE id = ?", (job_id,))
+    release.set()
+    time.sleep(0.2)  # let the handler return and attempt its final UPDATE
+    assert jobs.get(job_id)["error"] == "cancelled"
+
+
+def test_backend_modules_share_one_job_pool():
+    from backend import event_management, planpal_bot, prefetch
+    assert event_management.jobs is planpal_bot.jobs is prefetch.jobs is jobs
+    assert "jobs" not in sys.modules  # no second copy (and pool) under the bare name
+
+
+def test_capped_kinds_run_on_their_pool_and_drop_extra_work():
+    first = jobs.submit("test_capped", {"n": 1})
+    second = jobs.submit("test_capped", {"n": 2})
+    assert jobs.submit("test_capped", {"n": 1}) == first  # dedupe doesn't use up a slot
+    assert jobs.submit("test_capped", {"n": 3}) is None  # two in flight: dropped
+    release.set()
+    assert _wait(first)["result"].startswith("test-side")
+    _wait(second)
+    _SIDE_POOL.submit(lambda: None).result()  # slots are freed by the pool's done callbacks
+    assert jobs.submit("test_capped", {"n": 3}) is not None
+
+
+def test_prefetch_stays_off_the_user_job_pool():
+    from backend import prefetch
+    assert jobs._POOLS["prefetch_group"] is prefetch.PREFETCH_POOL is not jobs.JOB_POOL
+    assert jobs._CAPS["prefetch_group"] == prefetch.MAX_IN_FLIGHT
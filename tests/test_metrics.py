@@ -0,0 +1,25 @@
+import urllib.request
+
+from backend import metrics
+
+
+def test_prometheus_render_and_loopback_default(monkeypatch):
+    registry = metrics.Registry()
+    registry.counter("demo_total", "Demo counter").inc(3, kind="a")
+    registry.histogram("demo_seconds", "Demo latency").observe(0.2)
+    text = registry.render_prometheus()
+    assert 'demo_total{kind="a"} 3' in text
+    assert "demo_seconds_count 1" in text
+
+    monkeypatch.setattr(metrics, "_SERVER", None)
+    monkeypatch.setenv("PLANPAL_METRICS_PORT", "0")
+    monkeypatch.delenv("PLANPAL_METRICS_HOST", raising=False)
+    server = metrics.serve_metrics_from_env()
+    try:
+        host, port = server.server_address
+        assert host == "127.0.0.1"
+        body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read().decode()
+        assert "# TYPE" in body
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,59 @@
+import sqlite3
+
+from backend import migrations
+from backend.migrations import API_MIGRATIONS, APP_MIGRATIONS
+
+
+def _versions(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return {ns: migrations.current_version(conn, ns) for ns in ("app", "api")}
+
+
+def _tables(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def test_migrate_is_idempotent_and_per_namespace(tmp_path):
+    db_path = str(tmp_path / "shared.db")
+    assert migrations.migrate(db_path, APP_MIGRATIONS) == [v for v, _, _ in APP_MIGRATIONS]
+    assert migrations.migrate(db_path, APP_MIGRATIONS) == []
+    # the API history is independent: app version 8 must not count as API version 5
+    assert migrations.migrate(db_path, API_MIGRATIONS) == [v for v, _, _ in API_MIGRATIONS]
+    assert _versions(db_path) == {"app": APP_MIGRATIONS[-1][0], "api": API_MIGRATIONS[-1][0]}
+    assert {"users", "plans", "vote_rollup_hour", "recommendations"} <= _tables(db_path)
+
+
+def test_prefix_of_api_migrations_keeps_its_namespace(tmp_path):
+    db_path = str(tmp_path / "api.db")
+    migrations.migrate(db_path, API_MIGRATIONS[:4])
+    assert _versions(db_path) == {"app": 0, "api": 4}
+    assert migrations.migrate(db_path, API_MIGRATIONS) == [5]
+
+
+def _to_legacy_layout(db_path):
+    """Rewrite schema_version in the old version-keyed layout."""
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT version, name FROM schema_version").fetchall()
+        conn.execute("DROP TABLE schema_version")
+        conn.execute("CREATE TABLE schema_version (version INTEGER PRIMARY KEY, name TEXT NOT NULL, "
+                     "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+        conn.executemany("INSERT INTO schema_version (version, name) VALUES (?, ?)", rows)
+    migrations._checked.clear()
+
+
+def test_pre_namespace_version_table_is_upgraded(tmp_path):
+    # shared file migrated by the old code: the app's rows hid every API migration
+    shared = str(tmp_path / "shared.db")
+    migrations.migrate(shared, APP_MIGRATIONS)
+    _to_legacy_layout(shared)
+    migrations.ensure_schema(shared, API_MIGRATIONS)
+    assert _versions(shared) == {"app": APP_MIGRATIONS[-1][0], "api": API_MIGRATIONS[-1][0]}
+    assert "vote_rollup_minute" in _tables(shared)
+
+    # API-only file: its rows are recognised by name and nothing is re-applied
+    api_only = str(tmp_path / "api.db")
+    migrations.migrate(api_only, API_MIGRATIONS)
+    _to_legacy_layout(api_only)
+    assert migrations.migrate(api_only, API_MIGRATIONS) == []
+    assert _versions(api_only) == {"app": 0, "api": API_MIGRATIONS[-1][0]}
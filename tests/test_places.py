@@ -0,0 +1,44 @@
+import sqlite3
+
+import pytest
+
+from backend.migrations import API_MIGRATIONS, migrate
+from backend.places import load_places, place_key, upsert_places
+
+
+@pytest.fixture
+def c(tmp_path):
+    db_path = str(tmp_path / "api.db")
+    migrate(db_path, API_MIGRATIONS)
+    conn = sqlite3.connect(db_path)
+    yield conn.cursor()
+    conn.close()
+
+
+def test_place_key():
+    assert place_key({"osm_type": "node", "osm_id": 42, "name": "A"}).startswith("node:42@")
+    assert place_key({"osm_type": "way", "id": "42"}).startswith("way:42@")
+    assert place_key({"osm_type": "node", "osm_id": 42, "name": "A"}) != \
+        place_key({"osm_type": "node", "osm_id": 42, "name": "B"})
+    # a bare id is not an OSM identity: the key falls back to the content
+    assert place_key({"id": 1, "name": "A"}) != place_key({"id": 1, "name": "DIFFERENT"})
+    assert place_key({"id": 1, "name": "A"}).startswith("sha1:")
+
+
+def test_bare_ids_do_not_collide(c):
+    first, second = upsert_places(c, [{"id": 1, "name": "A"}, {"id": 1, "name": "DIFFERENT"}])
+    assert first != second
+    assert load_places(c, [first, second]) == {first: {"id": 1, "name": "A"}, second: {"id": 1, "name": "DIFFERENT"}}
+
+
+def test_osm_places_are_shared_only_when_identical(c):
+    cafe = {"osm_type": "node", "osm_id": 7, "name": "Old Cafe", "lat": 28.6, "lon": 77.2}
+    (node,) = upsert_places(c, [cafe])
+    (way,) = upsert_places(c, [{"osm_type": "way", "osm_id": 7, "name": "Some Road"}])
+    same, changed = upsert_places(c, [dict(cafe), dict(cafe, name="New Cafe", rating=4.5)])
+    assert node == same
+    assert len({node, way, changed}) == 3
+    # the first writer's row is untouched
+    assert load_places(c, [node])[node] == cafe
+    assert load_places(c, [changed])[changed] == dict(cafe, name="New Cafe", rating=4.5)
+    assert c.execute("SELECT COUNT(*) FROM places").fetchone()[0] == 3
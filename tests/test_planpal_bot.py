@@ -0,0 +1,58 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend import planpal_bot
+from backend.fake_genai import FakeClient
+
+
+def _planpal(latency_ms, **kwargs):
+    p = planpal_bot.PlanPal(**kwargs)
+    p.client = FakeClient(latency_ms=latency_ms, latency_sigma=0.0, malformed_rate=0.0, model_speed={}, seed=1)
+    return p
+
+
+def test_hedge_stats_are_consistent_under_concurrent_calls():
+    p = _planpal(1.0, deadline_s=5.0, hedge_after_s=5.0)
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        replies = list(pool.map(lambda i: p._call_model(f"hi {i}"), range(200)))
+    assert all(replies)
+    stats = p.hedge_report()
+    assert stats["calls"] == 200
+    assert stats["primary_wins"] + stats["fallback_wins"] + stats["timeouts"] == 200
+
+
+def test_abandoned_calls_are_bounded(monkeypatch):
+    monkeypatch.setattr(planpal_bot, "MAX_ABANDONED", 2)
+    p = _planpal(400.0, deadline_s=0.05, hedge_after_s=0.01)
+    with pytest.raises(TimeoutError):
+        p._call_model("slow")  # primary and fallback both left running
+    assert planpal_bot.abandoned_calls() == 2
+
+    start = time.monotonic()
+    with pytest.raises(TimeoutError, match="abandoned"):
+        p._call_model("fails fast")
+    assert time.monotonic() - start < 0.05
+    assert p.hedge_stats["timeouts"] == 2
+
+    deadline = time.monotonic() + 2.0
+    while planpal_bot.abandoned_calls() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert planpal_bot.abandoned_calls() == 0
+
+
+def test_suggestion_cache_is_opt_in(monkeypatch):
+    p = _planpal(1.0, deadline_s=5.0)
+    planpal_bot._SUGGESTION_CACHE.clear()
+    monkeypatch.setattr(planpal_bot, "SUGGESTION_CACHE_ENABLED", False)
+    p.get_event_suggestions("Opt-in Town", 4, "Chill")
+    p.get_event_suggestions("Opt-in Town", 4, "Chill")
+    assert p.hedge_stats["calls"] == 2
+    assert not p.suggestion_cached("Opt-in Town", 4, "Chill")
+
+    monkeypatch.setattr(planpal_bot, "SUGGESTION_CACHE_ENABLED", True)
+    first = p.get_event_suggestions("Opt-in Town", 4, "Chill")
+    assert p.get_event_suggestions("Opt-in Town", 4, "Chill") == first
+    assert p.hedge_stats["calls"] == 3
+    planpal_bot._SUGGESTION_CACHE.clear()
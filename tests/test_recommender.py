@@ -0,0 +1,75 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from backend import recommender
+from backend.migrations import APP_MIGRATIONS, migrate
+
+np = pytest.importorskip("numpy")
+
+
+def test_randomized_svd_matches_dense_svd():
+    rng = np.random.default_rng(1)
+    dense = (rng.random((40, 25)) < 0.2) * rng.random((40, 25))
+    rows, cols = np.nonzero(dense)
+    vals = dense[rows, cols].astype(np.float32)
+    u, s, vt = recommender.randomized_svd(rows.astype(np.int32), cols.astype(np.int32), vals, dense.shape, rank=5)
+    assert u.shape == (40, 5) and s.shape == (5,) and vt.shape == (5, 25)
+    np.testing.assert_allclose(s, np.linalg.svd(dense, compute_uv=False)[:5], rtol=1e-3)
+
+
+def _rsvp(c, event_id, event_type, location, user_ids):
+    when = datetime(2026, 5, 1, 18)
+    c.execute("INSERT INTO events (id, creator_id, title, event_datetime, event_ts, event_type, location, duration) "
+              "VALUES (?, 1, ?, ?, ?, ?, ?, 2.0)", (event_id, f"E{event_id}", when, int(when.timestamp()),
+                                                   event_type, location))
+    c.executemany("INSERT INTO event_participants (event_id, user_id, status) VALUES (?, ?, 'attending')",
+                  [(event_id, uid) for uid in user_ids])
+
+
+@pytest.fixture
+def app_db(tmp_path):
+    db_path = str(tmp_path / "app.db")
+    migrate(db_path, APP_MIGRATIONS)
+    with sqlite3.connect(db_path) as conn:
+        c = conn.cursor()
+        # users 1-4 go to concerts at the Arena and the Hall; user 5 has only been to the Arena
+        _rsvp(c, 1, "Concert", "Arena", [1, 2, 3, 4, 5])
+        _rsvp(c, 2, "Concert", "Hall", [1, 2, 3, 4])
+        # users 6-8 hike
+        _rsvp(c, 3, "Hike", "Ridge", [6, 7, 8])
+        _rsvp(c, 4, "Hike", "Lake", [6, 7])
+        c.executemany("INSERT INTO group_members (group_id, user_id) VALUES (?, ?)", [(9, 6), (9, 8)])
+    return db_path
+
+
+def test_build_recommends_what_similar_users_liked(app_db, tmp_path):
+    stats = recommender.build(app_db, str(tmp_path / "missing-api.db"), rank=2, top_k=5)
+    assert stats["users"] == 8 and stats["groups"] == 1
+
+    places = [r["item"] for r in recommender.for_user(5, db_path=app_db) if r["kind"] == "place"]
+    assert places[0] == "place:hall"
+    assert "place:arena" not in places  # already been there
+
+    places = [r["item"] for r in recommender.for_user(8, db_path=app_db) if r["kind"] == "place"]
+    assert places[0] == "place:lake"
+
+    group = recommender.for_group(9, db_path=app_db)
+    assert {r["kind"] for r in group} <= {"type", "place"}
+    assert group[0]["item"] in ("type:Hike", "place:ridge", "place:lake")
+
+
+def test_unknown_users_get_popular_items(app_db, tmp_path):
+    recommender.build(app_db, str(tmp_path / "missing-api.db"), rank=2, top_k=5)
+    popular = recommender.for_user(999, db_path=app_db)
+    assert popular == recommender.recommendations("global", db_path=app_db)
+    assert popular[0]["item"] in ("type:Concert", "place:arena")
+    assert popular[0]["label"] in ("Concert", "Arena")
+
+
+def test_build_without_interactions_is_a_no_op(tmp_path):
+    db_path = str(tmp_path / "app.db")
+    migrate(db_path, APP_MIGRATIONS)
+    assert recommender.build(db_path, str(tmp_path / "missing-api.db"))["interactions"] == 0
+    assert recommender.for_user(1, db_path=db_path) == []
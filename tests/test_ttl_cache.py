@@ -0,0 +1,33 @@
+import time
+
+from backend.ttl_cache import SQLiteTTLCache, TTLCache
+
+
+def test_lru_eviction_and_expiry():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" is now most recent
+    cache.set("c", 3)
+    assert "b" not in cache and cache.get("a") == 1 and cache.get("c") == 3
+    cache.set("short", 4, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("short", "gone") == "gone"
+    assert cache.pop("c") == 3 and cache.pop("c") is None
+
+
+def test_sqlite_entries_are_shared_and_namespaced(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    writer = SQLiteTTLCache("geocode", ttl=60, db_path=db_path)
+    writer.set(("delhi", 1), [28.6, 77.2])
+    # another process: empty memory, same database
+    reader = SQLiteTTLCache("geocode", ttl=60, db_path=db_path)
+    assert reader.get(("delhi", 1)) == [28.6, 77.2]
+    assert SQLiteTTLCache("places", db_path=db_path).get(("delhi", 1)) is None
+
+    writer.set("brief", "x", ttl=0.01)
+    time.sleep(0.02)
+    assert SQLiteTTLCache("geocode", db_path=db_path).get("brief") is None
+
+    writer.clear()
+    assert SQLiteTTLCache("geocode", db_path=db_path).get(("delhi", 1)) is None